@@ -1,6 +1,6 @@
 """API layer for the PDF QA backend."""
 
-from backend.api import files, qa
+from backend.api import files, health, jobs, qa
 from backend.api.router import api_router
 
-__all__ = ["files", "qa", "api_router"]
+__all__ = ["files", "health", "jobs", "qa", "api_router"]
@@ -1,21 +1,22 @@
-import asyncio
-import re
+import time
 from pathlib import Path
+from typing import List
 
 from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 
 from backend.core.config import settings
-from backend.core.dependency import (
-    get_qa_pipeline_manager,
-    get_upload_service,
-    get_vector_store_manager,
+from backend.core.dependency import get_ingest_service, get_upload_service
+from backend.models.api_models import (
+    ProcessedFile,
+    ProcessFileResponse,
+    ProcessFilesRequest,
+    ProcessFilesResponse,
+    UploadResponse,
 )
-from backend.models.api_models import ProcessFileResponse, UploadResponse
-from backend.services.file_processor import FileProcessor
-from backend.services.qa_service import QAPipelineManager
-from backend.services.upload_service import UploadService
-from backend.services.vector_store_service import VectorStoreManager
+from backend.services.ingest_service import IngestFile, IngestResult, IngestService, find_ingestable_files
+from backend.services.upload_service import StoredUpload, UploadService, UploadTooLargeError
 from backend.utils.logging_config import get_logger
+from backend.utils.shared_state import LockTimeoutError
 
 router = APIRouter(tags=["files"])
 
@@ -29,73 +30,149 @@ async def upload_file(
 ):
     logger.info("Received file upload for '%s'", file.filename)
     try:
-        saved_path = await upload_service.save(file)
-        filename = Path(saved_path).name
-        logger.info("Upload complete. Stored at %s", saved_path)
-        return UploadResponse(filename=filename)
+        stored = await upload_service.save(file)
+        logger.info("Upload complete. Stored at %s", stored.path)
+        return UploadResponse(
+            filename=stored.filename,
+            sha256=stored.sha256,
+            size_bytes=stored.size_bytes,
+            duplicate=stored.duplicate,
+        )
+    except UploadTooLargeError as exc:
+        logger.warning("Rejected upload '%s': %s", file.filename, exc)
+        raise HTTPException(status_code=413, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     except Exception as exc:
         logger.exception("Failed to persist uploaded file '%s'", file.filename)
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+def resolve_upload(filename: str, upload_service: UploadService) -> StoredUpload:
+    logger.info("Resolving uploaded file '%s'", filename)
+    stored = upload_service.resolve(filename)
+    if stored is None:
+        logger.warning("File '%s' not found in %s", filename, settings.upload_dir)
+        raise HTTPException(status_code=404, detail=f"File '{filename}' not found in {settings.upload_dir}")
+    return stored
+
+
 @router.post("/process-file", response_model=ProcessFileResponse)
 async def process_file(
     filename: str = Query(..., description="Filename to load from data/raw"),
-    vector_store_manager: VectorStoreManager = Depends(get_vector_store_manager),
-    qa_pipeline_manager: QAPipelineManager = Depends(get_qa_pipeline_manager),
+    ingest_service: IngestService = Depends(get_ingest_service),
+    upload_service: UploadService = Depends(get_upload_service),
 ):
-    # Some clients may wrap the filename in quotes; normalize and drop any path segments.
-    sanitized_filename = Path(filename.strip().strip('"').strip("'")).name
-    file_path = settings.upload_dir / sanitized_filename
-    logger.info("Received request to process file '%s' (sanitized to '%s')", filename, sanitized_filename)
-
-    if not file_path.exists():
-        logger.warning("File '%s' not found at %s", filename, file_path)
-        raise HTTPException(status_code=404, detail=f"File '{filename}' not found in {settings.upload_dir}")
+    stored = resolve_upload(filename, upload_service)
 
     try:
-        await vector_store_manager.clean_database()
-        logger.info("Cleaned vector store directory prior to processing.")
-
-        collection_base = file_path.stem
-        collection_name = re.sub(r"[^a-zA-Z0-9._-]+", "_", collection_base).lower()
-        collection_name = collection_name.strip("._-")
-        if not collection_name:
-            collection_name = "default_collection"
-        if len(collection_name) < 3:
-            collection_name = f"{collection_name}_kb"
-        collection_name = collection_name[:63].strip("._-")
-        if not collection_name:
-            collection_name = "default_collection"
-        if len(collection_name) < 3:
-            collection_name = f"{collection_name}_kb"
-        logger.info(
-            "Resolved collection name '%s' for file '%s' (original base '%s')",
-            collection_name,
-            filename,
-            collection_base,
-        )
-
-        file_processor = FileProcessor(str(file_path))
-        docs = await asyncio.to_thread(file_processor.process)
-        logger.info("File '%s' yielded %d document chunks", filename, len(docs) if docs else 0)
+        result = await ingest_service.ingest(stored.path, name=stored.filename, file_hash=stored.sha256)
 
-        if docs:
-            await vector_store_manager.set_collection(collection_name)
-            await vector_store_manager.add_documents(docs)
-            retriever = await vector_store_manager.get_retriever()
-            qa_pipeline_manager.create_pipeline(retriever)
+        if result.skipped:
+            return ProcessFileResponse(
+                message=(
+                    f"File '{filename}' is unchanged; reusing existing collection '{result.collection_name}'."
+                ),
+                num_docs=result.num_docs,
+                collection_name=result.collection_name,
+                skipped=True,
+                chunks_added=0,
+                chunks_removed=0,
+                embedding_cache_hits=0,
+                embedding_cache_misses=0,
+            )
 
+        if result.num_docs:
             return ProcessFileResponse(
                 message=(
                     f"File '{filename}' processed and added to the knowledge base with collection name "
-                    f"'{collection_name}'."
+                    f"'{result.collection_name}'."
                 ),
-                num_docs=len(docs),
+                num_docs=result.num_docs,
+                collection_name=result.collection_name,
+                chunks_added=result.chunks_added,
+                chunks_removed=result.chunks_removed,
+                embedding_cache_hits=result.embedding_stats.hits,
+                embedding_cache_misses=result.embedding_stats.misses,
             )
 
         logger.warning("No documents produced from file '%s'", filename)
         return ProcessFileResponse(message=f"File '{filename}' could not be processed or is empty.")
+    except LockTimeoutError:
+        logger.warning("Gave up waiting for another worker to finish processing '%s'.", filename)
+        raise HTTPException(status_code=409, detail=f"File '{filename}' is still being processed by another worker.")
     except Exception as exc:
         logger.exception("Failed to process file '%s'", filename)
         raise HTTPException(status_code=500, detail=str(exc))
+
+
+def resolve_directory(directory: str, upload_service: UploadService) -> List[Path]:
+    root = Path(settings.upload_dir).resolve()
+    path = (root / directory).resolve()
+    if path != root and root not in path.parents:
+        raise HTTPException(status_code=400, detail=f"Directory '{directory}' is outside {settings.upload_dir}.")
+    if not path.is_dir():
+        raise HTTPException(status_code=404, detail=f"Directory '{directory}' not found in {settings.upload_dir}.")
+    # The content-addressed upload objects are reached through their filenames instead.
+    return find_ingestable_files([path], exclude=upload_service.objects_dir.resolve())
+
+
+@router.post("/process-files", response_model=ProcessFilesResponse)
+async def process_files(
+    request: ProcessFilesRequest,
+    ingest_service: IngestService = Depends(get_ingest_service),
+    upload_service: UploadService = Depends(get_upload_service),
+):
+    files: List[IngestFile] = []
+    labels: List[str] = []
+    missing: List[ProcessedFile] = []
+    for filename in request.filenames or []:
+        stored = upload_service.resolve(filename)
+        if stored is None:
+            missing.append(ProcessedFile(filename=filename, status="failed", error="File not found."))
+        else:
+            files.append(IngestFile(stored.path, name=stored.filename, file_hash=stored.sha256))
+            labels.append(stored.filename)
+    if request.directory is not None:
+        for path in resolve_directory(request.directory, upload_service):
+            files.append(IngestFile(path))
+            labels.append(path.relative_to(Path(settings.upload_dir).resolve()).as_posix())
+
+    if not files and not missing:
+        raise HTTPException(status_code=400, detail="No files to process.")
+    if len(files) > settings.bulk_ingest_max_files:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{len(files)} files requested; at most {settings.bulk_ingest_max_files} can be processed at once.",
+        )
+
+    started = time.perf_counter()
+    try:
+        results = await ingest_service.ingest_many(files, parse_concurrency=settings.bulk_ingest_parse_concurrency)
+    except Exception as exc:
+        logger.exception("Bulk processing of %d files failed.", len(files))
+        raise HTTPException(status_code=500, detail=str(exc))
+
+    processed = [processed_file(label, result) for label, result in zip(labels, results)] + missing
+    stats = [result.embedding_stats for result in results if result.embedding_stats is not None]
+    return ProcessFilesResponse(
+        files=processed,
+        processed=sum(item.status == "processed" for item in processed),
+        skipped=sum(item.status == "skipped" for item in processed),
+        failed=sum(item.status == "failed" for item in processed),
+        embedding_cache_hits=sum(stat.hits for stat in stats),
+        embedding_cache_misses=sum(stat.misses for stat in stats),
+        seconds=round(time.perf_counter() - started, 3),
+    )
+
+
+def processed_file(filename: str, result: IngestResult) -> ProcessedFile:
+    return ProcessedFile(
+        filename=filename,
+        status=result.status,
+        collection_name=result.collection_name,
+        num_docs=result.num_docs,
+        chunks_added=result.chunks_added,
+        chunks_removed=result.chunks_removed,
+        error=result.error,
+    )
@@ -0,0 +1,49 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Response, status
+from fastapi.responses import PlainTextResponse
+
+from backend.core.dependency import get_warmup_service
+from backend.models.api_models import ComponentStatus, ReadinessResponse
+from backend.services.warmup_service import WarmupService
+from backend.utils.metrics import CONTENT_TYPE, REGISTRY
+
+router = APIRouter(tags=["health"])
+
+
+def _round(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds, 3) if seconds is not None else None
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def readiness(
+    response: Response,
+    warmup_service: WarmupService = Depends(get_warmup_service),
+):
+    """
+    Report whether the embedder, vector store and LLM client are loaded, with their load
+    timings. With warmup enabled this returns 503 until all of them are ready.
+    """
+    components = {
+        name: ComponentStatus(ready=state["ready"], load_seconds=_round(state["load_seconds"]))
+        for name, state in warmup_service.components().items()
+    }
+    ready = warmup_service.ready
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return ReadinessResponse(
+        ready=ready,
+        warmup=warmup_service.status,
+        warmup_seconds=_round(warmup_service.seconds),
+        warmup_error=warmup_service.error,
+        components=components,
+    )
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Latency histograms and counters for ingest and question answering, in the Prometheus
+    text exposition format.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
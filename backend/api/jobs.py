@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from backend.api.files import resolve_upload
+from backend.core.dependency import get_ingest_job_manager, get_upload_service
+from backend.models.api_models import JobStatusResponse, JobSubmitResponse
+from backend.services.job_service import IngestJob, IngestJobManager, JobQueueFullError
+from backend.services.upload_service import UploadService
+from backend.utils.logging_config import get_logger
+
+router = APIRouter(tags=["jobs"])
+
+logger = get_logger(__name__)
+
+
+def _to_status_response(job: IngestJob) -> JobStatusResponse:
+    result = job.result
+    return JobStatusResponse(
+        job_id=job.job_id,
+        filename=job.filename,
+        status=job.status,
+        stage=job.progress.stage,
+        pages_parsed=job.progress.pages_parsed,
+        chunks_parsed=job.progress.chunks_parsed,
+        chunks_embedded=job.progress.chunks_embedded,
+        chunks_upserted=job.progress.chunks_upserted,
+        elapsed_seconds=round(job.elapsed_seconds, 3),
+        chunks_per_second=round(job.chunks_per_second, 2),
+        collection_name=result.collection_name if result else None,
+        skipped=result.skipped if result else False,
+        error=job.error,
+    )
+
+
+@router.post("/jobs", response_model=JobSubmitResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_ingest_job(
+    filename: str = Query(..., description="Filename to load from data/raw"),
+    job_manager: IngestJobManager = Depends(get_ingest_job_manager),
+    upload_service: UploadService = Depends(get_upload_service),
+):
+    stored = resolve_upload(filename, upload_service)
+    try:
+        job = await job_manager.submit(stored.path, filename=stored.filename, file_hash=stored.sha256)
+    except JobQueueFullError as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": "5"})
+    return JobSubmitResponse(job_id=job.job_id, status=job.status, queue_depth=job_manager.queue_depth())
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_ingest_job(
+    job_id: str,
+    job_manager: IngestJobManager = Depends(get_ingest_job_manager),
+):
+    job = job_manager.get(job_id)
+    if job is None:
+        logger.warning("Ingest job '%s' not found.", job_id)
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    return _to_status_response(job)
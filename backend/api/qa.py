@@ -1,38 +1,254 @@
-import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 
-from backend.core.dependency import get_qa_pipeline_manager
-from backend.models.api_models import AnswerResponse, QuestionRequest
+from backend.core.config import settings
+from backend.core.dependency import get_answer_cache, get_ask_limiter, get_llm_scheduler, get_qa_pipeline_manager
+from backend.models.api_models import (
+    AnswerCacheStatsResponse,
+    AnswerResponse,
+    BatchAnswerItem,
+    BatchAnswerResponse,
+    BatchQuestionRequest,
+    LLMSchedulerStatsResponse,
+    QuestionRequest,
+)
+from backend.services.answer_cache import SemanticAnswerCache
+from backend.services.ingest_service import resolve_collection_name
+from backend.services.llm_scheduler import LLMScheduler
 from backend.services.qa_service import QAPipelineManager
+from backend.services.search_scope import MetadataFilter, SearchScope
+from backend.utils.concurrency import CapacityExceededError, InFlightLimiter
 from backend.utils.logging_config import get_logger
+from backend.utils.metrics import ASK_SECONDS
 
 router = APIRouter(tags=["qa"])
 
 logger = get_logger(__name__)
 
 
+def _resolve_collection(collection: Optional[str], qa_pipeline_manager: QAPipelineManager) -> str:
+    """
+    The requested collection, or the most recently processed one when none is given.
+    """
+    collection_name = collection or qa_pipeline_manager.active_collection
+    if collection_name is None:
+        logger.error("QA pipeline requested before initialization.")
+        raise HTTPException(status_code=500, detail="QA pipeline not initialized. Please process a file first.")
+    return collection_name
+
+
+def _resolve_scope(
+    request: Union[QuestionRequest, BatchQuestionRequest],
+    qa_pipeline_manager: QAPipelineManager,
+) -> Tuple[str, Optional[SearchScope]]:
+    """
+    The collection name a request is reported under and, for questions spanning several
+    collections or filtered by source or page, the scope to search. Filtering by source without
+    naming collections searches the collections those files were processed into.
+    """
+    try:
+        search_filter = MetadataFilter.build(
+            sources=request.sources,
+            pages=[(page_range.start, page_range.end) for page_range in request.pages or []],
+            first_page=1,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    collections = list(dict.fromkeys(([request.collection] if request.collection else []) + (request.collections or [])))
+    if not collections and search_filter is not None and search_filter.sources:
+        collections = list(dict.fromkeys(resolve_collection_name(Path(source).stem) for source in search_filter.sources))
+    if not collections:
+        collections = [_resolve_collection(None, qa_pipeline_manager)]
+    if len(collections) == 1 and search_filter is None:
+        return collections[0], None
+    scope = SearchScope(collections=collections, search_filter=search_filter)
+    return scope.label, scope
+
+
+def _observe_ask(
+    endpoint: str,
+    collection_name: Optional[str],
+    qa_pipeline_manager: QAPipelineManager,
+    outcome: str,
+    started: float,
+) -> None:
+    ASK_SECONDS.observe(
+        time.perf_counter() - started,
+        endpoint=endpoint,
+        collection=collection_name or "",
+        model=qa_pipeline_manager.model_name,
+        outcome=outcome,
+    )
+
+
+def _capacity_exceeded(exc: CapacityExceededError) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": str(exc.retry_after)})
+
+
 @router.post("/ask", response_model=AnswerResponse)
 async def ask_question(
     question: QuestionRequest,
     qa_pipeline_manager: QAPipelineManager = Depends(get_qa_pipeline_manager),
+    limiter: InFlightLimiter = Depends(get_ask_limiter),
 ):
+    started = time.perf_counter()
+    collection_name = question.collection
+    outcome = "error"
     try:
-        logger.info("Received question: %s", question.query)
-        qa_pipeline = qa_pipeline_manager.get_pipeline()
-        if qa_pipeline is None:
-            logger.error("QA pipeline requested before initialization.")
-            raise HTTPException(status_code=500, detail="QA pipeline not initialized. Please process a file first.")
-
-        result = await asyncio.to_thread(qa_pipeline.invoke, question.query)
-        logger.info("Successfully invoked QA pipeline.")
-
-        if isinstance(result, str):
-            return AnswerResponse(answer=result)
-        if isinstance(result, dict) and "result" in result:
-            return AnswerResponse(answer=result["result"])
-        return AnswerResponse(answer=str(result))
+        async with limiter.slot():
+            logger.info("Received question: %s", question.query)
+            collection_name, scope = _resolve_scope(question, qa_pipeline_manager)
+            result = await qa_pipeline_manager.aask(question.query, collection_name, scope)
+            outcome = "coalesced" if result.coalesced else "cached" if result.cached else "answered"
+            logger.info("Successfully answered question (%s).", outcome)
+            return AnswerResponse(answer=result.answer, cached=result.cached, coalesced=result.coalesced)
 
+    except CapacityExceededError as exc:
+        outcome = "rejected"
+        raise _capacity_exceeded(exc)
+    except HTTPException:
+        raise
     except Exception as exc:
         logger.exception("Failed to answer question: %s", question.query)
         raise HTTPException(status_code=500, detail=str(exc))
+    finally:
+        _observe_ask("/ask", collection_name, qa_pipeline_manager, outcome, started)
+
+
+@router.post("/ask/batch", response_model=BatchAnswerResponse)
+async def ask_questions_batch(
+    batch: BatchQuestionRequest,
+    qa_pipeline_manager: QAPipelineManager = Depends(get_qa_pipeline_manager),
+    limiter: InFlightLimiter = Depends(get_ask_limiter),
+):
+    """
+    Answer a list of questions against one collection (the active one by default), or across
+    the collections, sources and pages the request selects. Answers come back in input order;
+    a failed question carries an ``error`` instead of failing the whole batch. The batch holds
+    one ``/ask`` slot while it runs, so a full server turns it away with 503 as well.
+    """
+    if len(batch.queries) > settings.batch_max_questions:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch has {len(batch.queries)} questions; the limit is {settings.batch_max_questions}.",
+        )
+    try:
+        async with limiter.slot():
+            logger.info("Received batch of %d questions.", len(batch.queries))
+            collection_name, scope = _resolve_scope(batch, qa_pipeline_manager)
+            answers = await qa_pipeline_manager.aanswer_batch(
+                batch.queries,
+                concurrency=settings.batch_llm_concurrency,
+                collection_name=collection_name,
+                scope=scope,
+            )
+    except CapacityExceededError as exc:
+        raise _capacity_exceeded(exc)
+    return BatchAnswerResponse(
+        answers=[
+            BatchAnswerItem(query=item.query, answer=item.answer, cached=item.cached, error=item.error)
+            for item in answers
+        ],
+        collection_name=collection_name,
+    )
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/ask/stream")
+async def ask_question_stream(
+    question: QuestionRequest,
+    qa_pipeline_manager: QAPipelineManager = Depends(get_qa_pipeline_manager),
+    limiter: InFlightLimiter = Depends(get_ask_limiter),
+):
+    """
+    Stream the answer as Server-Sent Events: ``token`` events carry answer text as the model
+    produces it, then a ``sources`` event lists the metadata of the retrieved chunks.
+    """
+    logger.info("Received streaming question: %s", question.query)
+    # Checked first, so a full server turns the request away before loading any collection.
+    try:
+        limiter.ensure_capacity()
+    except CapacityExceededError as exc:
+        raise _capacity_exceeded(exc)
+    collection_name, scope = _resolve_scope(question, qa_pipeline_manager)
+    if scope is not None:
+        await qa_pipeline_manager.get_scope_retrievers(scope)
+    else:
+        await qa_pipeline_manager.get_retriever(collection_name)
+
+    async def event_stream():
+        try:
+            async with limiter.slot():
+                async for event in answer_events():
+                    yield event
+        except CapacityExceededError as exc:
+            yield _sse_event("error", {"detail": str(exc)})
+
+    async def answer_events():
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            embedding = None
+            if scope is None:
+                embedding = await qa_pipeline_manager.embed_question(question.query, collection_name)
+            cached_answer = qa_pipeline_manager.lookup_answer(collection_name, embedding)
+            if cached_answer is not None:
+                outcome = "cached"
+                yield _sse_event("token", {"text": cached_answer})
+                yield _sse_event("done", {"cached": True})
+                return
+
+            documents = await qa_pipeline_manager.aretrieve(question.query, embedding, collection_name, scope)
+            prompt = qa_pipeline_manager.build_prompt(question.query, documents, collection_name)
+            tokens = []
+            async for token in qa_pipeline_manager.astream_answer(prompt, collection_name):
+                tokens.append(token)
+                yield _sse_event("token", {"text": token})
+            qa_pipeline_manager.remember_answer(collection_name, question.query, embedding, "".join(tokens))
+            outcome = "answered"
+            yield _sse_event("sources", {"sources": [doc.metadata for doc in documents]})
+            yield _sse_event("done", {})
+            logger.info("Finished streaming answer.")
+        except Exception as exc:
+            logger.exception("Failed to stream answer for question: %s", question.query)
+            yield _sse_event("error", {"detail": str(exc)})
+        finally:
+            _observe_ask("/ask/stream", collection_name, qa_pipeline_manager, outcome, started)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/ask/cache-stats", response_model=AnswerCacheStatsResponse)
+async def answer_cache_stats(answer_cache: SemanticAnswerCache = Depends(get_answer_cache)):
+    if not settings.answer_cache_enabled:
+        return AnswerCacheStatsResponse(enabled=False)
+    return AnswerCacheStatsResponse(
+        enabled=True,
+        hits=answer_cache.hits,
+        misses=answer_cache.misses,
+        hit_rate=round(answer_cache.hit_rate, 4),
+        entries=answer_cache.size,
+    )
+
+
+@router.get("/ask/llm-stats", response_model=LLMSchedulerStatsResponse)
+async def llm_scheduler_stats(llm_scheduler: LLMScheduler = Depends(get_llm_scheduler)):
+    if not settings.llm_scheduler_enabled:
+        return LLMSchedulerStatsResponse(enabled=False)
+    stats = llm_scheduler.stats()
+    stats["fallback_rate"] = round(stats["fallback_rate"], 4)
+    stats["paused_seconds"] = round(stats["paused_seconds"], 3)
+    return LLMSchedulerStatsResponse(enabled=True, **stats)
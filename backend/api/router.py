@@ -1,9 +1,11 @@
 from fastapi import APIRouter
 
-from backend.api import files, qa
+from backend.api import files, health, jobs, qa
 
 api_router = APIRouter()
 api_router.include_router(files.router)
+api_router.include_router(jobs.router)
 api_router.include_router(qa.router)
+api_router.include_router(health.router)
 
 __all__ = ["api_router"]
@@ -0,0 +1,88 @@
+"""
+Command-line entry points that run against the same data directory as the API.
+
+Usage:
+    python -m backend.cli ingest data/corpus/ extra/report.pdf --parse-concurrency 8
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from backend.core.config import settings
+from backend.services.ingest_service import IngestFile, IngestResult, find_ingestable_files
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="Bulk ingest files and directories into per-file collections.")
+    ingest.add_argument("paths", nargs="+", help="Files, or directories searched recursively for .pdf and .txt files.")
+    ingest.add_argument(
+        "--parse-concurrency",
+        type=int,
+        default=settings.bulk_ingest_parse_concurrency,
+        help="Files parsed at once.",
+    )
+    ingest.add_argument("--json", action="store_true", help="Print the per-file results as JSON.")
+    return parser.parse_args(argv)
+
+
+def describe(path: str, result: IngestResult) -> str:
+    if result.error:
+        return f"{result.status:<9} {path}: {result.error}"
+    return (
+        f"{result.status:<9} {path} -> {result.collection_name} "
+        f"({result.num_docs} chunks, +{result.chunks_added} -{result.chunks_removed})"
+    )
+
+
+async def ingest(args: argparse.Namespace) -> List[Tuple[str, IngestResult]]:
+    # Imported here so --help does not load the embedding model.
+    from backend.core.dependency import get_ingest_service
+
+    files = [IngestFile(path) for path in find_ingestable_files(args.paths)]
+    if not files:
+        raise SystemExit("No .pdf or .txt files found.")
+    results = await get_ingest_service().ingest_many(files, parse_concurrency=args.parse_concurrency)
+    return [(str(file.file_path), result) for file, result in zip(files, results)]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    started = time.perf_counter()
+    results = asyncio.run(ingest(args))
+    seconds = time.perf_counter() - started
+
+    if args.json:
+        payload = [
+            {
+                "path": path,
+                "filename": result.name,
+                "status": result.status,
+                "collection_name": result.collection_name,
+                "num_docs": result.num_docs,
+                "chunks_added": result.chunks_added,
+                "chunks_removed": result.chunks_removed,
+                "error": result.error,
+            }
+            for path, result in results
+        ]
+        print(json.dumps(payload, indent=2))
+    else:
+        for path, result in results:
+            print(describe(path, result))
+        statuses = [result.status for _, result in results]
+        counts = {status: statuses.count(status) for status in ("processed", "skipped", "empty", "failed")}
+        summary = ", ".join(f"{count} {status}" for status, count in counts.items() if count)
+        print(f"{len(results)} files in {seconds:.1f}s: {summary}", file=sys.stderr)
+
+    if any(result.error for _, result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
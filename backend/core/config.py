@@ -17,15 +17,84 @@ class Settings(BaseSettings):
     data_dir: Path = base_dir / "data"
     upload_dir: Path = data_dir / "raw"
     vector_db_dir: Path = data_dir / "vector_db"
+    embedding_cache_path: Path = data_dir / "embedding_cache" / "embeddings.sqlite3"
+    manifest_path: Path = vector_db_dir / "manifest.json"
+    lexical_index_dir: Path = vector_db_dir / "lexical"
+    lock_dir: Path = vector_db_dir / "locks"
+    parsed_text_cache_dir: Path = data_dir / "parsed_text"
+    jobs_path: Path = data_dir / "jobs.json"
 
     frontend_origin: str = Field(default="http://localhost:3000", alias="FRONTEND_ORIGIN")
     groq_api_key: Optional[str] = Field(default=None, alias="GROQ_API_KEY")
     default_model: str = Field(default="openai/gpt-oss-120b", alias="GROQ_MODEL_NAME")
+    embedding_model_name: str = Field(default="all-MiniLM-L6-v2", alias="EMBEDDING_MODEL_NAME")
+    vector_store_backend: str = Field(default="chroma", alias="VECTOR_STORE_BACKEND")
+    embedding_backend: str = Field(default="torch", alias="EMBEDDING_BACKEND")
+    embedding_onnx_file: str = Field(default="onnx/model_qint8_avx2.onnx", alias="EMBEDDING_ONNX_FILE")
+    embedding_encode_batch_size: int = Field(default=32, alias="EMBEDDING_ENCODE_BATCH_SIZE")
+    embedding_num_threads: int = Field(default=0, alias="EMBEDDING_NUM_THREADS")
+    embedding_cache_max_mb: int = Field(default=512, alias="EMBEDDING_CACHE_MAX_MB")
+    parsed_text_cache_enabled: bool = Field(default=True, alias="PARSED_TEXT_CACHE_ENABLED")
+    parsed_text_cache_max_mb: int = Field(default=1024, alias="PARSED_TEXT_CACHE_MAX_MB")
+    upload_max_mb: int = Field(default=200, alias="UPLOAD_MAX_MB")
+    chunk_size: int = Field(default=900, alias="CHUNK_SIZE")
+    chunk_overlap: int = Field(default=100, alias="CHUNK_OVERLAP")
+    ingest_page_batch_size: int = Field(default=10, alias="INGEST_PAGE_BATCH_SIZE")
+    embedding_batch_size: int = Field(default=64, alias="EMBEDDING_BATCH_SIZE")
+    ingest_queue_size: int = Field(default=4, alias="INGEST_QUEUE_SIZE")
+    bulk_ingest_parse_concurrency: int = Field(default=4, alias="BULK_INGEST_PARSE_CONCURRENCY")
+    bulk_ingest_max_files: int = Field(default=1000, alias="BULK_INGEST_MAX_FILES")
+    pdf_parse_workers: int = Field(default=0, alias="PDF_PARSE_WORKERS")
+    pdf_parallel_min_pages: int = Field(default=64, alias="PDF_PARALLEL_MIN_PAGES")
+    ingest_job_concurrency: int = Field(default=2, alias="INGEST_JOB_CONCURRENCY")
+    ingest_job_queue_size: int = Field(default=32, alias="INGEST_JOB_QUEUE_SIZE")
+    ingest_lock_timeout_seconds: float = Field(default=600, alias="INGEST_LOCK_TIMEOUT_SECONDS")
+    retrieval_k: int = Field(default=6, alias="RETRIEVAL_K")
+    hybrid_retrieval_enabled: bool = Field(default=True, alias="HYBRID_RETRIEVAL_ENABLED")
+    hybrid_fetch_k: int = Field(default=20, alias="HYBRID_FETCH_K")
+    rrf_k: int = Field(default=60, alias="RRF_K")
+    rerank_enabled: bool = Field(default=False, alias="RERANK_ENABLED")
+    rerank_model_name: str = Field(default="cross-encoder/ms-marco-MiniLM-L-6-v2", alias="RERANK_MODEL_NAME")
+    rerank_candidates: int = Field(default=30, alias="RERANK_CANDIDATES")
+    rerank_batch_size: int = Field(default=32, alias="RERANK_BATCH_SIZE")
+    rerank_cache_size: int = Field(default=50000, alias="RERANK_CACHE_SIZE")
+    bm25_k1: float = Field(default=1.5, alias="BM25_K1")
+    bm25_b: float = Field(default=0.75, alias="BM25_B")
+    context_packing_enabled: bool = Field(default=True, alias="CONTEXT_PACKING_ENABLED")
+    context_token_budget: int = Field(default=1500, alias="CONTEXT_TOKEN_BUDGET")
+    context_duplicate_threshold: float = Field(default=0.85, alias="CONTEXT_DUPLICATE_THRESHOLD")
+    answer_cache_enabled: bool = Field(default=True, alias="ANSWER_CACHE_ENABLED")
+    answer_cache_similarity_threshold: float = Field(default=0.92, alias="ANSWER_CACHE_SIMILARITY_THRESHOLD")
+    answer_cache_ttl_seconds: float = Field(default=3600, alias="ANSWER_CACHE_TTL_SECONDS")
+    answer_cache_max_entries: int = Field(default=1000, alias="ANSWER_CACHE_MAX_ENTRIES")
+    batch_llm_concurrency: int = Field(default=8, alias="BATCH_LLM_CONCURRENCY")
+    batch_max_questions: int = Field(default=500, alias="BATCH_MAX_QUESTIONS")
+    pipeline_cache_max_entries: int = Field(default=32, alias="PIPELINE_CACHE_MAX_ENTRIES")
+    pipeline_cache_memory_mb: int = Field(default=2048, alias="PIPELINE_CACHE_MEMORY_MB")
+    pipeline_idle_ttl_seconds: float = Field(default=1800, alias="PIPELINE_IDLE_TTL_SECONDS")
+    warmup_on_startup: bool = Field(default=False, alias="WARMUP_ON_STARTUP")
+    ask_max_in_flight: int = Field(default=256, alias="ASK_MAX_IN_FLIGHT")
+    ask_queue_timeout_seconds: float = Field(default=0.25, alias="ASK_QUEUE_TIMEOUT_SECONDS")
+    request_coalescing_enabled: bool = Field(default=True, alias="REQUEST_COALESCING_ENABLED")
+    groq_max_connections: int = Field(default=100, alias="GROQ_MAX_CONNECTIONS")
+    groq_max_keepalive_connections: int = Field(default=20, alias="GROQ_MAX_KEEPALIVE_CONNECTIONS")
+    groq_request_timeout: float = Field(default=60.0, alias="GROQ_REQUEST_TIMEOUT")
+    groq_max_retries: int = Field(default=3, alias="GROQ_MAX_RETRIES")
+    llm_scheduler_enabled: bool = Field(default=True, alias="LLM_SCHEDULER_ENABLED")
+    llm_requests_per_minute: float = Field(default=0, alias="LLM_REQUESTS_PER_MINUTE")
+    llm_tokens_per_minute: float = Field(default=0, alias="LLM_TOKENS_PER_MINUTE")
+    llm_expected_completion_tokens: int = Field(default=512, alias="LLM_EXPECTED_COMPLETION_TOKENS")
+    llm_hedge_after_seconds: float = Field(default=0, alias="LLM_HEDGE_AFTER_SECONDS")
+    llm_fallback_enabled: bool = Field(default=False, alias="LLM_FALLBACK_ENABLED")
+    llm_fallback_queue_seconds: float = Field(default=2.0, alias="LLM_FALLBACK_QUEUE_SECONDS")
+    ollama_model_name: str = Field(default="llama3.2", alias="OLLAMA_MODEL_NAME")
+    ollama_base_url: str = Field(default="http://localhost:11434", alias="OLLAMA_BASE_URL")
 
     def model_post_init(self, __context) -> None:
         # Ensure required directories exist after settings are loaded.
         self.upload_dir.mkdir(parents=True, exist_ok=True)
         self.vector_db_dir.mkdir(parents=True, exist_ok=True)
+        self.embedding_cache_path.parent.mkdir(parents=True, exist_ok=True)
 
 
 @lru_cache
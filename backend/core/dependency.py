@@ -1,32 +1,247 @@
 from functools import lru_cache
 
+import httpx
+
 from backend.core.config import settings
+from backend.services.answer_cache import SemanticAnswerCache
+from backend.services.context_packer import ContextPacker
+from backend.services.embedding_cache import EmbeddingCache
 from backend.services.file_processor import FileProcessor
+from backend.services.ingest_manifest import IngestManifest
+from backend.services.ingest_service import IngestService
+from backend.services.job_service import IngestJobManager
+from backend.services.lexical_index import LexicalIndexStore
+from backend.services.llm_scheduler import LLMScheduler
+from backend.services.numpy_vector_store import NumpyVectorStoreManager
+from backend.services.parsed_text_cache import ParsedTextCache
+from backend.services.pipeline_registry import PipelineRegistry
 from backend.services.qa_service import QAPipelineManager
+from backend.services.reranker import CrossEncoderReranker
 from backend.services.upload_service import UploadService
-from backend.services.vector_store_service import VectorStoreManager
+from backend.services.vector_store_service import VECTOR_STORE_BACKENDS, VectorStoreManager
+from backend.services.warmup_service import WarmupService
+from backend.utils.concurrency import InFlightLimiter, SingleFlight
+from backend.utils.groq_client import create_async_http_client
 from backend.utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
 
+@lru_cache()
+def get_embedding_cache() -> EmbeddingCache:
+    logger.debug("Providing EmbeddingCache singleton.")
+    return EmbeddingCache(
+        db_path=settings.embedding_cache_path,
+        max_bytes=settings.embedding_cache_max_mb * 1024 * 1024,
+    )
+
+
+@lru_cache()
+def get_parsed_text_cache() -> ParsedTextCache:
+    logger.debug("Providing ParsedTextCache singleton.")
+    return ParsedTextCache(
+        cache_dir=settings.parsed_text_cache_dir,
+        max_bytes=settings.parsed_text_cache_max_mb * 1024 * 1024,
+    )
+
+
 @lru_cache()
 def get_vector_store_manager() -> VectorStoreManager:
     logger.debug("Providing VectorStoreManager singleton.")
-    return VectorStoreManager(persist_directory=str(settings.vector_db_dir))
+    if settings.vector_store_backend not in VECTOR_STORE_BACKENDS:
+        raise ValueError(
+            f"Unknown vector store backend '{settings.vector_store_backend}'; "
+            f"expected one of {', '.join(VECTOR_STORE_BACKENDS)}."
+        )
+    manager_class = NumpyVectorStoreManager if settings.vector_store_backend == "numpy" else VectorStoreManager
+    return manager_class(
+        persist_directory=str(settings.vector_db_dir),
+        model_name=settings.embedding_model_name,
+        embedding_cache=get_embedding_cache(),
+        memory_limit_bytes=settings.pipeline_cache_memory_mb * 1024 * 1024,
+        embedding_backend=settings.embedding_backend,
+        encode_batch_size=settings.embedding_encode_batch_size,
+        num_threads=settings.embedding_num_threads,
+        onnx_file=settings.embedding_onnx_file,
+        version_of=get_ingest_manifest().version,
+    )
+
+
+@lru_cache()
+def get_answer_cache() -> SemanticAnswerCache:
+    logger.debug("Providing SemanticAnswerCache singleton.")
+    return SemanticAnswerCache(
+        similarity_threshold=settings.answer_cache_similarity_threshold,
+        ttl_seconds=settings.answer_cache_ttl_seconds,
+        max_entries=settings.answer_cache_max_entries,
+    )
+
+
+@lru_cache()
+def get_context_packer() -> ContextPacker:
+    logger.debug("Providing ContextPacker singleton.")
+    return ContextPacker(
+        token_budget=settings.context_token_budget,
+        duplicate_threshold=settings.context_duplicate_threshold,
+        chunk_overlap=settings.chunk_overlap,
+    )
+
+
+@lru_cache()
+def get_reranker() -> CrossEncoderReranker:
+    logger.debug("Providing CrossEncoderReranker singleton.")
+    return CrossEncoderReranker(
+        model_name=settings.rerank_model_name,
+        batch_size=settings.rerank_batch_size,
+        cache_size=settings.rerank_cache_size,
+    )
+
+
+@lru_cache()
+def get_groq_http_client() -> httpx.AsyncClient:
+    logger.debug("Providing shared Groq HTTP client.")
+    return create_async_http_client(
+        max_connections=settings.groq_max_connections,
+        max_keepalive_connections=settings.groq_max_keepalive_connections,
+        timeout=settings.groq_request_timeout,
+    )
+
+
+@lru_cache()
+def get_ask_limiter() -> InFlightLimiter:
+    logger.debug("Providing /ask InFlightLimiter singleton.")
+    return InFlightLimiter(
+        max_in_flight=settings.ask_max_in_flight,
+        queue_timeout_seconds=settings.ask_queue_timeout_seconds,
+    )
+
+
+@lru_cache()
+def get_pipeline_registry() -> PipelineRegistry:
+    logger.debug("Providing PipelineRegistry singleton.")
+    return PipelineRegistry(
+        vector_store_manager=get_vector_store_manager(),
+        lexical_indexes=get_lexical_index_store() if settings.hybrid_retrieval_enabled else None,
+        # With reranking on, the first stage over-fetches and the reranker keeps the best RETRIEVAL_K.
+        retrieval_k=settings.rerank_candidates if settings.rerank_enabled else settings.retrieval_k,
+        hybrid_fetch_k=settings.hybrid_fetch_k,
+        rrf_k=settings.rrf_k,
+        max_entries=settings.pipeline_cache_max_entries,
+        memory_budget_bytes=settings.pipeline_cache_memory_mb * 1024 * 1024,
+        idle_ttl_seconds=settings.pipeline_idle_ttl_seconds,
+        manifest=get_ingest_manifest(),
+    )
+
+
+def create_fallback_chat():
+    # Imported here because the Ollama client pulls in langchain_community.
+    from backend.utils.ollama_client import get_ollama_chat
+
+    return get_ollama_chat(model_name=settings.ollama_model_name, base_url=settings.ollama_base_url)
+
+
+@lru_cache()
+def get_llm_scheduler() -> LLMScheduler:
+    logger.debug("Providing LLMScheduler singleton.")
+    return LLMScheduler(
+        requests_per_minute=settings.llm_requests_per_minute,
+        tokens_per_minute=settings.llm_tokens_per_minute,
+        expected_completion_tokens=settings.llm_expected_completion_tokens,
+        hedge_after_seconds=settings.llm_hedge_after_seconds,
+        fallback_queue_seconds=settings.llm_fallback_queue_seconds,
+        fallback_factory=create_fallback_chat if settings.llm_fallback_enabled else None,
+    )
 
 
 @lru_cache()
 def get_qa_pipeline_manager() -> QAPipelineManager:
     logger.debug("Providing QAPipelineManager singleton.")
-    return QAPipelineManager(api_key=settings.groq_api_key, model_name=settings.default_model)
+    return QAPipelineManager(
+        api_key=settings.groq_api_key,
+        model_name=settings.default_model,
+        embeddings=get_vector_store_manager().embeddings,
+        answer_cache=get_answer_cache() if settings.answer_cache_enabled else None,
+        http_async_client=get_groq_http_client(),
+        pipeline_registry=get_pipeline_registry(),
+        context_packer=get_context_packer() if settings.context_packing_enabled else None,
+        reranker=get_reranker() if settings.rerank_enabled else None,
+        retrieval_k=settings.retrieval_k,
+        manifest=get_ingest_manifest(),
+        single_flight=SingleFlight("ask") if settings.request_coalescing_enabled else None,
+        llm_scheduler=get_llm_scheduler() if settings.llm_scheduler_enabled else None,
+        max_retries=settings.groq_max_retries,
+    )
+
+
+@lru_cache()
+def get_warmup_service() -> WarmupService:
+    logger.debug("Providing WarmupService singleton.")
+    return WarmupService(
+        vector_store_manager=get_vector_store_manager(),
+        qa_pipeline_manager=get_qa_pipeline_manager(),
+        enabled=settings.warmup_on_startup,
+        reranker=get_reranker() if settings.rerank_enabled else None,
+    )
 
 
 @lru_cache()
 def get_upload_service() -> UploadService:
     logger.debug("Providing UploadService singleton.")
-    return UploadService(save_dir=settings.upload_dir)
+    return UploadService(save_dir=settings.upload_dir, max_bytes=settings.upload_max_mb * 1024 * 1024)
+
+
+@lru_cache()
+def get_ingest_manifest() -> IngestManifest:
+    logger.debug("Providing IngestManifest singleton.")
+    return IngestManifest(manifest_path=settings.manifest_path)
+
+
+@lru_cache()
+def get_lexical_index_store() -> LexicalIndexStore:
+    logger.debug("Providing LexicalIndexStore singleton.")
+    return LexicalIndexStore(index_dir=settings.lexical_index_dir, k1=settings.bm25_k1, b=settings.bm25_b)
+
+
+@lru_cache()
+def get_ingest_service() -> IngestService:
+    logger.debug("Providing IngestService singleton.")
+    return IngestService(
+        vector_store_manager=get_vector_store_manager(),
+        qa_pipeline_manager=get_qa_pipeline_manager(),
+        manifest=get_ingest_manifest(),
+        pipeline_registry=get_pipeline_registry(),
+        chunk_size=settings.chunk_size,
+        chunk_overlap=settings.chunk_overlap,
+        page_batch_size=settings.ingest_page_batch_size,
+        embedding_batch_size=settings.embedding_batch_size,
+        queue_size=settings.ingest_queue_size,
+        parse_workers=settings.pdf_parse_workers,
+        parallel_min_pages=settings.pdf_parallel_min_pages,
+        lexical_indexes=get_lexical_index_store() if settings.hybrid_retrieval_enabled else None,
+        lock_dir=settings.lock_dir,
+        lock_timeout_seconds=settings.ingest_lock_timeout_seconds,
+        single_flight=SingleFlight("ingest") if settings.request_coalescing_enabled else None,
+        text_cache=get_parsed_text_cache() if settings.parsed_text_cache_enabled else None,
+    )
+
+
+@lru_cache()
+def get_ingest_job_manager() -> IngestJobManager:
+    logger.debug("Providing IngestJobManager singleton.")
+    return IngestJobManager(
+        ingest_service=get_ingest_service(),
+        concurrency=settings.ingest_job_concurrency,
+        max_queue_size=settings.ingest_job_queue_size,
+        status_path=settings.jobs_path,
+    )
 
 
 def get_file_processor(file_path: str) -> FileProcessor:
-    return FileProcessor(file_path)
+    return FileProcessor(
+        file_path,
+        chunk_size=settings.chunk_size,
+        chunk_overlap=settings.chunk_overlap,
+        page_chunk_size=settings.ingest_page_batch_size,
+        parse_workers=settings.pdf_parse_workers,
+        parallel_min_pages=settings.pdf_parallel_min_pages,
+    )
@@ -1,18 +1,97 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from backend.api.router import api_router
 from backend.core.config import settings
+from backend.core.dependency import get_groq_http_client, get_vector_store_manager, get_warmup_service
 from backend.utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Room for the multipart boundaries and part headers around the file itself.
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Caps the request body of ``path`` at ``max_bytes``. A declared oversized ``Content-Length`` is
+    refused before the body is read; otherwise (as with chunked transfer encoding) bytes are
+    counted as they arrive and the request fails with 413 as soon as it passes the limit, before
+    the multipart parser spools the rest to disk.
+    """
+
+    def __init__(self, app: ASGIApp, path: str, max_bytes: int):
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes
+
+    def _detail(self) -> str:
+        return f"Upload exceeds the {settings.upload_max_mb} MB limit."
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > self.max_bytes:
+            logger.warning("Rejecting %s-byte upload before reading it.", content_length)
+            await JSONResponse(status_code=413, content={"detail": self._detail()})(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    logger.warning("Rejecting upload after %d bytes of body.", received)
+                    # Raised inside body parsing, so FastAPI answers 413 and the rest is never read.
+                    raise HTTPException(status_code=413, detail=self._detail())
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup_task = None
+    if settings.warmup_on_startup:
+        # Runs in the background so the server accepts connections (and answers /ready) meanwhile.
+        warmup_task = asyncio.create_task(get_warmup_service().run())
+    yield
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    if get_groq_http_client.cache_info().currsize:
+        logger.info("Closing shared Groq HTTP client.")
+        await get_groq_http_client().aclose()
+        get_groq_http_client.cache_clear()
+    if get_vector_store_manager.cache_info().currsize:
+        logger.info("Closing vector store collections.")
+        await asyncio.to_thread(get_vector_store_manager().close)
+
 
 def create_app() -> FastAPI:
     app = FastAPI(
         title="Q/A based RAG API",
         description="API for question-answering using RAG pipeline",
         version="1.0.0",
+        lifespan=lifespan,
+    )
+
+    # Added before CORS so the rejection still carries CORS headers.
+    app.add_middleware(
+        UploadSizeLimitMiddleware,
+        path="/upload-file",
+        max_bytes=settings.upload_max_mb * 1024 * 1024 + _MULTIPART_OVERHEAD_BYTES,
     )
 
     app.add_middleware(
@@ -1,20 +1,142 @@
-from typing import Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel
 
 
+class PageRange(BaseModel):
+    # Inclusive, with pages counted from 1 as a PDF viewer shows them.
+    start: int
+    end: Optional[int] = None
+
+
 class QuestionRequest(BaseModel):
     query: str
+    collection: Optional[str] = None
+    collections: Optional[List[str]] = None
+    sources: Optional[List[str]] = None
+    pages: Optional[List[PageRange]] = None
+
+
+class BatchQuestionRequest(BaseModel):
+    queries: List[str]
+    collection: Optional[str] = None
+    collections: Optional[List[str]] = None
+    sources: Optional[List[str]] = None
+    pages: Optional[List[PageRange]] = None
 
 
 class UploadResponse(BaseModel):
     filename: str
+    sha256: Optional[str] = None
+    size_bytes: int = 0
+    duplicate: bool = False
 
 
 class ProcessFileResponse(BaseModel):
     message: str
     num_docs: Optional[int] = None
+    collection_name: Optional[str] = None
+    skipped: bool = False
+    chunks_added: Optional[int] = None
+    chunks_removed: Optional[int] = None
+    embedding_cache_hits: Optional[int] = None
+    embedding_cache_misses: Optional[int] = None
+
+
+class ProcessFilesRequest(BaseModel):
+    filenames: Optional[List[str]] = None
+    directory: Optional[str] = None
+
+
+class ProcessedFile(BaseModel):
+    filename: str
+    status: str
+    collection_name: Optional[str] = None
+    num_docs: int = 0
+    chunks_added: int = 0
+    chunks_removed: int = 0
+    error: Optional[str] = None
+
+
+class ProcessFilesResponse(BaseModel):
+    files: List[ProcessedFile]
+    processed: int = 0
+    skipped: int = 0
+    failed: int = 0
+    embedding_cache_hits: int = 0
+    embedding_cache_misses: int = 0
+    seconds: float = 0.0
 
 
 class AnswerResponse(BaseModel):
     answer: str
+    cached: bool = False
+    coalesced: bool = False
+
+
+class BatchAnswerItem(BaseModel):
+    query: str
+    answer: Optional[str] = None
+    cached: bool = False
+    error: Optional[str] = None
+
+
+class BatchAnswerResponse(BaseModel):
+    answers: List[BatchAnswerItem]
+    collection_name: Optional[str] = None
+
+
+class AnswerCacheStatsResponse(BaseModel):
+    enabled: bool
+    hits: int = 0
+    misses: int = 0
+    hit_rate: float = 0.0
+    entries: int = 0
+
+
+class LLMSchedulerStatsResponse(BaseModel):
+    enabled: bool
+    queue_depth: int = 0
+    responses: Dict[str, int] = {}
+    fallback_rate: float = 0.0
+    hedges: int = 0
+    rate_limited: int = 0
+    paused_seconds: float = 0.0
+    requests_per_minute: float = 0
+    tokens_per_minute: float = 0
+    fallback_enabled: bool = False
+
+
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: str
+    queue_depth: int
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    filename: str
+    status: str
+    stage: str
+    pages_parsed: int = 0
+    chunks_parsed: int = 0
+    chunks_embedded: int = 0
+    chunks_upserted: int = 0
+    elapsed_seconds: float = 0.0
+    chunks_per_second: float = 0.0
+    collection_name: Optional[str] = None
+    skipped: bool = False
+    error: Optional[str] = None
+
+
+class ComponentStatus(BaseModel):
+    ready: bool
+    load_seconds: Optional[float] = None
+
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    warmup: str
+    warmup_seconds: Optional[float] = None
+    warmup_error: Optional[str] = None
+    components: Dict[str, ComponentStatus]
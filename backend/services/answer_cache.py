@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from backend.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    embedding: np.ndarray
+    created_at: float
+
+
+class SemanticAnswerCache:
+    """
+    Per-collection cache of answers looked up by question embedding.
+
+    A stored answer is reused when a new question's cosine similarity to a cached question
+    reaches ``similarity_threshold``. Entries expire after ``ttl_seconds`` and each collection
+    keeps at most ``max_entries`` answers, evicting the least recently used first.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.92, ttl_seconds: float = 3600, max_entries: int = 1000):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, "OrderedDict[int, CachedAnswer]"] = {}
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def lookup(self, collection_name: str, embedding: Sequence[float]) -> Optional[CachedAnswer]:
+        query = self._normalize(embedding)
+        with self._lock:
+            entries = self._entries.get(collection_name)
+            if entries:
+                self._expire(entries)
+            if not entries:
+                self.misses += 1
+                return None
+
+            keys = list(entries.keys())
+            matrix = np.stack([entries[key].embedding for key in keys])
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity_threshold:
+                self.misses += 1
+                return None
+
+            entries.move_to_end(keys[best])
+            self.hits += 1
+            logger.info(
+                "Answer cache hit for collection '%s' (similarity %.3f).",
+                collection_name,
+                float(scores[best]),
+            )
+            return entries[keys[best]]
+
+    def store(self, collection_name: str, question: str, embedding: Sequence[float], answer: str) -> None:
+        with self._lock:
+            entries = self._entries.setdefault(collection_name, OrderedDict())
+            entries[self._next_key] = CachedAnswer(
+                question=question,
+                answer=answer,
+                embedding=self._normalize(embedding),
+                created_at=time.time(),
+            )
+            self._next_key += 1
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def invalidate(self, collection_name: str) -> None:
+        with self._lock:
+            dropped = self._entries.pop(collection_name, None)
+        if dropped:
+            logger.info("Invalidated %d cached answers for collection '%s'.", len(dropped), collection_name)
+
+    def _expire(self, entries: "OrderedDict[int, CachedAnswer]") -> None:
+        cutoff = time.time() - self.ttl_seconds
+        for key in [key for key, entry in entries.items() if entry.created_at < cutoff]:
+            del entries[key]
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return sum(len(entries) for entries in self._entries.values())
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
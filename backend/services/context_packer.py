@@ -0,0 +1,152 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Set, Tuple
+
+from langchain_core.documents import Document
+
+from backend.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Rough characters per token for English text; close enough for budgeting prompts.
+CHARS_PER_TOKEN = 4
+
+# Shortest shared text accepted as chunk overlap, so short coincidental matches are not merged.
+_MIN_OVERLAP_CHARS = 20
+
+_WORD = re.compile(r"\w+")
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def shingles(text: str, size: int = 3) -> Set[Tuple[str, ...]]:
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[position:position + size]) for position in range(len(words) - size + 1)}
+
+
+def overlap_length(left: str, right: str, max_overlap: int) -> int:
+    """
+    Length of the longest suffix of ``left`` that is also a prefix of ``right``, as left by a
+    text splitter's chunk overlap; 0 when they do not overlap.
+    """
+    for size in range(min(len(left), len(right), max_overlap), _MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+@dataclass
+class _Block:
+    text: str
+    metadata: Dict[str, Any]
+    source: Tuple[Any, Any]
+    rank: int
+    chunks: int = 1
+    shingles: Set[Tuple[str, ...]] = field(default_factory=set)
+
+
+class ContextPacker:
+    """
+    Turns ranked retrieval results into the context passed to the model.
+
+    Neighbouring chunks of the same page are stitched back together so the text they share
+    through the splitter's overlap is sent once. Chunks that mostly repeat a better-ranked one
+    are dropped, and the remaining blocks are packed best-first into ``token_budget`` tokens.
+    """
+
+    def __init__(self, token_budget: int = 1500, duplicate_threshold: float = 0.85, chunk_overlap: int = 100):
+        self.token_budget = max(1, token_budget)
+        self.duplicate_threshold = duplicate_threshold
+        # Splitters overlap on word boundaries, so allow a little more than the configured overlap.
+        self.max_overlap = max(chunk_overlap, 0) + _MIN_OVERLAP_CHARS
+
+    def pack(self, documents: List[Document]) -> List[Document]:
+        if not documents:
+            return []
+        blocks = self._merge_adjacent(documents)
+        blocks = self._drop_duplicates(blocks)
+        packed = self._fit_budget(blocks)
+        logger.debug(
+            "Packed %d retrieved chunks into %d context blocks (~%d tokens).",
+            len(documents),
+            len(packed),
+            sum(estimate_tokens(doc.page_content) for doc in packed),
+        )
+        return packed
+
+    def _merge_adjacent(self, documents: List[Document]) -> List[_Block]:
+        blocks: List[_Block] = []
+        for rank, doc in enumerate(documents):
+            block = _Block(
+                text=doc.page_content,
+                metadata=dict(doc.metadata),
+                source=(doc.metadata.get("source"), doc.metadata.get("page")),
+                rank=rank,
+            )
+            # A new chunk can bridge two earlier blocks, so keep merging until nothing joins.
+            while True:
+                partner = next((other for other in blocks if self._join(other, block)), None)
+                if partner is None:
+                    break
+                blocks.remove(partner)
+                block = partner
+            blocks.append(block)
+        return sorted(blocks, key=lambda item: item.rank)
+
+    def _join(self, earlier: _Block, later: _Block) -> bool:
+        """
+        Merge ``later`` into ``earlier`` when they are neighbouring chunks of the same page.
+        """
+        if earlier.source != later.source or earlier.source == (None, None):
+            return False
+        size = overlap_length(earlier.text, later.text, self.max_overlap)
+        if size:
+            earlier.text = earlier.text + later.text[size:]
+        else:
+            size = overlap_length(later.text, earlier.text, self.max_overlap)
+            if not size:
+                return False
+            earlier.text = later.text + earlier.text[size:]
+        earlier.chunks += later.chunks
+        earlier.rank = min(earlier.rank, later.rank)
+        return True
+
+    def _drop_duplicates(self, blocks: List[_Block]) -> List[_Block]:
+        kept: List[_Block] = []
+        for block in blocks:
+            block.shingles = shingles(block.text)
+            if any(self._is_duplicate(block, other) for other in kept):
+                continue
+            kept.append(block)
+        return kept
+
+    def _is_duplicate(self, block: _Block, other: _Block) -> bool:
+        if not block.shingles:
+            return block.text.strip() == other.text.strip()
+        contained = len(block.shingles & other.shingles) / len(block.shingles)
+        return contained >= self.duplicate_threshold
+
+    def _fit_budget(self, blocks: List[_Block]) -> List[Document]:
+        packed: List[Document] = []
+        remaining = self.token_budget
+        for block in blocks:
+            tokens = estimate_tokens(block.text)
+            text = block.text
+            if tokens > remaining:
+                if packed:
+                    continue
+                # Always send something: cut the best block down to the budget at a word boundary.
+                text = text[:remaining * CHARS_PER_TOKEN].rsplit(" ", 1)[0]
+                tokens = estimate_tokens(text)
+            metadata = block.metadata
+            if block.chunks > 1:
+                metadata["merged_chunks"] = block.chunks
+            packed.append(Document(page_content=text, metadata=metadata))
+            remaining -= tokens
+            if remaining <= 0:
+                break
+        return packed
@@ -0,0 +1,176 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from langchain_core.embeddings import Embeddings
+
+from backend.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class EmbeddingStats:
+    hits: int = 0
+    misses: int = 0
+    # Whether each embedded text was served from the cache, in input order; empty once stats are summed.
+    cached: List[bool] = field(default_factory=list, repr=False)
+
+    def __add__(self, other: "EmbeddingStats") -> "EmbeddingStats":
+        return EmbeddingStats(hits=self.hits + other.hits, misses=self.misses + other.misses)
+
+    def subset(self, positions: Iterable[int]) -> "EmbeddingStats":
+        """
+        Stats of the texts at ``positions``, for crediting part of a shared batch to its file.
+        """
+        flags = [self.cached[position] for position in positions]
+        return EmbeddingStats(hits=sum(flags), misses=len(flags) - sum(flags))
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed store of embedding vectors.
+
+    Entries are keyed by a SHA-256 of the model name and chunk text, so the same chunk
+    embedded by a different model never collides. When the stored vectors exceed
+    ``max_bytes`` the least recently used entries are evicted.
+    """
+
+    def __init__(self, db_path: Union[Path, str], max_bytes: int = 512 * 1024 * 1024):
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)")
+        logger.info("Embedding cache ready at %s (max %d bytes)", self.db_path, self.max_bytes)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path), timeout=30)
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        if not keys:
+            return {}
+        found: Dict[str, List[float]] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock, self._connect() as conn:
+            # SQLite limits bound parameters per statement, so look keys up in slices.
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+                if rows:
+                    conn.executemany(
+                        "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                        [(time.time(), key) for key, _ in rows],
+                    )
+        return found
+
+    def put_many(self, model_name: str, items: Sequence[Tuple[str, Sequence[float]]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, model_name, array("f", vector).tobytes(), now) for key, vector in items]
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, vector, last_access) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Trim to 90% of the budget so every insert near the limit does not trigger another pass.
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        cursor = conn.execute("SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_access ASC")
+        stale_keys = []
+        for key, size in cursor:
+            if total <= target:
+                break
+            stale_keys.append((key,))
+            total -= size
+            evicted += 1
+        conn.executemany("DELETE FROM embeddings WHERE key = ?", stale_keys)
+        logger.info("Evicted %d entries from embedding cache; %d bytes remain.", evicted, total)
+
+    def clear(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM embeddings")
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that consults an ``EmbeddingCache`` before calling the model.
+    Only cache misses are sent to the underlying model; queries are never cached.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: Optional[EmbeddingCache] = None):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache
+
+    def embed_documents_with_stats(self, texts: List[str]) -> Tuple[List[List[float]], EmbeddingStats]:
+        if not texts:
+            return [], EmbeddingStats()
+        if self.cache is None:
+            stats = EmbeddingStats(misses=len(texts), cached=[False] * len(texts))
+            return self.embeddings.embed_documents(texts), stats
+
+        keys = [EmbeddingCache.make_key(self.model_name, text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        # Identical chunks inside one batch are embedded once; the repeats count as hits.
+        missing: Dict[str, str] = {}
+        flags = []
+        for key, text in zip(keys, texts):
+            flags.append(key in cached or key in missing)
+            if not flags[-1]:
+                missing[key] = text
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            fresh = list(zip(missing.keys(), vectors))
+            self.cache.put_many(self.model_name, fresh)
+            cached.update(fresh)
+
+        stats = EmbeddingStats(hits=len(texts) - len(missing), misses=len(missing), cached=flags)
+        logger.info("Embedding cache: %d hits, %d misses.", stats.hits, stats.misses)
+        return [cached[key] for key in keys], stats
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors, _ = self.embed_documents_with_stats(texts)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed many questions in one model call, bypassing the chunk cache.
+        """
+        return self.embeddings.embed_documents(texts)
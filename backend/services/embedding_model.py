@@ -0,0 +1,198 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from backend.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+EMBEDDING_BACKENDS = ("torch", "onnx")
+
+
+def load_huggingface_embeddings(model_name: str, batch_size: int = 32, num_threads: int = 0) -> Embeddings:
+    # torch and sentence-transformers take seconds to import, so they are only loaded here.
+    import torch
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    if num_threads > 0:
+        torch.set_num_threads(num_threads)
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    logger.info("Loading embedding model '%s' on device '%s'.", model_name, device)
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={"device": device},
+        encode_kwargs={"batch_size": batch_size},
+    )
+
+
+def resolve_model_dir(model_name: str, allow_patterns: List[str]) -> Path:
+    """
+    Local directory holding the model files. Bare names resolve to the sentence-transformers
+    organisation on the Hugging Face Hub, as sentence-transformers itself does.
+    """
+    if os.path.isdir(model_name):
+        return Path(model_name)
+    from huggingface_hub import snapshot_download
+
+    repo_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+    return Path(snapshot_download(repo_id, allow_patterns=allow_patterns))
+
+
+def _read_json(path: Path) -> Dict[str, Any]:
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence-transformers model run with ONNX Runtime on CPU.
+
+    Reproduces the model's tokenizer, pooling and normalization so the vectors match the torch
+    backend within quantization tolerance. Texts are sorted by length before batching so each
+    batch carries as little padding as possible.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        onnx_file: str = "onnx/model_qint8_avx2.onnx",
+        batch_size: int = 32,
+        num_threads: int = 0,
+    ):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        model_dir = resolve_model_dir(
+            model_name,
+            [onnx_file, "tokenizer.json", "modules.json", "sentence_bert_config.json", "1_Pooling/config.json"],
+        )
+        self.batch_size = max(1, batch_size)
+
+        config = _read_json(model_dir / "sentence_bert_config.json")
+        pooling = _read_json(model_dir / "1_Pooling" / "config.json")
+        modules = _read_json(model_dir / "modules.json") or []
+        self.pooling_mode = "cls" if pooling.get("pooling_mode_cls_token") else "mean"
+        self.normalize = any(module.get("type", "").endswith("Normalize") for module in modules)
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=config.get("max_seq_length", 256))
+        pad_token = "[PAD]" if self.tokenizer.token_to_id("[PAD]") is not None else "<pad>"
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id(pad_token) or 0, pad_token=pad_token)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(
+            str(model_dir / onnx_file),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        logger.info(
+            "Loaded ONNX embedding model '%s' (%s, %s pooling, normalize=%s).",
+            model_name,
+            onnx_file,
+            self.pooling_mode,
+            self.normalize,
+        )
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+        if self.pooling_mode == "cls":
+            pooled = token_embeddings[:, 0]
+        else:
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        order = sorted(range(len(texts)), key=lambda position: len(texts[position]))
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            positions = order[start:start + self.batch_size]
+            pooled = self._encode_batch([texts[position] for position in positions])
+            for position, vector in zip(positions, pooled.tolist()):
+                vectors[position] = vector
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def load_embedding_model(
+    backend: str,
+    model_name: str,
+    batch_size: int = 32,
+    num_threads: int = 0,
+    onnx_file: str = "onnx/model_qint8_avx2.onnx",
+) -> Embeddings:
+    if backend == "torch":
+        return load_huggingface_embeddings(model_name, batch_size=batch_size, num_threads=num_threads)
+    if backend == "onnx":
+        return OnnxEmbeddings(model_name, onnx_file=onnx_file, batch_size=batch_size, num_threads=num_threads)
+    raise ValueError(f"Unknown embedding backend '{backend}'; expected one of {', '.join(EMBEDDING_BACKENDS)}.")
+
+
+def embedding_cache_namespace(backend: str, model_name: str, onnx_file: str) -> str:
+    """
+    Name under which vectors are cached. Quantized ONNX vectors differ slightly from the torch
+    ones, so they are cached separately; torch keeps the bare model name.
+    """
+    if backend == "onnx":
+        return f"{model_name}:{onnx_file}"
+    return model_name
+
+
+class LazyEmbeddings(Embeddings):
+    """
+    Defers building the embedding model until the first embedding call (or an explicit
+    ``load``), and records how long loading took.
+    """
+
+    def __init__(self, loader: Callable[[], Embeddings]):
+        self._loader = loader
+        self._model: Optional[Embeddings] = None
+        self._lock = threading.Lock()
+        self.load_seconds: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> Embeddings:
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            if self._model is None:
+                started = time.perf_counter()
+                self._model = self._loader()
+                self.load_seconds = time.perf_counter() - started
+                logger.info("Embedding model loaded in %.2fs.", self.load_seconds)
+        return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.load().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.load().embed_query(text)
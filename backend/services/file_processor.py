@@ -1,45 +1,174 @@
-from langchain_community.document_loaders import TextLoader, PyMuPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import time
+from typing import Callable, Iterator, List, Optional
+
+from langchain_core.documents import Document
+
 from backend.services.interface.file_processor import FileProcessorInterface
+from backend.services.parsed_text_cache import ParsedTextCache, ParsedTextWriter
 from backend.utils.logging_config import get_logger
+from backend.utils.pdf_extract import count_pages, document_metadata, iter_parallel_pages, resolve_worker_count
 
 logger = get_logger(__name__)
 
+SUPPORTED_SUFFIXES = (".pdf", ".txt")
+
+
 class FileProcessor(FileProcessorInterface):
-    def __init__(self, file_path: str, chunk_size: int = 900, chunk_overlap: int = 100, page_chunk_size: int = 10):
+    def __init__(
+        self,
+        file_path: str,
+        chunk_size: int = 900,
+        chunk_overlap: int = 100,
+        page_chunk_size: int = 10,
+        parse_workers: int = 1,
+        parallel_min_pages: int = 64,
+        source_name: Optional[str] = None,
+        file_hash: Optional[str] = None,
+        text_cache: Optional[ParsedTextCache] = None,
+    ):
         self.file_path = file_path
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.page_chunk_size = page_chunk_size  # To handle large PDFs in chunks of pages
+        self.parse_workers = resolve_worker_count(parse_workers)
+        self.parallel_min_pages = parallel_min_pages
+        self.source_name = source_name  # Reported as each page's "source" instead of the on-disk path
+        self.file_hash = file_hash
+        self.text_cache = text_cache  # Parsed pages are reused from here when ``file_hash`` is known
 
-    def process(self):
-        logger.info("Starting file processing for %s", self.file_path)
+    @property
+    def parser_version(self) -> str:
+        # Part of the text cache key, so upgrading the parser re-parses every file once.
+        if self.file_path.lower().endswith(".pdf"):
+            # Imported only for PDFs, so importing the app does not load pymupdf.
+            import pymupdf
+
+            return f"pymupdf-{pymupdf.VersionBind}"
+        return "text"
+
+    def _create_loader(self):
+        # Loader modules pull in transformers and torch, so they are imported on first use.
+        from langchain_community.document_loaders import PyMuPDFLoader, TextLoader
+
+        if self.file_path.lower().endswith(".pdf"):
+            logger.info("Initialized PyMuPDFLoader for %s", self.file_path)
+            return PyMuPDFLoader(self.file_path, mode="page")
+        if self.file_path.lower().endswith(".txt"):
+            logger.info("Initialized TextLoader for %s", self.file_path)
+            return TextLoader(self.file_path, encoding="utf-8")
+        logger.error("Unsupported file type encountered: %s", self.file_path)
+        raise ValueError(f"Unsupported file type: {self.file_path}")
+
+    def iter_pages(self) -> Iterator[Document]:
+        """
+        Lazily yield one document per page without loading the whole file into memory.
+        Large PDFs are extracted in parallel worker processes when more than one worker is configured.
+        """
+        for page in self._iter_source_pages():
+            if self.source_name is not None:
+                page.metadata["source"] = self.source_name
+            yield page
 
+    def _iter_source_pages(self) -> Iterator[Document]:
+        if self.text_cache is None or not self.file_hash:
+            yield from self._iter_loaded_pages()
+            return
+        cached = self.text_cache.open(self.file_hash, self.parser_version)
+        if cached is not None:
+            logger.info("Reading %d parsed pages of %s from the text cache.", cached.page_count, self.file_path)
+            with cached:
+                for text, metadata in cached.pages(self.file_path):
+                    yield Document(page_content=text, metadata=metadata)
+            return
+
+        writer: Optional[ParsedTextWriter] = None
+        try:
+            writer = self.text_cache.writer(self.file_hash, self.parser_version, self.file_path)
+        except OSError:
+            logger.exception("Could not open the text cache for %s; parsing without it.", self.file_path)
+        completed = False
         try:
-            if self.file_path.lower().endswith(".pdf"):
-                loader = PyMuPDFLoader(self.file_path, mode="page")
-                logger.info("Initialized PyPDFLoader for %s", self.file_path)
-            elif self.file_path.lower().endswith(".txt"):
-                loader = TextLoader(self.file_path, encoding="utf-8")
-                logger.info("Initialized TextLoader for %s", self.file_path)
+            for page in self._iter_loaded_pages():
+                if writer is not None:
+                    writer.add(page.page_content, page.metadata)
+                yield page
+            completed = True
+        finally:
+            if writer is not None:
+                self._close_writer(writer, completed)
+
+    def _close_writer(self, writer: ParsedTextWriter, completed: bool) -> None:
+        # A failing cache never fails the ingest; the file is simply parsed again next time.
+        try:
+            if completed:
+                writer.commit()
             else:
-                logger.error("Unsupported file type encountered: %s", self.file_path)
-                raise ValueError(f"Unsupported file type: {self.file_path}")
+                writer.discard()
+        except Exception:
+            logger.exception("Could not store parsed pages of %s in the text cache.", self.file_path)
 
-            loaded_pages = loader.load()
-            documents = []
-            for i in range(0, len(loaded_pages), self.page_chunk_size):
-                chunk = loaded_pages[i:i + self.page_chunk_size]
-                documents.extend(chunk)
-                logger.info("Loaded pages %d to %d", i + 1, i + len(chunk))
+    def _iter_loaded_pages(self) -> Iterator[Document]:
+        if self.file_path.lower().endswith(".pdf") and self.parse_workers > 1:
+            total_pages = count_pages(self.file_path)
+            if total_pages >= self.parallel_min_pages:
+                yield from self._iter_pages_parallel(total_pages)
+                return
+        yield from self._create_loader().lazy_load()
 
-            logger.info("Loaded %d raw document segments from %s", len(documents), self.file_path)
+    def _iter_pages_parallel(self, total_pages: int) -> Iterator[Document]:
+        metadata = document_metadata(self.file_path)
+        for page_number, text in iter_parallel_pages(self.file_path, total_pages, self.parse_workers):
+            yield Document(page_content=text, metadata={**metadata, "page": page_number})
 
-            text_splitter = RecursiveCharacterTextSplitter(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
-            chunks = text_splitter.split_documents(documents)
-            logger.info("Split documents into %d chunks for %s", len(chunks), self.file_path)
+    def iter_page_batches(self) -> Iterator[List[Document]]:
+        batch: List[Document] = []
+        loaded = 0
+        for page in self.iter_pages():
+            batch.append(page)
+            if len(batch) >= self.page_chunk_size:
+                logger.info("Loaded pages %d to %d", loaded + 1, loaded + len(batch))
+                loaded += len(batch)
+                yield batch
+                batch = []
+        if batch:
+            logger.info("Loaded pages %d to %d", loaded + 1, loaded + len(batch))
+            yield batch
 
-            return chunks
+    def iter_chunks(
+        self,
+        on_pages: Optional[Callable[[int], None]] = None,
+        on_timing: Optional[Callable[[str, float], None]] = None,
+    ) -> Iterator[List[Document]]:
+        """
+        Yield the chunks of each page batch as soon as that batch has been parsed and split.
+        ``on_pages`` is called with the size of every parsed page batch, and ``on_timing`` with
+        the seconds spent loading (``"load"``) and splitting (``"split"``) it.
+        """
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        logger.info("Starting file processing for %s", self.file_path)
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
+        total_chunks = 0
+        page_batches = self.iter_page_batches()
+        try:
+            while True:
+                started = time.perf_counter()
+                pages = next(page_batches, None)
+                if pages is None:
+                    break
+                loaded = time.perf_counter()
+                if on_pages is not None:
+                    on_pages(len(pages))
+                chunks = text_splitter.split_documents(pages)
+                if on_timing is not None:
+                    on_timing("load", loaded - started)
+                    on_timing("split", time.perf_counter() - loaded)
+                total_chunks += len(chunks)
+                yield chunks
         except Exception:
             logger.exception("Failed while processing file %s", self.file_path)
             raise
+        logger.info("Split documents into %d chunks for %s", total_chunks, self.file_path)
+
+    def process(self):
+        return [chunk for chunks in self.iter_chunks() for chunk in chunks]
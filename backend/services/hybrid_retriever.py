@@ -0,0 +1,189 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStoreRetriever
+from pydantic import ConfigDict
+
+from backend.services.lexical_index import BM25Index
+from backend.services.search_scope import MetadataFilter
+
+
+def reciprocal_rank_fusion(result_lists: Sequence[List[Document]], k: int, rrf_k: int = 60) -> List[Document]:
+    """
+    Merge ranked lists by summing ``1 / (rrf_k + rank)`` per document; documents are matched by id.
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = doc.id or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            documents.setdefault(key, doc)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [documents[key] for key in ranked[:k]]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Runs the vector retriever and a BM25 lexical search for every query and fuses both
+    rankings with reciprocal-rank fusion.
+    """
+
+    vector_retriever: BaseRetriever
+    lexical_index: BM25Index
+    k: int = 6
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        vector_docs = self.vector_retriever.invoke(query)
+        lexical_docs = [doc for doc, _ in self.lexical_index.search(query, self.fetch_k)]
+        return reciprocal_rank_fusion([vector_docs, lexical_docs], self.k, self.rrf_k)
+
+    async def _aget_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: AsyncCallbackManagerForRetrieverRun,
+    ) -> List[Document]:
+        vector_task = asyncio.ensure_future(self.vector_retriever.ainvoke(query))
+        lexical_docs = [doc for doc, _ in self.lexical_index.search(query, self.fetch_k)]
+        vector_docs = await vector_task
+        return reciprocal_rank_fusion([vector_docs, lexical_docs], self.k, self.rrf_k)
+
+
+def search_by_vectors(retriever: VectorStoreRetriever, embeddings: Sequence[Sequence[float]], k: int) -> List[List[Document]]:
+    """
+    Run several similarity searches at once from precomputed query embeddings.
+    Chroma answers all of them in a single query call, as do stores offering
+    ``similarity_search_by_vectors``.
+    """
+    vectorstore = retriever.vectorstore
+    if hasattr(vectorstore, "similarity_search_by_vectors"):
+        return vectorstore.similarity_search_by_vectors(embeddings, k=k)
+    collection = getattr(vectorstore, "_collection", None)
+    if collection is None:
+        return [vectorstore.similarity_search_by_vector(list(embedding), k=k) for embedding in embeddings]
+
+    results = collection.query(
+        query_embeddings=[list(embedding) for embedding in embeddings],
+        n_results=k,
+        include=["documents", "metadatas"],
+    )
+    return [
+        [
+            Document(page_content=text, metadata=metadata or {}, id=doc_id)
+            for doc_id, text, metadata in zip(ids, texts, metadatas)
+        ]
+        for ids, texts, metadatas in zip(results["ids"], results["documents"], results["metadatas"])
+    ]
+
+
+def filtered_search_by_vectors(
+    retriever: VectorStoreRetriever,
+    embeddings: Sequence[Sequence[float]],
+    k: int,
+    search_filter: Optional[MetadataFilter] = None,
+) -> List[List[Tuple[Document, float]]]:
+    """
+    Like ``search_by_vectors``, restricted to chunks passing ``search_filter`` and returning
+    relevance scores (higher is better). The store applies the filter before ranking: Chroma
+    through a ``where`` clause on its metadata index, the NumPy store through its row index.
+    """
+    vectorstore = retriever.vectorstore
+    if hasattr(vectorstore, "similarity_search_by_vectors_with_scores"):
+        return vectorstore.similarity_search_by_vectors_with_scores(embeddings, k=k, search_filter=search_filter)
+    collection = getattr(vectorstore, "_collection", None)
+    if collection is None:
+        # Unknown stores cannot filter while searching, so filter their top k afterwards.
+        results = []
+        for embedding in embeddings:
+            documents = vectorstore.similarity_search_by_vector(list(embedding), k=k)
+            documents = [doc for doc in documents if search_filter is None or search_filter.matches(doc.metadata)]
+            results.append([(doc, -float(rank)) for rank, doc in enumerate(documents)])
+        return results
+
+    results = collection.query(
+        query_embeddings=[list(embedding) for embedding in embeddings],
+        n_results=k,
+        where=search_filter.where() if search_filter is not None else None,
+        include=["documents", "metadatas", "distances"],
+    )
+    relevance = vectorstore._select_relevance_score_fn()
+    return [
+        [
+            (Document(page_content=text, metadata=metadata or {}, id=doc_id), relevance(distance))
+            for doc_id, text, metadata, distance in zip(ids, texts, metadatas, distances)
+        ]
+        for ids, texts, metadatas, distances in zip(
+            results["ids"], results["documents"], results["metadatas"], results["distances"]
+        )
+    ]
+
+
+def _best(hits: List[Tuple[Document, float]], k: int) -> List[Document]:
+    hits.sort(key=lambda item: item[1], reverse=True)
+    return [doc for doc, _ in hits[:k]]
+
+
+def scoped_retrieve(
+    retrievers: Sequence[Any],
+    queries: Sequence[str],
+    embeddings: Sequence[Sequence[float]],
+    search_filter: Optional[MetadataFilter] = None,
+) -> List[List[Document]]:
+    """
+    Retrieve context for many questions across the collections behind ``retrievers``, keeping
+    only chunks that pass ``search_filter``. Without BM25 indexes, vector hits from every
+    collection are ranked together by similarity (the collections share one embedding model).
+    BM25 scores depend on each collection's own term statistics, so when collections have
+    lexical indexes every collection's vector and lexical rankings are fused with RRF instead.
+    Each result keeps the first retriever's ``k``.
+    """
+    first = retrievers[0]
+    k = first.k if isinstance(first, HybridRetriever) else first.search_kwargs.get("k", 4)
+    rrf_k = first.rrf_k if isinstance(first, HybridRetriever) else 60
+    vector_hits: List[List[Tuple[Document, float]]] = [[] for _ in queries]
+    rankings: List[List[List[Document]]] = [[] for _ in queries]
+    hybrid = False
+    for retriever in retrievers:
+        vector_retriever = retriever
+        if isinstance(retriever, HybridRetriever):
+            hybrid = True
+            vector_retriever = retriever.vector_retriever
+            for position, query in enumerate(queries):
+                lexical = retriever.lexical_index.search(query, retriever.fetch_k, search_filter)
+                rankings[position].append([doc for doc, _ in lexical])
+        fetch = vector_retriever.search_kwargs.get("k", k)
+        for position, hits in enumerate(filtered_search_by_vectors(vector_retriever, embeddings, fetch, search_filter)):
+            vector_hits[position].extend(hits)
+            rankings[position].append(_best(list(hits), fetch))
+
+    if not hybrid:
+        return [_best(hits, k) for hits in vector_hits]
+    return [reciprocal_rank_fusion(lists, k, rrf_k) for lists in rankings]
+
+
+def batch_retrieve(retriever: Any, queries: Sequence[str], embeddings: Sequence[Sequence[float]]) -> List[List[Document]]:
+    """
+    Retrieve context for many questions whose embeddings are already known, without
+    embedding them again. Unknown retriever types fall back to one query at a time.
+    """
+    if isinstance(retriever, HybridRetriever):
+        vector_results = batch_retrieve(retriever.vector_retriever, queries, embeddings)
+        return [
+            reciprocal_rank_fusion(
+                [vector_docs, [doc for doc, _ in retriever.lexical_index.search(query, retriever.fetch_k)]],
+                retriever.k,
+                retriever.rrf_k,
+            )
+            for query, vector_docs in zip(queries, vector_results)
+        ]
+    if isinstance(retriever, VectorStoreRetriever) and retriever.search_type == "similarity":
+        return search_by_vectors(retriever, embeddings, retriever.search_kwargs.get("k", 4))
+    return [retriever.invoke(query) for query in queries]
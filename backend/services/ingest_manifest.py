@@ -0,0 +1,95 @@
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from backend.utils.logging_config import get_logger
+from backend.utils.shared_state import SharedJsonFile
+
+logger = get_logger(__name__)
+
+
+class IngestManifest:
+    """
+    JSON record of every ingested file, keyed by collection name.
+
+    Each entry stores the file hash and the chunking parameters used to build the
+    collection, which is enough to decide whether a re-ingest can be skipped. It also
+    serves as the collection registry shared by all workers: entries carry a ``version``
+    bumped whenever the collection's chunks change, and ``active`` names the collection
+    ``/ask`` uses by default. Other workers see both as soon as the file is rewritten.
+    """
+
+    def __init__(self, manifest_path: Union[Path, str]):
+        self.manifest_path = Path(manifest_path)
+        self._file = SharedJsonFile(self.manifest_path)
+
+    @staticmethod
+    def _collections(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        # Older manifests were a flat mapping of collection name to entry.
+        if "collections" not in data:
+            entries = {name: entry for name, entry in data.items() if isinstance(entry, dict)}
+            data.clear()
+            data["collections"] = entries
+        return data["collections"]
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        data = self._file.read()
+        if "collections" in data:
+            return data["collections"]
+        return {name: entry for name, entry in data.items() if isinstance(entry, dict)}
+
+    def get(self, collection_name: str) -> Optional[Dict[str, Any]]:
+        entry = self._read().get(collection_name)
+        return dict(entry) if entry else None
+
+    def names(self) -> List[str]:
+        return list(self._read())
+
+    def version(self, collection_name: str) -> int:
+        entry = self._read().get(collection_name)
+        return int(entry.get("version", 1)) if entry else 0
+
+    def active(self) -> Optional[str]:
+        return self._file.read().get("active")
+
+    def is_current(self, collection_name: str, file_hash: str, chunk_size: int, chunk_overlap: int) -> bool:
+        entry = self.get(collection_name)
+        return bool(
+            entry
+            and entry.get("file_hash") == file_hash
+            and entry.get("chunk_size") == chunk_size
+            and entry.get("chunk_overlap") == chunk_overlap
+        )
+
+    def record(self, collection_name: str, changed: bool = True, **fields: Any) -> None:
+        """
+        Store the entry for a collection; ``changed`` bumps its version so other workers
+        reload the collection.
+        """
+        with self._file.update() as data:
+            entries = self._collections(data)
+            # Entries written before versions were tracked count as version 1, as ``version`` reads them.
+            previous = int(entries[collection_name].get("version", 1)) if collection_name in entries else 0
+            version = previous + 1 if changed or not previous else previous
+            entries[collection_name] = dict(fields, version=version, updated_at=time.time())
+        logger.info("Recorded manifest entry for collection '%s'.", collection_name)
+
+    def activate(self, collection_name: str) -> None:
+        if self.active() == collection_name:
+            return
+        with self._file.update() as data:
+            self._collections(data)
+            data["active"] = collection_name
+
+    def remove(self, collection_name: str) -> None:
+        if collection_name not in self._read():
+            return
+        with self._file.update() as data:
+            self._collections(data).pop(collection_name, None)
+            if data.get("active") == collection_name:
+                data.pop("active")
+
+    def clear(self) -> None:
+        with self._file.update() as data:
+            data.clear()
+            data["collections"] = {}
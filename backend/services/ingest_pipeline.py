@@ -0,0 +1,318 @@
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from langchain_core.documents import Document
+
+from backend.services.embedding_cache import EmbeddingStats
+from backend.services.interface.vector_store import VectorStoreInterface
+from backend.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_DONE = object()
+_SOURCE_DONE = object()
+
+
+def _detached(in_flight: Set[asyncio.Future], awaitable: Awaitable) -> Awaitable:
+    """
+    Start ``awaitable`` so cancelling the caller leaves it running, and track it in ``in_flight``
+    so a cancelled run can wait for work already handed to a thread before cleaning up.
+    """
+    future = asyncio.ensure_future(awaitable)
+    in_flight.add(future)
+    future.add_done_callback(in_flight.discard)
+    return asyncio.shield(future)
+
+
+def assign_chunk_ids(documents: List[Document], seen: Dict[str, int]) -> List[str]:
+    """
+    Derive stable ids from chunk page and content so an unchanged chunk keeps its id across ingests.
+    ``seen`` carries occurrence counts between calls, keeping repeated chunks distinct.
+    """
+    ids = []
+    for doc in documents:
+        page = doc.metadata.get("page", "")
+        base = hashlib.sha256(f"{page}\0{doc.page_content}".encode("utf-8")).hexdigest()
+        occurrence = seen.get(base, 0)
+        seen[base] = occurrence + 1
+        ids.append(base if occurrence == 0 else f"{base}-{occurrence}")
+    return ids
+
+
+@dataclass
+class IngestProgress:
+    """
+    Live counters for one ingest, updated by the pipeline stages as work completes.
+    The ``*_seconds`` fields hold the time each stage spent working, excluding queue waits.
+    """
+
+    stage: str = "queued"
+    pages_parsed: int = 0
+    chunks_parsed: int = 0
+    chunks_embedded: int = 0
+    chunks_upserted: int = 0
+    parse_seconds: float = 0.0
+    embed_seconds: float = 0.0
+    upsert_seconds: float = 0.0
+
+    def add_pages(self, count: int) -> None:
+        self.pages_parsed += count
+
+
+@dataclass
+class PipelineResult:
+    chunk_ids: List[str] = field(default_factory=list)
+    added_ids: List[str] = field(default_factory=list)
+    embedding_stats: EmbeddingStats = field(default_factory=EmbeddingStats)
+
+    @property
+    def chunks_added(self) -> int:
+        return len(self.added_ids)
+
+
+@dataclass
+class PipelineSource:
+    """
+    One file's chunk batches and the collection they go to. ``result`` and ``progress`` are
+    filled in as its chunks move through the pipeline; ``error`` is set if parsing it failed.
+    ``written`` is set once the pipeline is done with it and no rollback can touch it.
+    """
+
+    chunk_batches: Iterator[List[Document]]
+    existing_ids: Set[str]
+    collection_name: Optional[str] = None
+    progress: IngestProgress = field(default_factory=IngestProgress)
+    result: PipelineResult = field(default_factory=PipelineResult)
+    error: Optional[BaseException] = None
+    written: bool = False
+
+
+class IngestPipeline:
+    """
+    Streams chunk batches through parse -> embed -> upsert stages connected by bounded queues.
+
+    Each stage runs as its own task and hands blocking work to threads, so later pages are
+    parsed while earlier batches are being embedded and written. The queue bound caps how
+    many batches are held in memory at once.
+
+    Several files can share one run: they are parsed concurrently, their chunks are embedded
+    together in batches of ``embedding_batch_size`` regardless of which file they came from,
+    and each embedded batch is written with one upsert per collection it touches.
+
+    A file that fails to parse, or is still unwritten when the run fails or is cancelled, has
+    its newly added chunks deleted again, so its collection is left as it was.
+    """
+
+    def __init__(self, vector_store_manager: VectorStoreInterface, embedding_batch_size: int = 64, queue_size: int = 4):
+        self.vector_store_manager = vector_store_manager
+        self.embedding_batch_size = max(1, embedding_batch_size)
+        self.queue_size = max(1, queue_size)
+
+    async def run_many(
+        self,
+        sources: Sequence[PipelineSource],
+        parse_concurrency: int = 1,
+        on_timing: Optional[Callable[[str, float], None]] = None,
+        on_source_done: Optional[Callable[[PipelineSource], Awaitable[None]]] = None,
+    ) -> None:
+        """
+        Run every source through one pipeline, parsing up to ``parse_concurrency`` of them at
+        once. A source that fails to parse records its ``error`` without stopping the others.
+        ``on_source_done`` is scheduled as soon as all of a source's chunks are written.
+        """
+        parsed: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        embedded: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        in_flight: Set[asyncio.Future] = set()
+
+        tasks = [
+            asyncio.create_task(self._parse_stage(sources, parsed, max(1, parse_concurrency), in_flight)),
+            asyncio.create_task(self._embed_stage(sources, parsed, embedded, on_timing)),
+            asyncio.create_task(self._upsert_stage(sources, embedded, in_flight, on_timing, on_source_done)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # A generator cannot be closed mid-read, and a rollback must not race an upsert.
+            if in_flight:
+                await asyncio.wait(set(in_flight))
+            for source in sources:
+                if not source.written:
+                    await self._roll_back(source)
+            raise
+        finally:
+            # Closing a generator stopped midway runs its cleanup, e.g. discarding a partial text cache entry.
+            for source in sources:
+                await self._close_batches(source)
+
+    async def _roll_back(self, source: PipelineSource) -> None:
+        if not source.result.added_ids:
+            return
+        try:
+            await self.vector_store_manager.delete_documents(
+                source.result.added_ids, collection_name=source.collection_name
+            )
+        except Exception:
+            logger.exception("Could not remove the partial chunks of collection '%s'.", source.collection_name)
+            return
+        logger.info(
+            "Removed %d partial chunks from collection '%s'.", source.result.chunks_added, source.collection_name
+        )
+        source.result.added_ids = []
+
+    @staticmethod
+    async def _close_batches(source: PipelineSource) -> None:
+        close = getattr(source.chunk_batches, "close", None)
+        if close is None:
+            return
+        try:
+            await asyncio.to_thread(close)
+        except Exception:
+            logger.exception("Could not close the chunk stream of collection '%s'.", source.collection_name)
+
+    async def _parse_stage(
+        self,
+        sources: Sequence[PipelineSource],
+        output: asyncio.Queue,
+        concurrency: int,
+        in_flight: Set[asyncio.Future],
+    ) -> None:
+        pending = iter(range(len(sources)))
+
+        async def parse_sources() -> None:
+            for index in pending:
+                source = sources[index]
+                try:
+                    while True:
+                        started = time.perf_counter()
+                        chunks = await _detached(in_flight, asyncio.to_thread(next, source.chunk_batches, None))
+                        source.progress.parse_seconds += time.perf_counter() - started
+                        if chunks is None:
+                            break
+                        source.progress.chunks_parsed += len(chunks)
+                        if chunks:
+                            await output.put((index, chunks))
+                except Exception as exc:
+                    source.error = exc
+                await output.put((index, _SOURCE_DONE))
+
+        await asyncio.gather(*(parse_sources() for _ in range(min(concurrency, len(sources)))))
+        await output.put(_DONE)
+
+    async def _embed_stage(
+        self,
+        sources: Sequence[PipelineSource],
+        source_queue: asyncio.Queue,
+        output: asyncio.Queue,
+        on_timing: Optional[Callable[[str, float], None]] = None,
+    ) -> None:
+        seen: List[Dict[str, int]] = [{} for _ in sources]
+        # Chunks of each source not yet handed to the upsert stage, and which sources are fully parsed.
+        unsent = [0] * len(sources)
+        parsed = [False] * len(sources)
+        pending: List[Tuple[int, str, Document]] = []
+
+        async def announce_finished() -> None:
+            # Sent after a source's last batch, so the upsert stage sees it once everything is written.
+            for index, source_parsed in enumerate(parsed):
+                if source_parsed and unsent[index] == 0:
+                    parsed[index] = False
+                    await output.put((_SOURCE_DONE, index))
+
+        async def flush(batch: List[Tuple[int, str, Document]]) -> None:
+            started = time.perf_counter()
+            vectors, stats = await self.vector_store_manager.embed_documents([doc for _, _, doc in batch])
+            elapsed = time.perf_counter() - started
+            if on_timing is not None:
+                on_timing("embed", elapsed)
+            for index in {index for index, _, _ in batch}:
+                positions = [position for position, item in enumerate(batch) if item[0] == index]
+                source = sources[index]
+                source.result.embedding_stats = source.result.embedding_stats + stats.subset(positions)
+                # The model call is shared by the batch, so each source is credited with its share of the time.
+                source.progress.embed_seconds += elapsed * len(positions) / len(batch)
+                source.progress.chunks_embedded += len(positions)
+                unsent[index] -= len(positions)
+            await output.put((batch, vectors))
+            await announce_finished()
+
+        while True:
+            item = await source_queue.get()
+            if item is _DONE:
+                break
+            index, chunks = item
+            if chunks is _SOURCE_DONE:
+                parsed[index] = True
+                await announce_finished()
+                continue
+            source = sources[index]
+            ids = assign_chunk_ids(chunks, seen[index])
+            source.result.chunk_ids.extend(ids)
+            new = [(index, doc_id, doc) for doc_id, doc in zip(ids, chunks) if doc_id not in source.existing_ids]
+            unsent[index] += len(new)
+            pending.extend(new)
+            while len(pending) >= self.embedding_batch_size:
+                batch = pending[:self.embedding_batch_size]
+                del pending[:self.embedding_batch_size]
+                await flush(batch)
+        if pending:
+            await flush(pending)
+        await announce_finished()
+        await output.put(_DONE)
+
+    async def _upsert_stage(
+        self,
+        sources: Sequence[PipelineSource],
+        source_queue: asyncio.Queue,
+        in_flight: Set[asyncio.Future],
+        on_timing: Optional[Callable[[str, float], None]] = None,
+        on_source_done: Optional[Callable[[PipelineSource], Awaitable[None]]] = None,
+    ) -> None:
+        finishing = []
+        try:
+            while True:
+                item = await source_queue.get()
+                if item is _DONE:
+                    break
+                batch, vectors = item
+                if batch is _SOURCE_DONE:
+                    source = sources[vectors]
+                    if source.error is not None:
+                        await self._roll_back(source)
+                    source.written = True
+                    if on_source_done is not None:
+                        finishing.append(asyncio.create_task(on_source_done(source)))
+                    continue
+                started = time.perf_counter()
+                by_source: Dict[int, List[int]] = {}
+                for position, (index, _, _) in enumerate(batch):
+                    by_source.setdefault(index, []).append(position)
+                for index, positions in by_source.items():
+                    source = sources[index]
+                    ids = [batch[position][1] for position in positions]
+                    # Recorded first, so a rollback also covers an upsert that failed or was cancelled midway.
+                    source.result.added_ids.extend(ids)
+                    await _detached(
+                        in_flight,
+                        self.vector_store_manager.upsert_embeddings(
+                            ids,
+                            [batch[position][2] for position in positions],
+                            [vectors[position] for position in positions],
+                            collection_name=source.collection_name,
+                        ),
+                    )
+                    source.progress.chunks_upserted += len(positions)
+                elapsed = time.perf_counter() - started
+                for index, positions in by_source.items():
+                    sources[index].progress.upsert_seconds += elapsed * len(positions) / len(batch)
+                if on_timing is not None:
+                    on_timing("upsert", elapsed)
+                logger.info("Upserted batch of %d chunks into %d collection(s).", len(batch), len(by_source))
+        finally:
+            if finishing:
+                await asyncio.gather(*finishing)
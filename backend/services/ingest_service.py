@@ -0,0 +1,467 @@
+import asyncio
+import hashlib
+import re
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from backend.services.embedding_cache import EmbeddingStats
+from backend.services.file_processor import SUPPORTED_SUFFIXES, FileProcessor
+from backend.services.ingest_manifest import IngestManifest
+from backend.services.ingest_pipeline import IngestPipeline, IngestProgress, PipelineSource
+from backend.services.lexical_index import LexicalIndexStore
+from backend.services.parsed_text_cache import ParsedTextCache
+from backend.services.pipeline_registry import PipelineRegistry
+from backend.services.qa_service import QAPipelineManager
+from backend.services.vector_store_service import VectorStoreManager
+from backend.utils.concurrency import SingleFlight
+from backend.utils.logging_config import get_logger
+from backend.utils.metrics import INGEST_CHUNKS, INGEST_STAGE_SECONDS
+from backend.utils.shared_state import FileLock
+
+logger = get_logger(__name__)
+
+
+def resolve_collection_name(base_name: str) -> str:
+    """
+    Turn a file stem into a name Chroma accepts (3-63 chars of [a-zA-Z0-9._-]).
+    """
+    collection_name = re.sub(r"[^a-zA-Z0-9._-]+", "_", base_name).lower()
+    collection_name = collection_name.strip("._-")
+    if not collection_name:
+        collection_name = "default_collection"
+    if len(collection_name) < 3:
+        collection_name = f"{collection_name}_kb"
+    collection_name = collection_name[:63].strip("._-")
+    if not collection_name:
+        collection_name = "default_collection"
+    if len(collection_name) < 3:
+        collection_name = f"{collection_name}_kb"
+    return collection_name
+
+
+def hash_file(file_path: Union[Path, str], block_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as handle:
+        for block in iter(lambda: handle.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def find_ingestable_files(paths: Sequence[Union[Path, str]], exclude: Optional[Path] = None) -> List[Path]:
+    """
+    The given files plus every supported file under the given directories, skipping anything
+    inside ``exclude``.
+    """
+    found: List[Path] = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            found.extend(
+                sorted(
+                    candidate
+                    for candidate in path.rglob("*")
+                    if candidate.is_file()
+                    and candidate.suffix.lower() in SUPPORTED_SUFFIXES
+                    and (exclude is None or exclude not in candidate.parents)
+                )
+            )
+        else:
+            found.append(path)
+    return list(dict.fromkeys(found))
+
+
+@dataclass
+class IngestResult:
+    collection_name: str
+    file_hash: str
+    num_docs: int = 0
+    chunks_added: int = 0
+    chunks_removed: int = 0
+    skipped: bool = False
+    embedding_stats: Optional[EmbeddingStats] = None
+    name: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def status(self) -> str:
+        if self.error:
+            return "failed"
+        if self.skipped:
+            return "skipped"
+        return "processed" if self.num_docs else "empty"
+
+
+@dataclass
+class IngestFile:
+    file_path: Union[Path, str]
+    name: Optional[str] = None
+    file_hash: Optional[str] = None
+
+
+class IngestService:
+    """
+    Incrementally syncs files into per-file collections.
+
+    Files whose hash and chunking parameters match the manifest are skipped outright.
+    Otherwise the file is streamed through an ``IngestPipeline``: only chunks that are new
+    since the last ingest are embedded, and stale chunks are deleted once the whole file
+    has been seen, leaving every other collection untouched.
+
+    With a ``lock_dir``, each collection is synced under a file lock, so when several workers
+    or replicas share the data directory only one of them ingests a given file at a time; the
+    others wait, then find the manifest current and skip. With a ``single_flight``, requests
+    within one worker to ingest the same bytes under the same name while that ingest is
+    running wait for it and share its result. With a ``text_cache``, a file parsed once is
+    never parsed again, so re-chunking it only splits and embeds.
+    """
+
+    def __init__(
+        self,
+        vector_store_manager: VectorStoreManager,
+        qa_pipeline_manager: QAPipelineManager,
+        manifest: IngestManifest,
+        pipeline_registry: PipelineRegistry,
+        chunk_size: int = 900,
+        chunk_overlap: int = 100,
+        page_batch_size: int = 10,
+        embedding_batch_size: int = 64,
+        queue_size: int = 4,
+        parse_workers: int = 1,
+        parallel_min_pages: int = 64,
+        lexical_indexes: Optional[LexicalIndexStore] = None,
+        lock_dir: Optional[Union[Path, str]] = None,
+        lock_timeout_seconds: Optional[float] = 600,
+        single_flight: Optional[SingleFlight] = None,
+        text_cache: Optional[ParsedTextCache] = None,
+    ):
+        self.vector_store_manager = vector_store_manager
+        self.qa_pipeline_manager = qa_pipeline_manager
+        self.manifest = manifest
+        self.pipeline_registry = pipeline_registry
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.page_batch_size = page_batch_size
+        self.embedding_batch_size = embedding_batch_size
+        self.queue_size = queue_size
+        self.parse_workers = parse_workers
+        self.parallel_min_pages = parallel_min_pages
+        self.lexical_indexes = lexical_indexes
+        self.lock_dir = Path(lock_dir) if lock_dir is not None else None
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self.single_flight = single_flight
+        self.text_cache = text_cache
+
+    async def ingest(
+        self,
+        file_path: Union[Path, str],
+        progress: Optional[IngestProgress] = None,
+        name: Optional[str] = None,
+        file_hash: Optional[str] = None,
+    ) -> IngestResult:
+        """
+        ``name`` is the file's user-facing name (the upload filename) when it is stored under
+        another path; it determines the collection. A ``file_hash`` already computed at upload
+        time saves reading the file again.
+        """
+        file_path = Path(file_path)
+        name = name or file_path.name
+        progress = progress or IngestProgress()
+        progress.stage = "hashing"
+        collection_name = resolve_collection_name(Path(name).stem)
+        logger.info("Resolved collection name '%s' for file '%s'", collection_name, name)
+
+        if file_hash is None:
+            file_hash = await asyncio.to_thread(hash_file, file_path)
+        if self.single_flight is None:
+            return await self._locked_sync(file_path, name, collection_name, file_hash, progress)
+
+        key = (collection_name, file_hash, self.chunk_size, self.chunk_overlap)
+        if self.single_flight.in_flight(key):
+            logger.info("Ingest of '%s' is already running; waiting for its result.", name)
+            progress.stage = "waiting"
+        result = await self.single_flight.run(
+            key, lambda: self._locked_sync(file_path, name, collection_name, file_hash, progress)
+        )
+        progress.stage = "done"
+        return result
+
+    async def _locked_sync(
+        self,
+        file_path: Path,
+        name: str,
+        collection_name: str,
+        file_hash: str,
+        progress: IngestProgress,
+    ) -> IngestResult:
+        if self.lock_dir is None:
+            return await self._sync(file_path, name, collection_name, file_hash, progress)
+        async with FileLock(self.lock_dir / f"{collection_name}.lock", timeout=self.lock_timeout_seconds):
+            return await self._sync(file_path, name, collection_name, file_hash, progress)
+
+    async def _sync(
+        self,
+        file_path: Path,
+        name: str,
+        collection_name: str,
+        file_hash: str,
+        progress: IngestProgress,
+    ) -> IngestResult:
+        await self._refresh_if_stale(collection_name)
+        unchanged = await self._unchanged(name, collection_name, file_hash)
+        if unchanged is not None:
+            result, rebuilt = unchanged
+            await self._activate(collection_name, rebuild=rebuilt)
+            progress.stage = "done"
+            return result
+
+        # Parsing, embedding and upserting overlap inside the pipeline.
+        progress.stage = "processing"
+        source = await self._pipeline_source(file_path, name, collection_name, file_hash, progress)
+        await self._pipeline().run_many([source], on_timing=self._observer(collection_name))
+        if source.error is not None:
+            raise source.error
+        result = await self._finish(source, name, file_hash)
+        if result.num_docs:
+            await self._activate(collection_name)
+        progress.stage = "done"
+        return result
+
+    async def ingest_many(self, files: Sequence[IngestFile], parse_concurrency: int = 4) -> List[IngestResult]:
+        """
+        Ingest many files in one pipeline run and return a result per file, in order.
+
+        Up to ``parse_concurrency`` files are parsed at once and the chunks of all files are
+        embedded together in ``embedding_batch_size`` batches, so the cost follows the number of
+        chunks rather than the number of files. Unchanged files are skipped as in ``ingest``.
+        A file that cannot be read, parsed or locked gets an ``error`` without failing the
+        others. The active collection is left alone unless there is none yet.
+        """
+        names = [file.name or Path(file.file_path).name for file in files]
+        collections = [resolve_collection_name(Path(name).stem) for name in names]
+        results: List[Optional[IngestResult]] = [None] * len(files)
+
+        async def file_hash_of(file: IngestFile) -> str:
+            return file.file_hash or await asyncio.to_thread(hash_file, file.file_path)
+
+        hashes = await asyncio.gather(*(file_hash_of(file) for file in files), return_exceptions=True)
+        claimed: Dict[str, int] = {}
+        for position, file_hash in enumerate(hashes):
+            collection_name = collections[position]
+            if isinstance(file_hash, Exception):
+                results[position] = IngestResult(collection_name, "", error=str(file_hash))
+            elif collection_name in claimed:
+                error = f"Another file in this batch is also processed into collection '{collection_name}'."
+                results[position] = IngestResult(collection_name, file_hash, error=error)
+            else:
+                claimed[collection_name] = position
+
+        # Each lock is released as soon as its file is done; the stack releases the rest if the run fails.
+        async with AsyncExitStack() as locks:
+            held: Dict[int, FileLock] = {}
+            sources: List[PipelineSource] = []
+            positions: Dict[int, int] = {}
+            # Locks are taken in name order, so concurrent bulk ingests cannot deadlock.
+            for collection_name, position in sorted(claimed.items()):
+                name, file_hash = names[position], hashes[position]
+                try:
+                    if self.lock_dir is not None:
+                        held[position] = await locks.enter_async_context(
+                            FileLock(self.lock_dir / f"{collection_name}.lock", timeout=self.lock_timeout_seconds)
+                        )
+                    await self._refresh_if_stale(collection_name)
+                    unchanged = await self._unchanged(name, collection_name, file_hash)
+                    if unchanged is not None:
+                        results[position] = unchanged[0]
+                        self._release_lock(held, position)
+                        continue
+                    progress = IngestProgress(stage="processing")
+                    source = await self._pipeline_source(
+                        Path(files[position].file_path), name, collection_name, file_hash, progress
+                    )
+                except Exception as exc:
+                    logger.warning("Leaving '%s' out of the bulk ingest: %s", name, exc)
+                    results[position] = IngestResult(collection_name, file_hash, error=str(exc))
+                    self._release_lock(held, position)
+                    continue
+                positions[id(source)] = position
+                sources.append(source)
+
+            async def finish(source: PipelineSource) -> None:
+                position = positions[id(source)]
+                name, file_hash = names[position], hashes[position]
+                try:
+                    if source.error is not None:
+                        logger.error("Failed to parse '%s': %s", name, source.error)
+                        results[position] = IngestResult(source.collection_name, file_hash, error=str(source.error))
+                        return
+                    try:
+                        results[position] = await self._finish(source, name, file_hash)
+                    except Exception as exc:
+                        logger.exception("Failed to finish ingesting '%s'.", name)
+                        results[position] = IngestResult(source.collection_name, file_hash, error=str(exc))
+                    source.progress.stage = "done"
+                finally:
+                    self._release_lock(held, position)
+
+            if sources:
+                logger.info("Bulk ingesting %d of %d files.", len(sources), len(files))
+                await self._pipeline().run_many(
+                    sources,
+                    parse_concurrency=parse_concurrency,
+                    on_timing=self._observer("bulk"),
+                    on_source_done=finish,
+                )
+
+        for name, result in zip(names, results):
+            result.name = name
+        if await asyncio.to_thread(self.manifest.active) is None:
+            ingested = next((result for result in results if result.num_docs and not result.error), None)
+            if ingested is not None:
+                await self._activate(ingested.collection_name)
+        return results
+
+    @staticmethod
+    def _release_lock(held: Dict[int, FileLock], position: int) -> None:
+        lock = held.pop(position, None)
+        if lock is not None:
+            lock.release()
+
+    async def _refresh_if_stale(self, collection_name: str) -> None:
+        # Called under the collection's lock, before anything is read: writing through a copy opened before
+        # another worker's ingest would overwrite or orphan that worker's chunks.
+        if await asyncio.to_thread(self.vector_store_manager.is_stale, collection_name):
+            self.pipeline_registry.reload(collection_name)
+
+    async def _unchanged(
+        self, name: str, collection_name: str, file_hash: str
+    ) -> Optional[Tuple[IngestResult, bool]]:
+        """
+        The result for a file already ingested with these bytes and chunking parameters, and
+        whether its keyword index had to be rebuilt; None when the file needs ingesting.
+        """
+        if not (
+            await asyncio.to_thread(
+                self.manifest.is_current, collection_name, file_hash, self.chunk_size, self.chunk_overlap
+            )
+            and await self.vector_store_manager.collection_exists(collection_name)
+        ):
+            return None
+        logger.info("File '%s' is unchanged since the last ingest; skipping.", name)
+        entry = await asyncio.to_thread(self.manifest.get, collection_name) or {}
+        rebuilt = False
+        if self.lexical_indexes is not None and not self.lexical_indexes.exists(collection_name):
+            await self._build_lexical_index(collection_name)
+            rebuilt = True
+        result = IngestResult(
+            collection_name=collection_name,
+            file_hash=file_hash,
+            num_docs=entry.get("num_chunks", 0),
+            skipped=True,
+        )
+        return result, rebuilt
+
+    def _observer(self, collection_name: str) -> Callable[[str, float], None]:
+        model_name = self.vector_store_manager.model_name
+
+        def observe(stage: str, seconds: float) -> None:
+            INGEST_STAGE_SECONDS.observe(seconds, stage=stage, collection=collection_name, model=model_name)
+
+        return observe
+
+    def _pipeline(self) -> IngestPipeline:
+        return IngestPipeline(
+            self.vector_store_manager,
+            embedding_batch_size=self.embedding_batch_size,
+            queue_size=self.queue_size,
+        )
+
+    async def _pipeline_source(
+        self,
+        file_path: Path,
+        name: str,
+        collection_name: str,
+        file_hash: str,
+        progress: IngestProgress,
+    ) -> PipelineSource:
+        file_processor = FileProcessor(
+            str(file_path),
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            page_chunk_size=self.page_batch_size,
+            parse_workers=self.parse_workers,
+            parallel_min_pages=self.parallel_min_pages,
+            source_name=name,
+            file_hash=file_hash,
+            text_cache=self.text_cache,
+        )
+        existing_ids = set(await self.vector_store_manager.get_document_ids(collection_name=collection_name))
+        return PipelineSource(
+            file_processor.iter_chunks(on_pages=progress.add_pages, on_timing=self._observer(collection_name)),
+            existing_ids,
+            collection_name=collection_name,
+            progress=progress,
+        )
+
+    async def _finish(self, source: PipelineSource, name: str, file_hash: str) -> IngestResult:
+        """
+        Delete the file's stale chunks and record it once all of its chunks are written.
+        """
+        collection_name, outcome, progress = source.collection_name, source.result, source.progress
+        INGEST_CHUNKS.inc(outcome.chunks_added, collection=collection_name, model=self.vector_store_manager.model_name)
+        logger.info("File '%s' yielded %d document chunks", name, len(outcome.chunk_ids))
+        if not outcome.chunk_ids:
+            return IngestResult(collection_name=collection_name, file_hash=file_hash)
+
+        progress.stage = "indexing"
+        new_ids = set(outcome.chunk_ids)
+        stale_ids = [doc_id for doc_id in source.existing_ids if doc_id not in new_ids]
+        await self.vector_store_manager.delete_documents(stale_ids, collection_name=collection_name)
+        if outcome.chunks_added or stale_ids:
+            # Cached answers were produced from the old contents of this collection.
+            self.qa_pipeline_manager.invalidate_answers(collection_name)
+        if self.lexical_indexes is not None:
+            await self._build_lexical_index(collection_name)
+        logger.info(
+            "Synced collection '%s': %d chunks added, %d removed, %d unchanged.",
+            collection_name,
+            outcome.chunks_added,
+            len(stale_ids),
+            len(outcome.chunk_ids) - outcome.chunks_added,
+        )
+
+        # The manifest is written under a file lock another worker may hold, so never on the event loop.
+        await asyncio.to_thread(
+            self.manifest.record,
+            collection_name,
+            changed=bool(outcome.chunks_added or stale_ids),
+            filename=name,
+            file_hash=file_hash,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            num_chunks=len(outcome.chunk_ids),
+        )
+        await asyncio.to_thread(self.vector_store_manager.mark_current, collection_name)
+        return IngestResult(
+            collection_name=collection_name,
+            file_hash=file_hash,
+            num_docs=len(outcome.chunk_ids),
+            chunks_added=outcome.chunks_added,
+            chunks_removed=len(stale_ids),
+            embedding_stats=outcome.embedding_stats,
+        )
+
+    async def _build_lexical_index(self, collection_name: str) -> None:
+        # Rebuilt from the stored chunks, so it needs no embedding pass and always matches the collection.
+        ids, texts, metadatas = await self.vector_store_manager.get_all_documents(collection_name=collection_name)
+        await asyncio.to_thread(self.lexical_indexes.build, collection_name, ids, texts, metadatas)
+
+    async def _activate(self, collection_name: str, rebuild: bool = True) -> None:
+        await self.vector_store_manager.set_collection(collection_name)
+        await asyncio.to_thread(self.manifest.activate, collection_name)
+        if rebuild:
+            retriever = await self.pipeline_registry.refresh(collection_name)
+        else:
+            retriever = await self.pipeline_registry.get(collection_name)
+        self.pipeline_registry.pin(collection_name)
+        self.qa_pipeline_manager.create_pipeline(retriever, collection_name=collection_name)
@@ -1,12 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Optional
 
 
 class QAPipelineInterface(ABC):
     @abstractmethod
-    def create_pipeline(self, retriever: Any) -> None:
-        raise NotImplementedError
-
-    @abstractmethod
-    def get_pipeline(self) -> Any:
+    def create_pipeline(self, retriever: Any, collection_name: Optional[str] = None) -> None:
         raise NotImplementedError
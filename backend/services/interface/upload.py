@@ -1,14 +1,21 @@
 from abc import ABC, abstractmethod
-from typing import Protocol
+from typing import Any, Optional, Protocol
 
 from fastapi import UploadFile
 
 
 class UploadServiceInterface(ABC):
     @abstractmethod
-    async def save(self, uploaded_file: UploadFile) -> str:
+    async def save(self, uploaded_file: UploadFile) -> Any:
         """
-        Persist an uploaded file and return its absolute path.
+        Persist an uploaded file and return a record of where it was stored.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def resolve(self, filename: str) -> Optional[Any]:
+        """
+        Locate a previously uploaded file by name; None when it is unknown.
         """
         raise NotImplementedError
 
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 
 class VectorStoreInterface(ABC):
@@ -8,11 +8,76 @@ class VectorStoreInterface(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    async def add_documents(self, documents: Any) -> None:
+    async def collection_exists(self, collection_name: str) -> bool:
         raise NotImplementedError
 
     @abstractmethod
-    async def get_retriever(self, k_value: int = 6) -> Any:
+    async def count_documents(self, collection_name: Optional[str] = None) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def release_collection(self, collection_name: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def reload_collection(self, collection_name: str) -> bool:
+        """Reopen a collection changed by another process; True when every collection was reopened."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def close(self) -> None:
+        """Release open collections and clients; they are reopened on next use."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def is_stale(self, collection_name: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def mark_current(self, collection_name: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def add_documents(
+        self,
+        documents: Any,
+        ids: Optional[Sequence[str]] = None,
+        collection_name: Optional[str] = None,
+    ) -> Any:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def embed_documents(self, documents: Any) -> Tuple[List[List[float]], Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def upsert_embeddings(
+        self,
+        ids: Sequence[str],
+        documents: Any,
+        vectors: Sequence[Sequence[float]],
+        collection_name: Optional[str] = None,
+    ) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_document_ids(self, collection_name: Optional[str] = None) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_all_documents(
+        self,
+        collection_name: Optional[str] = None,
+    ) -> Tuple[List[str], List[str], List[Dict[str, Any]]]:
+        """Return the ids, texts and metadata of every document in the collection."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_documents(self, ids: Sequence[str], collection_name: Optional[str] = None) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_retriever(self, k_value: int = 6, collection_name: Optional[str] = None) -> Any:
         raise NotImplementedError
 
     @abstractmethod
@@ -0,0 +1,225 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from backend.services.ingest_pipeline import IngestProgress
+from backend.services.ingest_service import IngestResult, IngestService
+from backend.utils.logging_config import get_logger
+from backend.utils.shared_state import SharedJsonFile
+
+logger = get_logger(__name__)
+
+
+class JobQueueFullError(Exception):
+    """Raised when the ingest queue is at capacity and a new job cannot be accepted."""
+
+
+@dataclass
+class IngestJob:
+    job_id: str
+    filename: str
+    file_path: Path
+    file_hash: Optional[str] = None
+    status: str = "queued"
+    progress: IngestProgress = field(default_factory=IngestProgress)
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result: Optional[IngestResult] = None
+
+    @property
+    def elapsed_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def chunks_per_second(self) -> float:
+        elapsed = self.elapsed_seconds
+        return self.progress.chunks_embedded / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "filename": self.filename,
+            "file_path": str(self.file_path),
+            "file_hash": self.file_hash,
+            "status": self.status,
+            "progress": asdict(self.progress),
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "result": None,
+        }
+        if self.result is not None:
+            data["result"] = {
+                "collection_name": self.result.collection_name,
+                "file_hash": self.result.file_hash,
+                "num_docs": self.result.num_docs,
+                "chunks_added": self.result.chunks_added,
+                "chunks_removed": self.result.chunks_removed,
+                "skipped": self.result.skipped,
+            }
+        return data
+
+    @classmethod
+    def from_dict(cls, job_id: str, data: Dict[str, Any]) -> "IngestJob":
+        return cls(
+            job_id=job_id,
+            filename=data["filename"],
+            file_path=Path(data["file_path"]),
+            file_hash=data.get("file_hash"),
+            status=data["status"],
+            progress=IngestProgress(**data.get("progress", {})),
+            submitted_at=data["submitted_at"],
+            started_at=data.get("started_at"),
+            finished_at=data.get("finished_at"),
+            error=data.get("error"),
+            result=IngestResult(**data["result"]) if data.get("result") else None,
+        )
+
+
+class IngestJobManager:
+    """
+    Runs ingests in the background on a bounded pool of worker tasks.
+
+    Jobs wait in a bounded queue; when it is full ``submit`` raises ``JobQueueFullError`` so
+    the API can push back instead of accepting unbounded work. Finished jobs are kept for
+    status polling until ``max_retained_jobs`` newer ones have been submitted.
+
+    With a ``status_path``, every job's status is also written to that file when it is queued,
+    every ``status_interval_seconds`` while it runs, and when it finishes, so any worker sharing
+    the data directory can report a job another worker is running.
+    """
+
+    def __init__(
+        self,
+        ingest_service: IngestService,
+        concurrency: int = 2,
+        max_queue_size: int = 32,
+        max_retained_jobs: int = 1000,
+        status_path: Optional[Union[Path, str]] = None,
+        status_interval_seconds: float = 1.0,
+    ):
+        self.ingest_service = ingest_service
+        self.concurrency = max(1, concurrency)
+        self.max_queue_size = max(1, max_queue_size)
+        self.max_retained_jobs = max_retained_jobs
+        self.status_interval_seconds = status_interval_seconds
+        self._status_file = SharedJsonFile(status_path) if status_path is not None else None
+        self.jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def _ensure_workers(self) -> None:
+        # Workers are started lazily so they bind to the running event loop.
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < self.concurrency:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def submit(self, file_path: Path, filename: Optional[str] = None, file_hash: Optional[str] = None) -> IngestJob:
+        self._ensure_workers()
+        job = IngestJob(
+            job_id=uuid.uuid4().hex,
+            filename=filename or file_path.name,
+            file_path=file_path,
+            file_hash=file_hash,
+        )
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            logger.warning("Ingest queue full (%d jobs); rejecting '%s'.", self.max_queue_size, job.filename)
+            raise JobQueueFullError(f"Ingest queue is full ({self.max_queue_size} jobs pending).")
+
+        self.jobs[job.job_id] = job
+        self._prune()
+        await self._publish(job)
+        logger.info("Queued ingest job %s for '%s'.", job.job_id, job.filename)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        """
+        The job with ``job_id``, or the last status another worker wrote for it.
+        """
+        job = self.jobs.get(job_id)
+        if job is not None or self._status_file is None:
+            return job
+        data = self._status_file.read().get(job_id)
+        return IngestJob.from_dict(job_id, data) if data else None
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished_at is not None]
+        excess = len(self.jobs) - self.max_retained_jobs
+        for job_id in finished[:max(0, excess)]:
+            del self.jobs[job_id]
+
+    async def _publish(self, job: IngestJob) -> None:
+        if self._status_file is None:
+            return
+        # Written under a file lock another worker may hold, so never on the event loop.
+        try:
+            await asyncio.to_thread(self._write_status, job.job_id, job.to_dict())
+        except Exception:
+            logger.exception("Could not store the status of ingest job %s.", job.job_id)
+
+    def _write_status(self, job_id: str, status: Dict[str, Any]) -> None:
+        with self._status_file.update() as data:
+            data[job_id] = status
+            finished = sorted(
+                (entry["finished_at"], other_id) for other_id, entry in data.items() if entry.get("finished_at")
+            )
+            for _, other_id in finished[:max(0, len(data) - self.max_retained_jobs)]:
+                del data[other_id]
+
+    async def _publish_while_running(self, job: IngestJob, finished: asyncio.Event) -> None:
+        while not finished.is_set():
+            try:
+                await asyncio.wait_for(finished.wait(), timeout=self.status_interval_seconds)
+            except asyncio.TimeoutError:
+                await self._publish(job)
+
+    async def _worker(self) -> None:
+        while True:
+            job: IngestJob = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: IngestJob) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        logger.info("Starting ingest job %s for '%s'.", job.job_id, job.filename)
+        await self._publish(job)
+        # Stopped with an event rather than cancelled, so no progress write can land after the final one.
+        finished = asyncio.Event()
+        publisher = asyncio.create_task(self._publish_while_running(job, finished))
+        try:
+            job.result = await self.ingest_service.ingest(
+                job.file_path,
+                progress=job.progress,
+                name=job.filename,
+                file_hash=job.file_hash,
+            )
+            job.status = "completed"
+        except Exception as exc:
+            logger.exception("Ingest job %s failed.", job.job_id)
+            job.status = "failed"
+            job.progress.stage = "failed"
+            job.error = str(exc)
+        finally:
+            job.finished_at = time.time()
+            finished.set()
+            await publisher
+            await self._publish(job)
+        logger.info("Ingest job %s finished with status '%s'.", job.job_id, job.status)
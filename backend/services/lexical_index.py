@@ -0,0 +1,210 @@
+import gzip
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from langchain_core.documents import Document
+
+from backend.services.search_scope import MetadataColumns, MetadataFilter
+from backend.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Keeps identifiers such as "E-1042", "read_file" or "v2.3.1" together as one token.
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[._\-/:][a-z0-9]+)*")
+_PART_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase word tokens. Compound identifiers are kept whole and also split into
+    their parts, so "E-1042" matches both an exact query and one for "1042".
+    """
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        parts = _PART_PATTERN.findall(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class BM25Index:
+    """
+    Compact in-memory BM25 inverted index over the chunks of one collection.
+
+    Postings map each term to ``(document index, term frequency)`` pairs, so a query only
+    touches the documents that contain one of its terms. Filtered searches skip postings of
+    documents outside the filter, selected through a source/page index built on first use.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.avg_doc_length = 0.0
+        self._columns: Optional[MetadataColumns] = None
+
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        metadatas: Sequence[Optional[Dict[str, Any]]],
+        k1: float = 1.5,
+        b: float = 0.75,
+    ) -> "BM25Index":
+        index = cls(k1=k1, b=b)
+        index.doc_ids = list(ids)
+        index.texts = list(texts)
+        index.metadatas = [metadata or {} for metadata in metadatas]
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for position, text in enumerate(index.texts):
+            counts = Counter(tokenize(text))
+            index.doc_lengths.append(sum(counts.values()))
+            for term, frequency in counts.items():
+                postings.setdefault(term, []).append((position, frequency))
+        index.postings = postings
+        index.avg_doc_length = sum(index.doc_lengths) / len(index.doc_lengths) if index.doc_lengths else 0.0
+        return index
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def matching(self, search_filter: MetadataFilter) -> np.ndarray:
+        if self._columns is None:
+            columns = MetadataColumns()
+            columns.assign(range(len(self.metadatas)), self.metadatas)
+            self._columns = columns
+        return self._columns.mask(search_filter, len(self.doc_ids))
+
+    def search(self, query: str, k: int = 6, search_filter: Optional[MetadataFilter] = None) -> List[Tuple[Document, float]]:
+        if not self.doc_ids:
+            return []
+        allowed = None
+        if search_filter is not None:
+            allowed = self.matching(search_filter)
+            if not allowed.any():
+                return []
+        total_docs = len(self.doc_ids)
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, frequency in postings:
+                if allowed is not None and not allowed[position]:
+                    continue
+                length_norm = 1 - self.b + self.b * self.doc_lengths[position] / (self.avg_doc_length or 1.0)
+                score = idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+                scores[position] = scores.get(position, 0.0) + score
+
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [
+            (
+                Document(page_content=self.texts[position], metadata=self.metadatas[position], id=self.doc_ids[position]),
+                score,
+            )
+            for position, score in best
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "k1": self.k1,
+            "b": self.b,
+            "doc_ids": self.doc_ids,
+            "texts": self.texts,
+            "metadatas": self.metadatas,
+            "doc_lengths": self.doc_lengths,
+            "postings": self.postings,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "BM25Index":
+        index = cls(k1=payload["k1"], b=payload["b"])
+        index.doc_ids = payload["doc_ids"]
+        index.texts = payload["texts"]
+        index.metadatas = payload["metadatas"]
+        index.doc_lengths = payload["doc_lengths"]
+        index.postings = {term: [tuple(entry) for entry in entries] for term, entries in payload["postings"].items()}
+        index.avg_doc_length = sum(index.doc_lengths) / len(index.doc_lengths) if index.doc_lengths else 0.0
+        return index
+
+
+class LexicalIndexStore:
+    """
+    Persists one gzipped BM25 index per collection next to the Chroma data and keeps
+    loaded indexes in memory.
+    """
+
+    def __init__(self, index_dir: Union[Path, str], k1: float = 1.5, b: float = 0.75):
+        self.index_dir = Path(index_dir)
+        self.k1 = k1
+        self.b = b
+        self._indexes: Dict[str, BM25Index] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, collection_name: str) -> Path:
+        return self.index_dir / f"{collection_name}.json.gz"
+
+    def exists(self, collection_name: str) -> bool:
+        return collection_name in self._indexes or self._path(collection_name).exists()
+
+    def build(
+        self,
+        collection_name: str,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        metadatas: Sequence[Optional[Dict[str, Any]]],
+    ) -> BM25Index:
+        index = BM25Index.build(ids, texts, metadatas, k1=self.k1, b=self.b)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(collection_name)
+        tmp_path = path.with_suffix(".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as handle:
+            json.dump(index.to_dict(), handle, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._indexes[collection_name] = index
+        logger.info("Built BM25 index for '%s' with %d chunks and %d terms.", collection_name, len(index), len(index.postings))
+        return index
+
+    def get(self, collection_name: str) -> Optional[BM25Index]:
+        with self._lock:
+            index = self._indexes.get(collection_name)
+        if index is not None:
+            return index
+
+        path = self._path(collection_name)
+        if not path.exists():
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            index = BM25Index.from_dict(json.load(handle))
+        with self._lock:
+            self._indexes[collection_name] = index
+        logger.info("Loaded BM25 index for '%s' from %s", collection_name, path)
+        return index
+
+    def unload(self, collection_name: str) -> None:
+        """
+        Drop the in-memory copy; the index is reloaded from disk on the next ``get``.
+        """
+        with self._lock:
+            self._indexes.pop(collection_name, None)
+
+    def remove(self, collection_name: str) -> None:
+        with self._lock:
+            self._indexes.pop(collection_name, None)
+        self._path(collection_name).unlink(missing_ok=True)
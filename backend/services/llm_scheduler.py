@@ -0,0 +1,286 @@
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from backend.services.context_packer import estimate_tokens
+from backend.utils.concurrency import TokenBucket
+from backend.utils.logging_config import get_logger
+from backend.utils.metrics import LLM_HEDGES, LLM_QUEUE_DEPTH, LLM_QUEUE_WAIT_SECONDS, LLM_RESPONSES
+
+logger = get_logger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BATCH: "batch"}
+
+# Pause after a 429 that does not say how long to wait.
+DEFAULT_BACKOFF_SECONDS = 5.0
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    return getattr(exc, "status_code", None) == 429 or type(exc).__name__ == "RateLimitError"
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    sequence: int
+    tokens: int = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class LLMScheduler:
+    """
+    Dispatches chat model calls within the provider's rate limits.
+
+    Each call takes one request and its estimated tokens (the prompt estimate plus
+    ``expected_completion_tokens``) from per-minute token buckets; the estimate is corrected
+    once the provider reports usage. Calls that do not fit wait in a priority queue, so
+    interactive questions go ahead of batch work. A 429 pauses dispatch for the provider's
+    ``Retry-After``.
+
+    With a ``fallback_factory`` (a local Ollama model), calls go to the fallback instead of
+    the primary when they would wait longer than ``fallback_queue_seconds`` or the primary
+    answers 429. With ``hedge_after_seconds``, a call that has not answered by then is also
+    sent to the fallback, or to the primary again when there is capacity for it, and the first
+    answer wins.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        expected_completion_tokens: int = 512,
+        hedge_after_seconds: float = 0,
+        fallback_queue_seconds: float = 2.0,
+        fallback_factory: Optional[Callable[[], Any]] = None,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.expected_completion_tokens = max(0, expected_completion_tokens)
+        self.hedge_after_seconds = hedge_after_seconds
+        self.fallback_queue_seconds = fallback_queue_seconds
+        self._fallback_factory = fallback_factory
+        self._fallback = None
+        self._queue: List[_Waiter] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._paused_until = 0.0
+        self.responses: Dict[str, int] = {"primary": 0, "fallback": 0}
+        self.hedges = 0
+        self.rate_limited = 0
+        LLM_QUEUE_DEPTH.set(0)
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def _fallback_model(self):
+        """
+        The fallback chat model, created on first use; None when there is none or it failed to load.
+        """
+        if self._fallback is None and self._fallback_factory is not None:
+            try:
+                self._fallback = self._fallback_factory()
+            except Exception:
+                logger.exception("Failed to create the fallback chat model; continuing without it.")
+                self._fallback_factory = None
+        return self._fallback
+
+    def _try_take(self, tokens: int) -> bool:
+        if time.monotonic() < self._paused_until:
+            return False
+        if self.requests.wait_time(1) > 0 or self.tokens.wait_time(tokens) > 0:
+            return False
+        self.requests.consume(1)
+        self.tokens.consume(tokens)
+        return True
+
+    def _delay(self, tokens: int) -> float:
+        return max(self._paused_until - time.monotonic(), self.requests.wait_time(1), self.tokens.wait_time(tokens))
+
+    def _pump(self) -> None:
+        # Grants capacity strictly in queue order and wakes itself when the head could next fit.
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        while self._queue:
+            head = self._queue[0]
+            if not self._try_take(head.tokens):
+                delay = max(self._delay(head.tokens), 0.005)
+                self._wakeup = asyncio.get_running_loop().call_later(delay, self._pump)
+                break
+            heapq.heappop(self._queue)
+            head.future.set_result(None)
+        LLM_QUEUE_DEPTH.set(len(self._queue))
+
+    async def _admit(self, tokens: int, priority: int, timeout: Optional[float]) -> bool:
+        """
+        Wait for capacity to call the primary; False when none came within ``timeout``.
+        """
+        labels = {"priority": PRIORITY_NAMES.get(priority, str(priority))}
+        if not self._queue and self._try_take(tokens):
+            LLM_QUEUE_WAIT_SECONDS.observe(0.0, **labels)
+            return True
+        waiter = _Waiter(priority, next(self._sequence), tokens, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._queue, waiter)
+        started = time.perf_counter()
+        self._pump()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            if not waiter.future.done():
+                waiter.future.cancel()
+                self._queue.remove(waiter)
+                heapq.heapify(self._queue)
+                self._pump()
+            LLM_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - started, **labels)
+        return not waiter.future.cancelled()
+
+    async def _acquire(self, chat, tokens: int, priority: int) -> Tuple[Any, str]:
+        """
+        The model to call and why: the primary once it has capacity, or the fallback when the
+        primary stays saturated past ``fallback_queue_seconds``.
+        """
+        timeout = self.fallback_queue_seconds if self._fallback_factory is not None else None
+        if await self._admit(tokens, priority, timeout):
+            return chat, "direct"
+        fallback = self._fallback_model()
+        if fallback is not None:
+            return fallback, "saturated"
+        await self._admit(tokens, priority, None)
+        return chat, "direct"
+
+    def _back_off(self, exc: BaseException) -> None:
+        self.rate_limited += 1
+        pause = retry_after_seconds(exc) or DEFAULT_BACKOFF_SECONDS
+        self._paused_until = max(self._paused_until, time.monotonic() + pause)
+        logger.warning("LLM provider rate limited the request; pausing dispatch for %.1fs.", pause)
+
+    def _settle(self, estimate: int, usage: Optional[Dict[str, Any]]) -> None:
+        # Replace the token estimate with the provider's count.
+        usage = usage or {}
+        actual = usage.get("total_tokens") or (usage.get("input_tokens", 0) + usage.get("output_tokens", 0))
+        if actual:
+            self.tokens.consume(actual - estimate)
+
+    def _record(self, backend: str, reason: str) -> None:
+        self.responses[backend] += 1
+        LLM_RESPONSES.inc(backend=backend, reason=reason)
+
+    def _hedge_model(self, chat, tokens: int) -> Tuple[Any, str]:
+        fallback = self._fallback_model()
+        if fallback is not None:
+            return fallback, "fallback"
+        if self._try_take(tokens):
+            return chat, "primary"
+        return None, ""
+
+    async def _invoke_hedged(self, chat, prompt: str, tokens: int) -> Tuple[Any, str, str]:
+        primary = asyncio.ensure_future(chat.ainvoke(prompt))
+        calls = {primary: ("primary", "direct")}
+        try:
+            if self.hedge_after_seconds > 0:
+                await asyncio.wait({primary}, timeout=self.hedge_after_seconds)
+                hedge_model, target = self._hedge_model(chat, tokens) if not primary.done() else (None, "")
+                if hedge_model is not None:
+                    self.hedges += 1
+                    LLM_HEDGES.inc(target=target)
+                    logger.info("LLM call exceeded %.1fs; hedging to the %s model.", self.hedge_after_seconds, target)
+                    calls[asyncio.ensure_future(hedge_model.ainvoke(prompt))] = (target, "hedge")
+            pending = set(calls)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    if finished.exception() is None:
+                        backend, reason = calls[finished]
+                        return finished.result(), backend, reason
+                    if is_rate_limited(finished.exception()):
+                        self._back_off(finished.exception())
+            raise primary.exception()
+        finally:
+            for call in calls:
+                call.cancel()
+
+    async def ainvoke(self, chat, prompt: str, priority: int = PRIORITY_INTERACTIVE) -> Any:
+        """
+        Call ``chat`` (the primary model) with ``prompt`` once the rate limits allow it.
+        """
+        estimate = estimate_tokens(prompt) + self.expected_completion_tokens
+        model, reason = await self._acquire(chat, estimate, priority)
+        if model is not chat:
+            message = await model.ainvoke(prompt)
+            self._record("fallback", reason)
+            return message
+        try:
+            message, backend, reason = await self._invoke_hedged(chat, prompt, estimate)
+        except Exception as exc:
+            # The pause for a 429 has already been applied; only the fallback remains.
+            fallback = self._fallback_model() if is_rate_limited(exc) else None
+            if fallback is None:
+                raise
+            message = await fallback.ainvoke(prompt)
+            self._record("fallback", "rate_limited")
+            return message
+        if backend == "primary":
+            self._settle(estimate, getattr(message, "usage_metadata", None))
+        self._record(backend, reason)
+        return message
+
+    async def astream(self, chat, prompt: str, priority: int = PRIORITY_INTERACTIVE) -> AsyncIterator[Any]:
+        """
+        Stream ``chat``'s answer once the rate limits allow it. Streams are not hedged; a 429
+        before the first chunk switches to the fallback.
+        """
+        estimate = estimate_tokens(prompt) + self.expected_completion_tokens
+        model, reason = await self._acquire(chat, estimate, priority)
+        usage = None
+        started = False
+        try:
+            async for chunk in model.astream(prompt):
+                started = True
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                yield chunk
+        except Exception as exc:
+            if model is not chat or not is_rate_limited(exc):
+                raise
+            self._back_off(exc)
+            fallback = None if started else self._fallback_model()
+            if fallback is None:
+                raise
+            model, reason = fallback, "rate_limited"
+        else:
+            if model is chat:
+                self._settle(estimate, usage)
+            self._record("primary" if model is chat else "fallback", reason)
+            return
+        async for chunk in model.astream(prompt):
+            yield chunk
+        self._record("fallback", reason)
+
+    def stats(self) -> Dict[str, Any]:
+        served = sum(self.responses.values())
+        return {
+            "queue_depth": self.queue_depth,
+            "responses": dict(self.responses),
+            "fallback_rate": self.responses["fallback"] / served if served else 0.0,
+            "hedges": self.hedges,
+            "rate_limited": self.rate_limited,
+            "paused_seconds": max(0.0, self._paused_until - time.monotonic()),
+            "requests_per_minute": self.requests.per_minute,
+            "tokens_per_minute": self.tokens.per_minute,
+            "fallback_enabled": self._fallback_factory is not None,
+        }
@@ -0,0 +1,586 @@
+import asyncio
+import json
+import os
+import shutil
+import struct
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from backend.services.search_scope import MetadataColumns, MetadataFilter
+from backend.services.vector_store_service import VectorStoreManager
+from backend.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+VECTORS_FILE = "vectors.npy"
+CHUNKS_FILE = "chunks.tsv"
+
+# Fixed-size .npy header, padded so the row count can be rewritten in place as rows are appended.
+_HEADER_BYTES = 128
+_NPY_MAGIC = b"\x93NUMPY\x01\x00"
+# Rows scored per matrix product, bounding the float32 copy made of the float16 vectors.
+_SCORE_BLOCK_ROWS = 4096
+
+
+def _npy_header(rows: int, dimensions: int) -> bytes:
+    header = "{'descr': '<f2', 'fortran_order': False, 'shape': (%d, %d), }" % (rows, dimensions)
+    header = header.ljust(_HEADER_BYTES - len(_NPY_MAGIC) - 3) + "\n"
+    return _NPY_MAGIC + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+def _read_shape(path: Path) -> Tuple[int, int]:
+    with open(path, "rb") as handle:
+        np.lib.format.read_magic(handle)
+        shape, _, _ = np.lib.format.read_array_header_1_0(handle)
+    return shape
+
+
+def _normalize(vectors: Sequence[Sequence[float]]) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.clip(norms, 1e-12, None)
+
+
+class NumpyIndex:
+    """
+    One collection stored as a memory-mapped float16 matrix plus an append-only sidecar.
+
+    ``vectors.npy`` holds L2-normalized embeddings, one row per chunk; new rows are appended to
+    the end of the file and only the fixed-size header is rewritten. ``chunks.tsv`` has one
+    ``row<TAB>id<TAB>json`` line per write, where the JSON carries the chunk text and metadata
+    (an empty payload marks a deleted row); the last line for a row wins. Only ids and line
+    offsets are kept in memory, and texts are read back for the hits of a search.
+    The header row count is written last, so rows from an interrupted write are ignored.
+    The source and page of each row are indexed on the first filtered search, so later filtered
+    searches only score the rows that match.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.vectors_path = self.directory / VECTORS_FILE
+        self.chunks_path = self.directory / CHUNKS_FILE
+        self._lock = threading.Lock()
+        self.dimensions: Optional[int] = None
+        self._vectors: Optional[np.ndarray] = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._offsets = np.zeros(0, dtype=np.int64)
+        self._ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._columns: Optional[MetadataColumns] = None
+        # Held open so texts are read from the sidecar these offsets belong to, even after
+        # another worker compacts the collection and swaps the directory.
+        self._reader = None
+        # Searches between scoring and reading their hits, and whether a close waits for them.
+        self._searches = 0
+        self._closing = False
+        # Bumped when compaction renumbers rows, so a search can tell its hits went stale.
+        self._generation = 0
+        self._load()
+
+    @staticmethod
+    def exists(directory: Path) -> bool:
+        return (Path(directory) / VECTORS_FILE).exists()
+
+    def _load(self) -> None:
+        if not self.vectors_path.exists():
+            return
+        rows, self.dimensions = _read_shape(self.vectors_path)
+        self._ids = [None] * rows
+        self._alive = np.zeros(rows, dtype=bool)
+        self._offsets = np.full(rows, -1, dtype=np.int64)
+        self._rows = {}
+        self._columns = None
+        self._close_reader()
+        if self.chunks_path.exists():
+            self._reader = open(self.chunks_path, "rb")
+            offset = 0
+            for line in self._reader:
+                row_text, doc_id, payload = line.split(b"\t", 2)
+                row = int(row_text)
+                if row < rows:
+                    self._record(row, doc_id.decode("utf-8"), offset, bool(payload.strip()))
+                offset += len(line)
+        self._remap(rows)
+
+    def _close_reader(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def close(self) -> None:
+        """
+        Close the sidecar reader, once the searches already running have read their hits.
+        The index stays usable and reopens the reader if it is searched again.
+        """
+        with self._lock:
+            if self._searches:
+                self._closing = True
+            else:
+                self._close_reader()
+
+    def _record(self, row: int, doc_id: str, offset: int, alive: bool) -> None:
+        previous = self._ids[row]
+        if previous is not None and self._rows.get(previous) == row:
+            del self._rows[previous]
+        self._ids[row] = doc_id if alive else None
+        self._alive[row] = alive
+        self._offsets[row] = offset if alive else -1
+        if alive:
+            self._rows[doc_id] = row
+
+    def _remap(self, rows: int) -> None:
+        if rows == 0:
+            self._vectors = np.zeros((0, self.dimensions or 0), dtype=np.float16)
+            return
+        self._vectors = np.memmap(
+            self.vectors_path,
+            dtype=np.float16,
+            mode="r",
+            offset=_HEADER_BYTES,
+            shape=(rows, self.dimensions),
+        )
+
+    @property
+    def count(self) -> int:
+        return len(self._rows)
+
+    @property
+    def rows(self) -> int:
+        return len(self._ids)
+
+    def ids(self) -> List[str]:
+        return list(self._rows)
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+        vectors: Sequence[Sequence[float]],
+    ) -> None:
+        if not ids:
+            return
+        matrix = _normalize(vectors).astype(np.float16)
+        with self._lock:
+            if self.dimensions is None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self.dimensions = matrix.shape[1]
+                with open(self.vectors_path, "wb") as handle:
+                    handle.write(_npy_header(0, self.dimensions))
+            if matrix.shape[1] != self.dimensions:
+                raise ValueError(f"Expected {self.dimensions}-dimensional vectors, got {matrix.shape[1]}.")
+
+            row_bytes = self.dimensions * 2
+            rows = self.rows
+            targets = []
+            assigned: Dict[str, int] = {}
+            for doc_id in ids:
+                row = self._rows.get(doc_id, assigned.get(doc_id))
+                if row is None:
+                    row = rows
+                    rows += 1
+                assigned[doc_id] = row
+                targets.append(row)
+
+            with open(self.vectors_path, "r+b") as handle:
+                for row, vector in zip(targets, matrix):
+                    handle.seek(_HEADER_BYTES + row * row_bytes)
+                    handle.write(vector.tobytes())
+                handle.flush()
+                lines = self._append_chunks(
+                    (row, doc_id, json.dumps({"text": text, "metadata": metadata or {}}, ensure_ascii=False, default=str))
+                    for row, doc_id, text, metadata in zip(targets, ids, texts, metadatas)
+                )
+                handle.seek(0)
+                handle.write(_npy_header(rows, self.dimensions))
+
+            self._grow(rows)
+            for row, doc_id, offset in lines:
+                self._record(row, doc_id, offset, True)
+            if self._columns is not None:
+                self._columns.assign(targets, metadatas)
+            self._remap(rows)
+
+    def delete(self, ids: Sequence[str]) -> int:
+        with self._lock:
+            rows = [(self._rows[doc_id], doc_id) for doc_id in ids if doc_id in self._rows]
+            if not rows:
+                return 0
+            lines = self._append_chunks((row, doc_id, "") for row, doc_id in rows)
+            for row, doc_id, offset in lines:
+                self._record(row, doc_id, offset, False)
+            dead = self.rows - self.count
+            if dead > max(self.count, 1024):
+                self._compact()
+            return len(rows)
+
+    def _grow(self, rows: int) -> None:
+        extra = rows - len(self._ids)
+        if extra > 0:
+            self._ids.extend([None] * extra)
+            self._alive = np.concatenate([self._alive, np.zeros(extra, dtype=bool)])
+            self._offsets = np.concatenate([self._offsets, np.full(extra, -1, dtype=np.int64)])
+
+    def _append_chunks(self, entries: Iterable[Tuple[int, str, str]]) -> List[Tuple[int, str, int]]:
+        written = []
+        with open(self.chunks_path, "ab") as handle:
+            offset = handle.tell()
+            for row, doc_id, payload in entries:
+                line = f"{row}\t{doc_id}\t{payload}\n".encode("utf-8")
+                handle.write(line)
+                written.append((row, doc_id, offset))
+                offset += len(line)
+            handle.flush()
+            os.fsync(handle.fileno())
+        return written
+
+    def _compact(self) -> None:
+        """
+        Rewrite the collection without deleted rows, swapping the directory in one rename.
+        """
+        live = [row for row in range(self.rows) if self._alive[row]]
+        staging = self.directory.with_name(self.directory.name + ".compact")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        payloads = self._read_payloads(live)
+        with open(staging / VECTORS_FILE, "wb") as handle:
+            handle.write(_npy_header(len(live), self.dimensions))
+            for start in range(0, len(live), _SCORE_BLOCK_ROWS):
+                handle.write(np.ascontiguousarray(self._vectors[live[start:start + _SCORE_BLOCK_ROWS]]).tobytes())
+        with open(staging / CHUNKS_FILE, "wb") as handle:
+            for new_row, row in enumerate(live):
+                handle.write(f"{new_row}\t{self._ids[row]}\t{payloads[row]}\n".encode("utf-8"))
+
+        retired = self.directory.with_name(self.directory.name + ".old")
+        self._vectors = None
+        self._close_reader()
+        os.replace(self.directory, retired)
+        os.replace(staging, self.directory)
+        shutil.rmtree(retired, ignore_errors=True)
+        logger.info("Compacted %s to %d rows.", self.directory.name, len(live))
+        self._generation += 1
+        self._load()
+
+    def _read_payloads(self, rows: Sequence[int]) -> Dict[int, str]:
+        payloads = {}
+        if self._reader is None:
+            self._reader = open(self.chunks_path, "rb")
+        for row in sorted(rows, key=lambda item: self._offsets[item]):
+            self._reader.seek(int(self._offsets[row]))
+            payloads[row] = self._reader.readline().split(b"\t", 2)[2].decode("utf-8").rstrip("\n")
+        return payloads
+
+    def documents(self, rows: Sequence[int]) -> List[Document]:
+        with self._lock:
+            return self._documents(rows)
+
+    def _documents(self, rows: Sequence[int]) -> List[Document]:
+        payloads = self._read_payloads(rows)
+        documents = []
+        for row in rows:
+            payload = json.loads(payloads[row])
+            documents.append(Document(page_content=payload["text"], metadata=payload["metadata"], id=self._ids[row]))
+        return documents
+
+    def all_rows(self) -> List[int]:
+        return [row for row in range(self.rows) if self._alive[row]]
+
+    def rows_matching(self, search_filter: MetadataFilter) -> np.ndarray:
+        """
+        Boolean mask of the rows whose metadata passes ``search_filter``.
+        """
+        with self._lock:
+            if self._columns is None:
+                rows = self.all_rows()
+                payloads = self._read_payloads(rows)
+                columns = MetadataColumns()
+                columns.assign(rows, [json.loads(payloads[row])["metadata"] for row in rows])
+                self._columns = columns
+            return self._columns.mask(search_filter, self.rows)
+
+    def query(
+        self,
+        queries: Sequence[Sequence[float]],
+        k: int,
+        search_filter: Optional[MetadataFilter] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Top-``k`` documents and cosine similarities for each query vector, among the rows
+        passing ``search_filter`` when one is given.
+        """
+        with self._lock:
+            self._searches += 1
+        try:
+            while True:
+                generation = self._generation
+                mask = self.rows_matching(search_filter) if search_filter is not None else None
+                hits = self.search(queries, k, mask)
+                with self._lock:
+                    if generation != self._generation:
+                        continue
+                    return [
+                        list(zip(self._documents([row for row, _ in row_hits]), [score for _, score in row_hits]))
+                        for row_hits in hits
+                    ]
+        finally:
+            with self._lock:
+                self._searches -= 1
+                if self._closing and not self._searches:
+                    self._closing = False
+                    self._close_reader()
+
+    def search(
+        self,
+        queries: Sequence[Sequence[float]],
+        k: int,
+        mask: Optional[np.ndarray] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Top-``k`` rows by cosine similarity for each query vector, scored with one matrix
+        product per block of rows. With a ``mask``, only the selected rows are read and scored.
+        """
+        vectors = self._vectors
+        if vectors is None or not len(vectors):
+            return [[] for _ in queries]
+        selected = self._alive[: len(vectors)]
+        if mask is not None:
+            # Rows appended after the mask was taken are not part of the filtered search.
+            selected = selected & np.pad(mask[: len(vectors)], (0, max(0, len(vectors) - len(mask))))
+        count = int(selected.sum())
+        if not count:
+            return [[] for _ in queries]
+        matrix = _normalize(queries)
+
+        candidates = None
+        if mask is None:
+            scores = np.empty((len(matrix), len(vectors)), dtype=np.float32)
+            for start in range(0, len(vectors), _SCORE_BLOCK_ROWS):
+                block = np.asarray(vectors[start:start + _SCORE_BLOCK_ROWS], dtype=np.float32)
+                scores[:, start:start + len(block)] = matrix @ block.T
+            scores[:, ~selected] = -np.inf
+        else:
+            candidates = np.flatnonzero(selected)
+            scores = np.empty((len(matrix), len(candidates)), dtype=np.float32)
+            for start in range(0, len(candidates), _SCORE_BLOCK_ROWS):
+                block = np.asarray(vectors[candidates[start:start + _SCORE_BLOCK_ROWS]], dtype=np.float32)
+                scores[:, start:start + len(block)] = matrix @ block.T
+
+        k = min(k, count)
+        results = []
+        for row_scores in scores:
+            top = np.argpartition(-row_scores, k - 1)[:k]
+            top = top[np.argsort(-row_scores[top])]
+            rows = top if candidates is None else candidates[top]
+            results.append([(int(row), float(score)) for row, score in zip(rows, row_scores[top])])
+        return results
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    LangChain vector store over a ``NumpyIndex``, so ``as_retriever`` and the rest of the
+    retrieval code work unchanged.
+    """
+
+    def __init__(self, index: NumpyIndex, embedding: Embeddings):
+        self.index = index
+        self._embedding = embedding
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        metadatas = metadatas or [{} for _ in texts]
+        self.index.upsert(ids, texts, metadatas, self._embedding.embed_documents(texts))
+        return ids
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, **kwargs: Any):
+        store = cls(NumpyIndex(Path(kwargs["directory"])), embedding)
+        store.add_texts(texts, metadatas, ids=kwargs.get("ids"))
+        return store
+
+    def similarity_search_by_vectors(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        k: int = 4,
+        search_filter: Optional[MetadataFilter] = None,
+    ) -> List[List[Document]]:
+        return [[doc for doc, _ in hits] for hits in self.index.query(embeddings, k, search_filter)]
+
+    def similarity_search_by_vectors_with_scores(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        k: int = 4,
+        search_filter: Optional[MetadataFilter] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        return self.index.query(embeddings, k, search_filter)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vectors([embedding], k)[0]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self._embedding.embed_query(query), k)
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.index.query([self._embedding.embed_query(query)], k)[0]
+
+    def _select_relevance_score_fn(self):
+        # Scores are cosine similarities already.
+        return lambda score: score
+
+
+class NumpyVectorStoreManager(VectorStoreManager):
+    """
+    ``VectorStoreManager`` that keeps each collection in a ``NumpyIndex`` under
+    ``<persist_directory>/numpy/<collection>`` instead of Chroma. Opening a collection maps the
+    vector file and reads ids from the sidecar, and the mapped pages live in the OS page cache,
+    so worker processes serving the same collection share one copy.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.index_dir = Path(self.persist_directory) / "numpy"
+
+    def _get_client(self):
+        with self._client_lock:
+            if self._client is None:
+                started = time.perf_counter()
+                self.index_dir.mkdir(parents=True, exist_ok=True)
+                for staging in self.index_dir.glob("*.compact"):
+                    # A compaction stopped before its swap; the original directory is still complete.
+                    shutil.rmtree(staging, ignore_errors=True)
+                for retired in self.index_dir.glob("*.old"):
+                    target = retired.with_suffix("")
+                    if target.exists():
+                        shutil.rmtree(retired, ignore_errors=True)
+                    else:
+                        os.replace(retired, target)
+                self._client = self.index_dir
+                self.client_load_seconds = time.perf_counter() - started
+            return self._client
+
+    def _create_collection(self, collection_name: str) -> NumpyVectorStore:
+        return NumpyVectorStore(NumpyIndex(self._get_client() / collection_name), self.embeddings)
+
+    async def collection_exists(self, collection_name: str) -> bool:
+        store = self._stores.get(collection_name)
+        if store is not None:
+            return store.index.count > 0
+        directory = self._get_client() / collection_name
+        if not NumpyIndex.exists(directory):
+            return False
+        store = await self._get_store(collection_name)
+        return store.index.count > 0
+
+    def reload_collection(self, collection_name: str) -> bool:
+        """
+        Drop the open index so the next access re-reads it from disk; other collections are unaffected.
+        """
+        with self._client_lock:
+            store = self._stores.pop(collection_name, None)
+            self._versions.pop(collection_name, None)
+            if store is not None and store is self.vector_store:
+                self.vector_store = None
+        if store is not None:
+            store.index.close()
+        return False
+
+    def release_collection(self, collection_name: str) -> None:
+        # Unlike a Chroma client, nothing of a released index stays loaded, so reopening it reads the latest version.
+        with self._client_lock:
+            store = self._stores.get(collection_name)
+            super().release_collection(collection_name)
+            if collection_name in self._stores:
+                return
+            self._versions.pop(collection_name, None)
+        if store is not None:
+            store.index.close()
+
+    def close(self) -> None:
+        """
+        Close every open index; collections are reopened on next use.
+        """
+        with self._client_lock:
+            stores = list(self._stores.values())
+            self._stores.clear()
+            self._versions.clear()
+            self.vector_store = None
+        for store in stores:
+            store.index.close()
+
+    async def count_documents(self, collection_name: Optional[str] = None) -> int:
+        store = await self._get_store(collection_name)
+        return store.index.count
+
+    async def get_document_ids(self, collection_name: Optional[str] = None) -> List[str]:
+        store = await self._get_store(collection_name)
+        return store.index.ids()
+
+    async def get_all_documents(
+        self,
+        collection_name: Optional[str] = None,
+    ) -> Tuple[List[str], List[str], List[Dict[str, Any]]]:
+        store = await self._get_store(collection_name)
+        documents = await asyncio.to_thread(lambda: store.index.documents(store.index.all_rows()))
+        return [doc.id for doc in documents], [doc.page_content for doc in documents], [doc.metadata for doc in documents]
+
+    async def delete_documents(self, ids: Sequence[str], collection_name: Optional[str] = None) -> None:
+        store = await self._get_store(collection_name)
+        if not ids:
+            return
+        deleted = await asyncio.to_thread(store.index.delete, list(ids))
+        logger.info("Deleted %d stale documents from the vector store.", deleted)
+
+    async def upsert_embeddings(
+        self,
+        ids: Sequence[str],
+        documents,
+        vectors: Sequence[Sequence[float]],
+        collection_name: Optional[str] = None,
+    ) -> None:
+        store = await self._get_store(collection_name)
+        await asyncio.to_thread(
+            store.index.upsert,
+            list(ids),
+            [doc.page_content for doc in documents],
+            [doc.metadata for doc in documents],
+            vectors,
+        )
+
+    async def clean_database(self) -> None:
+        logger.info("Cleaning vector store at %s", self.index_dir)
+
+        def _drop_collections() -> int:
+            with self._client_lock:
+                directories = [path for path in self.index_dir.iterdir() if path.is_dir()] if self.index_dir.exists() else []
+                for store in self._stores.values():
+                    store.index.close()
+                for directory in directories:
+                    shutil.rmtree(directory, ignore_errors=True)
+                self._stores.clear()
+                self._versions.clear()
+                return len(directories)
+
+        dropped = await asyncio.to_thread(_drop_collections)
+        self.vector_store = None
+        logger.info("Finished cleaning vector store; dropped %d collections.", dropped)
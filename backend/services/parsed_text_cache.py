@@ -0,0 +1,193 @@
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from backend.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+FORMAT_VERSION = 1
+MAGIC = b"PQATEXT1"
+# The file ends with the header's offset and the magic, so pages can be written as they are parsed.
+_FOOTER = struct.Struct("<Q8s")
+# Stands in for the on-disk path in cached metadata; replaced by the current path on read.
+_PATH = "\0path"
+_PATH_KEYS = ("source", "file_path")
+
+
+class ParsedPages:
+    """
+    Read access to one cached file. The page texts stay in a memory map and are decompressed
+    one page at a time as they are iterated.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            header_offset, magic = _FOOTER.unpack_from(self._map, len(self._map) - _FOOTER.size)
+            if magic != MAGIC:
+                raise ValueError(f"{path.name} is not a parsed text cache file.")
+            header = json.loads(zlib.decompress(self._map[header_offset : len(self._map) - _FOOTER.size]))
+            if header.get("format") != FORMAT_VERSION:
+                raise ValueError(f"{path.name} has unsupported format {header.get('format')}.")
+        except Exception:
+            self._map.close()
+            raise
+        self.parser_version: str = header["parser"]
+        self._metadata: Dict[str, Any] = header["metadata"]
+        self._pages: List[Tuple[int, int, Dict[str, Any]]] = header["pages"]
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pages)
+
+    def pages(self, file_path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Yield ``(text, metadata)`` per page in parse order, with path metadata pointing at ``file_path``.
+        """
+        for offset, length, extra in self._pages:
+            text = zlib.decompress(self._map[offset : offset + length]).decode("utf-8", "surrogatepass")
+            metadata = {**self._metadata, **extra}
+            for key in _PATH_KEYS:
+                if metadata.get(key) == _PATH:
+                    metadata[key] = file_path
+            yield text, metadata
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self) -> "ParsedPages":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class ParsedTextWriter:
+    """
+    Collects a file's pages as they are parsed and publishes them to the cache on ``commit``;
+    a parse that stops early is discarded.
+    """
+
+    def __init__(self, cache: "ParsedTextCache", path: Path, parser_version: str, file_path: str, level: int):
+        self.cache = cache
+        self.path = path
+        self.parser_version = parser_version
+        self.file_path = file_path
+        self.level = level
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handle, self._tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".part")
+        self._handle = os.fdopen(handle, "wb")
+        self._offset = 0
+        self._pages: List[Tuple[int, int, Dict[str, Any]]] = []
+
+    def add(self, text: str, metadata: Dict[str, Any]) -> None:
+        metadata = dict(metadata)
+        for key in _PATH_KEYS:
+            if metadata.get(key) == self.file_path:
+                metadata[key] = _PATH
+        block = zlib.compress(text.encode("utf-8", "surrogatepass"), self.level)
+        self._handle.write(block)
+        self._pages.append((self._offset, len(block), metadata))
+        self._offset += len(block)
+
+    def commit(self) -> None:
+        # Metadata shared by every page (document properties) is stored once.
+        shared: Dict[str, Any] = dict(self._pages[0][2]) if self._pages else {}
+        for _, _, metadata in self._pages[1:]:
+            shared = {key: value for key, value in shared.items() if key in metadata and metadata[key] == value}
+        header = {
+            "format": FORMAT_VERSION,
+            "parser": self.parser_version,
+            "metadata": shared,
+            "pages": [
+                (offset, length, {key: value for key, value in metadata.items() if key not in shared})
+                for offset, length, metadata in self._pages
+            ],
+        }
+        try:
+            self._handle.write(zlib.compress(json.dumps(header, default=str).encode("utf-8"), self.level))
+            self._handle.write(_FOOTER.pack(self._offset, MAGIC))
+            self._handle.close()
+            os.replace(self._tmp_name, self.path)
+        except Exception:
+            self.discard()
+            raise
+        logger.info("Cached %d parsed pages of %s (%d bytes).", len(self._pages), self.file_path, self.path.stat().st_size)
+        self.cache.evict(keep=self.path)
+
+    def discard(self) -> None:
+        self._handle.close()
+        if os.path.exists(self._tmp_name):
+            os.remove(self._tmp_name)
+
+
+class ParsedTextCache:
+    """
+    On-disk cache of each file's extracted page texts and metadata, so re-chunking or
+    re-ingesting a file skips parsing it.
+
+    Entries are keyed by the file's content hash and the parser version and stored as one
+    file per document: zlib-compressed page texts followed by a compressed JSON header, read
+    back through a memory map. Once the cache exceeds ``max_bytes`` the least recently read
+    entries are evicted.
+    """
+
+    def __init__(self, cache_dir: Union[Path, str], max_bytes: int = 1024 * 1024 * 1024, compression_level: int = 6):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.compression_level = compression_level
+        self.hits = 0
+        self.misses = 0
+        self._evict_lock = threading.Lock()
+
+    def path_for(self, file_hash: str, parser_version: str) -> Path:
+        safe_version = "".join(char if char.isalnum() or char in ".-" else "_" for char in parser_version)
+        return self.cache_dir / file_hash[:2] / f"{file_hash}-{safe_version}.pages"
+
+    def open(self, file_hash: str, parser_version: str) -> Optional[ParsedPages]:
+        path = self.path_for(file_hash, parser_version)
+        if not path.exists():
+            self.misses += 1
+            return None
+        try:
+            pages = ParsedPages(path)
+        except Exception:
+            logger.exception("Discarding unreadable parsed text cache entry %s.", path)
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        # The modification time doubles as the last use for eviction.
+        os.utime(path)
+        self.hits += 1
+        return pages
+
+    def writer(self, file_hash: str, parser_version: str, file_path: str) -> ParsedTextWriter:
+        return ParsedTextWriter(self, self.path_for(file_hash, parser_version), parser_version, file_path, self.compression_level)
+
+    def evict(self, keep: Optional[Path] = None) -> None:
+        with self._evict_lock:
+            entries = []
+            for path in self.cache_dir.glob("*/*.pages"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                path.unlink(missing_ok=True)
+                total -= size
+                logger.info("Evicted parsed text cache entry %s.", path.name)
@@ -0,0 +1,212 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from backend.services.hybrid_retriever import HybridRetriever
+from backend.services.ingest_manifest import IngestManifest
+from backend.services.interface.vector_store import VectorStoreInterface
+from backend.services.lexical_index import BM25Index, LexicalIndexStore
+from backend.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Rough per-chunk cost of a loaded HNSW entry beyond the raw vector (graph links, ids, metadata).
+_VECTOR_OVERHEAD_BYTES = 256
+
+
+@dataclass
+class PipelineEntry:
+    collection_name: str
+    retriever: Any
+    estimated_bytes: int
+    version: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+def estimate_lexical_bytes(index: BM25Index) -> int:
+    text_bytes = sum(len(text) for text in index.texts)
+    posting_bytes = sum(len(entries) for entries in index.postings.values()) * 16
+    return text_bytes + posting_bytes + len(index.doc_ids) * 64
+
+
+class PipelineRegistry:
+    """
+    Retrievers keyed by collection, built lazily from the persisted Chroma data and BM25 indexes.
+
+    Entries are kept in LRU order and evicted when there are more than ``max_entries``, when their
+    estimated memory exceeds ``memory_budget_bytes``, or after ``idle_ttl_seconds`` without a query.
+    The pinned collection (the one ``/ask`` uses by default) is never evicted.
+
+    With a ``manifest``, each entry remembers the collection version it was built from; when
+    another worker changes the collection, the next ``get`` reopens it from disk and rebuilds.
+    """
+
+    def __init__(
+        self,
+        vector_store_manager: VectorStoreInterface,
+        lexical_indexes: Optional[LexicalIndexStore] = None,
+        retrieval_k: int = 6,
+        hybrid_fetch_k: int = 20,
+        rrf_k: int = 60,
+        max_entries: int = 32,
+        memory_budget_bytes: int = 2 * 1024 * 1024 * 1024,
+        idle_ttl_seconds: float = 1800,
+        manifest: Optional[IngestManifest] = None,
+    ):
+        self.vector_store_manager = vector_store_manager
+        self.manifest = manifest
+        self.lexical_indexes = lexical_indexes
+        self.retrieval_k = retrieval_k
+        self.hybrid_fetch_k = hybrid_fetch_k
+        self.rrf_k = rrf_k
+        self.max_entries = max(1, max_entries)
+        self.memory_budget_bytes = memory_budget_bytes
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.pinned: Optional[str] = None
+        self._entries: "OrderedDict[str, PipelineEntry]" = OrderedDict()
+        self._build_locks: Dict[str, asyncio.Lock] = {}
+        self._dimensions: Optional[int] = None
+
+    async def build_retriever(self, collection_name: str):
+        """
+        Vector retriever for the collection, fused with its BM25 index when hybrid retrieval is enabled.
+        """
+        lexical_index = None
+        if self.lexical_indexes is not None:
+            lexical_index = await asyncio.to_thread(self.lexical_indexes.get, collection_name)
+        if lexical_index is None:
+            return await self.vector_store_manager.get_retriever(
+                k_value=self.retrieval_k,
+                collection_name=collection_name,
+            )
+
+        vector_retriever = await self.vector_store_manager.get_retriever(
+            k_value=max(self.retrieval_k, self.hybrid_fetch_k),
+            collection_name=collection_name,
+        )
+        return HybridRetriever(
+            vector_retriever=vector_retriever,
+            lexical_index=lexical_index,
+            k=self.retrieval_k,
+            fetch_k=self.hybrid_fetch_k,
+            rrf_k=self.rrf_k,
+        )
+
+    async def get(self, collection_name: str) -> Optional[Any]:
+        """
+        Return the retriever for ``collection_name``, building it on first use.
+        Returns None when the collection has no stored chunks.
+        """
+        self._expire_idle()
+        entry = self._touch(collection_name)
+        if entry is not None and entry.version == self._version(collection_name):
+            return entry.retriever
+
+        lock = self._build_locks.setdefault(collection_name, asyncio.Lock())
+        async with lock:
+            entry = self._touch(collection_name)
+            if entry is not None:
+                if entry.version == self._version(collection_name):
+                    return entry.retriever
+                self.reload(collection_name)
+            if not await self.vector_store_manager.collection_exists(collection_name):
+                return None
+            return await self._build(collection_name)
+
+    async def refresh(self, collection_name: str) -> Any:
+        """
+        Rebuild the retriever after the collection's contents changed.
+        """
+        lock = self._build_locks.setdefault(collection_name, asyncio.Lock())
+        async with lock:
+            return await self._build(collection_name)
+
+    def pin(self, collection_name: str) -> None:
+        self.pinned = collection_name
+
+    def invalidate(self, collection_name: str) -> None:
+        if collection_name in self._entries:
+            self._release(collection_name)
+
+    def _version(self, collection_name: str) -> int:
+        return self.manifest.version(collection_name) if self.manifest is not None else 0
+
+    def reload(self, collection_name: str) -> None:
+        """
+        Drop everything cached for a collection another worker changed, so it is read again from disk.
+        """
+        logger.info("Collection '%s' was changed by another worker; reloading it.", collection_name)
+        self._release(collection_name)
+        if self.vector_store_manager.reload_collection(collection_name):
+            # Every store was reopened, so the other cached retrievers point at closed stores.
+            for name in list(self._entries):
+                self._entries.pop(name)
+                self.vector_store_manager.release_collection(name)
+
+    def loaded(self) -> List[str]:
+        return list(self._entries.keys())
+
+    @property
+    def estimated_bytes(self) -> int:
+        return sum(entry.estimated_bytes for entry in self._entries.values())
+
+    async def _build(self, collection_name: str) -> Any:
+        started = time.perf_counter()
+        # Read first, so a change landing during the build is picked up by the next ``get``.
+        version = self._version(collection_name)
+        retriever = await self.build_retriever(collection_name)
+        estimated_bytes = await self._estimate_bytes(collection_name, retriever)
+        self._entries[collection_name] = PipelineEntry(
+            collection_name=collection_name,
+            retriever=retriever,
+            estimated_bytes=estimated_bytes,
+            version=version,
+        )
+        self._entries.move_to_end(collection_name)
+        logger.info(
+            "Loaded retriever for collection '%s' in %.3fs (~%d bytes).",
+            collection_name,
+            time.perf_counter() - started,
+            estimated_bytes,
+        )
+        self._evict()
+        return retriever
+
+    async def _estimate_bytes(self, collection_name: str, retriever: Any) -> int:
+        chunks = await self.vector_store_manager.count_documents(collection_name=collection_name)
+        if self._dimensions is None:
+            probe = await asyncio.to_thread(self.vector_store_manager.embeddings.embed_query, "dimension probe")
+            self._dimensions = len(probe)
+        estimate = chunks * (self._dimensions * 4 + _VECTOR_OVERHEAD_BYTES)
+        if isinstance(retriever, HybridRetriever):
+            estimate += estimate_lexical_bytes(retriever.lexical_index)
+        return estimate
+
+    def _touch(self, collection_name: str) -> Optional[PipelineEntry]:
+        entry = self._entries.get(collection_name)
+        if entry is not None:
+            entry.last_used = time.monotonic()
+            self._entries.move_to_end(collection_name)
+        return entry
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries or self.estimated_bytes > self.memory_budget_bytes:
+            victim = next((name for name in self._entries if name != self.pinned), None)
+            if victim is None:
+                break
+            logger.info("Evicting retriever for collection '%s' (LRU).", victim)
+            self._release(victim)
+
+    def _expire_idle(self) -> None:
+        cutoff = time.monotonic() - self.idle_ttl_seconds
+        for name in [name for name, entry in self._entries.items() if entry.last_used < cutoff and name != self.pinned]:
+            logger.info("Evicting idle retriever for collection '%s'.", name)
+            self._release(name)
+
+    def _release(self, collection_name: str) -> None:
+        self._entries.pop(collection_name, None)
+        if self.lexical_indexes is not None:
+            self.lexical_indexes.unload(collection_name)
+        self.vector_store_manager.release_collection(collection_name)
@@ -1,38 +1,462 @@
-from typing import Optional
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, TypeVar
 
+import httpx
 from fastapi import HTTPException
-from langchain.chains import RetrievalQA
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 
 from backend.core.config import settings
+from backend.services.answer_cache import SemanticAnswerCache
+from backend.services.context_packer import ContextPacker, estimate_tokens
+from backend.services.hybrid_retriever import batch_retrieve, scoped_retrieve
+from backend.services.ingest_manifest import IngestManifest
 from backend.services.interface.qa import QAPipelineInterface
-from backend.system_prompts.prompt_v1 import QA_PROMPT
+from backend.services.llm_scheduler import PRIORITY_BATCH, PRIORITY_INTERACTIVE, LLMScheduler
+from backend.services.pipeline_registry import PipelineRegistry
+from backend.services.reranker import CrossEncoderReranker
+from backend.services.search_scope import SearchScope
+from backend.system_prompts import prompt_v1
+from backend.utils.concurrency import SingleFlight
 from backend.utils.groq_client import get_groq_chat
 from backend.utils.logging_config import get_logger
+from backend.utils.metrics import ASK_STAGE_SECONDS, LLM_SECONDS, LLM_TIME_TO_FIRST_TOKEN_SECONDS, PROMPT_TOKENS
 
 logger = get_logger(__name__)
 
+T = TypeVar("T")
+
+
+def normalize_question(question: str) -> str:
+    """
+    Case, spacing and trailing punctuation do not change what is asked.
+    """
+    return " ".join(question.lower().split()).rstrip("?!. ")
+
+
+def prompt_token_count(prompt: str, usage_metadata: Optional[Dict[str, Any]] = None) -> int:
+    if usage_metadata and usage_metadata.get("input_tokens"):
+        return int(usage_metadata["input_tokens"])
+    return estimate_tokens(prompt)
+
+
+@dataclass
+class BatchAnswer:
+    query: str
+    answer: Optional[str] = None
+    cached: bool = False
+    error: Optional[str] = None
+
+
+@dataclass
+class QuestionAnswer:
+    answer: str
+    cached: bool = False
+    coalesced: bool = False
+
 
 class QAPipelineManager(QAPipelineInterface):
-    def __init__(self, api_key: Optional[str] = None, model_name: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model_name: Optional[str] = None,
+        embeddings: Optional[Embeddings] = None,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        http_async_client: Optional[httpx.AsyncClient] = None,
+        pipeline_registry: Optional[PipelineRegistry] = None,
+        context_packer: Optional[ContextPacker] = None,
+        reranker: Optional[CrossEncoderReranker] = None,
+        retrieval_k: int = 6,
+        manifest: Optional[IngestManifest] = None,
+        single_flight: Optional[SingleFlight] = None,
+        llm_scheduler: Optional[LLMScheduler] = None,
+        max_retries: int = 3,
+    ):
         self.api_key = api_key or settings.groq_api_key
         self.model_name = model_name or settings.default_model
+        self.embeddings = embeddings
+        self.answer_cache = answer_cache
+        self.pipeline_registry = pipeline_registry
+        self.context_packer = context_packer
+        self.reranker = reranker
+        self.retrieval_k = retrieval_k
+        self.manifest = manifest
+        self.single_flight = single_flight
+        self.llm_scheduler = llm_scheduler
+        self.max_retries = max_retries
+        self._answer_versions: Dict[str, int] = {}
+        self.http_async_client = http_async_client
+        self._chat = None
+        self.chat_load_seconds: Optional[float] = None
+        self.retriever = None
+        self.collection_name: Optional[str] = None
+
+    @property
+    def chat(self):
+        """
+        The ChatGroq client, created on first use.
+        """
+        if self._chat is None:
+            started = time.perf_counter()
+            try:
+                self._chat = get_groq_chat(
+                    model_name=self.model_name,
+                    api_key=self.api_key,
+                    max_retries=self.max_retries,
+                    http_async_client=self.http_async_client,
+                )
+            except Exception as exc:
+                logger.exception("Failed to create ChatGroq client.")
+                raise HTTPException(status_code=500, detail=str(exc))
+            self.chat_load_seconds = time.perf_counter() - started
+        return self._chat
+
+    @chat.setter
+    def chat(self, chat) -> None:
+        # Lets benchmarks and local runs substitute another chat model (for example a deterministic fake).
+        self._chat = chat
+
+    @property
+    def chat_ready(self) -> bool:
+        return self._chat is not None
+
+    def create_pipeline(self, retriever, collection_name: Optional[str] = None):
+        """
+        Make ``collection_name`` the one questions go to by default. Prompts are built and the
+        chat model is called per question, so nothing else is set up here and the chat client
+        stays unloaded until the first question.
+        """
+        logger.info("Using collection '%s' for questions.", collection_name)
+        self.retriever = retriever
+        self.collection_name = collection_name
+
+    @property
+    def active_collection(self) -> Optional[str]:
+        """
+        The collection questions go to by default: the file most recently processed by any
+        worker sharing the manifest, else by this process.
+        """
+        if self.manifest is not None:
+            active = self.manifest.active()
+            if active is not None:
+                return active
+        return self.collection_name
+
+    async def get_retriever(self, collection_name: Optional[str] = None):
+        """
+        Retriever for ``collection_name``, or for the most recently processed file when no
+        collection is given. Retrievers are served from the pipeline registry, which builds
+        them from the persisted collection when this worker has not loaded it yet.
+        """
+        active = self.active_collection
+        collection_name = collection_name or active
+        if collection_name is None:
+            raise HTTPException(status_code=500, detail="QA pipeline not initialized. Please process a file first.")
+        if self.pipeline_registry is None:
+            if collection_name != self.collection_name or self.retriever is None:
+                raise HTTPException(status_code=404, detail=f"Collection '{collection_name}' not found.")
+            return self.retriever
+
+        retriever = await self.pipeline_registry.get(collection_name)
+        if retriever is None:
+            raise HTTPException(status_code=404, detail=f"Collection '{collection_name}' not found.")
+        if collection_name == active:
+            self.pipeline_registry.pin(collection_name)
+        return retriever
+
+    async def get_scope_retrievers(self, scope: SearchScope) -> List[Any]:
+        return [await self.get_retriever(name) for name in scope.collections]
+
+    async def aretrieve(
+        self,
+        question: str,
+        embedding: Optional[Sequence[float]] = None,
+        collection_name: Optional[str] = None,
+        scope: Optional[SearchScope] = None,
+    ) -> List[Document]:
+        """
+        Retrieve context for a question. When the question was already embedded for the
+        answer cache, that vector is reused instead of embedding the question again.
+        With a ``scope``, its collections are searched together under its metadata filter.
+        """
+        if scope is not None:
+            retrievers = await self.get_scope_retrievers(scope)
+            if embedding is None:
+                embedding = await asyncio.to_thread(self._require_embeddings().embed_query, question)
+            with ASK_STAGE_SECONDS.time(stage="retrieve", **self._metric_labels(collection_name)):
+                documents = (
+                    await asyncio.to_thread(scoped_retrieve, retrievers, [question], [embedding], scope.search_filter)
+                )[0]
+            return await self.arerank(question, documents, collection_name)
+
+        retriever = await self.get_retriever(collection_name)
+        with ASK_STAGE_SECONDS.time(stage="retrieve", **self._metric_labels(collection_name)):
+            if embedding is not None:
+                documents = (await asyncio.to_thread(batch_retrieve, retriever, [question], [embedding]))[0]
+            else:
+                documents = await retriever.ainvoke(question)
+        return await self.arerank(question, documents, collection_name)
+
+    def _require_embeddings(self) -> Embeddings:
+        if self.embeddings is None:
+            raise HTTPException(status_code=500, detail="Scoped search needs the embedding model.")
+        return self.embeddings
+
+    async def arerank(
+        self,
+        question: str,
+        documents: List[Document],
+        collection_name: Optional[str] = None,
+    ) -> List[Document]:
+        """
+        Keep the ``retrieval_k`` candidates the cross-encoder scores highest; a no-op without a reranker.
+        """
+        if self.reranker is None:
+            return documents
+        with ASK_STAGE_SECONDS.time(stage="rerank", **self._metric_labels(collection_name)):
+            return await asyncio.to_thread(self.reranker.rerank, question, documents, self.retrieval_k)
+
+    def _metric_labels(self, collection_name: Optional[str]) -> Dict[str, str]:
+        return {"collection": collection_name or self.active_collection or "", "model": self.model_name}
+
+    def build_prompt(self, question: str, documents: List[Document], collection_name: Optional[str] = None) -> str:
+        # Every answer path builds its prompt here, so streamed, blocking and batch answers see the same prompt.
+        # With a context packer, overlapping and near-duplicate chunks are merged or dropped first.
+        with ASK_STAGE_SECONDS.time(stage="prompt_assembly", **self._metric_labels(collection_name)):
+            if self.context_packer is not None:
+                documents = self.context_packer.pack(documents)
+            context = "\n\n".join(doc.page_content for doc in documents)
+            return prompt_v1.QA_PROMPT_TEMPLATE.format(context=context, question=question)
 
+    async def agenerate(
+        self, prompt: str, collection_name: Optional[str] = None, priority: int = PRIORITY_INTERACTIVE
+    ) -> str:
+        labels = self._metric_labels(collection_name)
+        with LLM_SECONDS.time(**labels):
+            if self.llm_scheduler is None:
+                message = await self.chat.ainvoke(prompt)
+            else:
+                message = await self.llm_scheduler.ainvoke(self.chat, prompt, priority)
+        PROMPT_TOKENS.inc(prompt_token_count(prompt, getattr(message, "usage_metadata", None)), **labels)
+        return message.content if isinstance(message.content, str) else str(message.content)
+
+    async def aanswer(
+        self,
+        question: str,
+        embedding: Optional[Sequence[float]] = None,
+        collection_name: Optional[str] = None,
+        scope: Optional[SearchScope] = None,
+    ) -> str:
+        """
+        Answer a question on the event loop using the chat model's async API.
+        """
+        documents = await self.aretrieve(question, embedding, collection_name, scope)
+        return await self.agenerate(self.build_prompt(question, documents, collection_name), collection_name)
+
+    def question_key(
+        self, question: str, collection_name: Optional[str], scope: Optional[SearchScope] = None
+    ) -> Tuple[Hashable, ...]:
+        if scope is not None:
+            return (tuple(scope.collections), scope.search_filter, normalize_question(question))
+        return (collection_name or self.active_collection, None, normalize_question(question))
+
+    async def _coalesce(self, key: Hashable, compute: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Run ``compute`` unless an identical call is already in flight, in which case wait for
+        its result instead. Also reports whether the result was shared.
+        """
+        if self.single_flight is None:
+            return await compute(), False
+        joined = self.single_flight.in_flight(key)
+        return await self.single_flight.run(key, compute), joined
+
+    async def aask(
+        self,
+        question: str,
+        collection_name: Optional[str] = None,
+        scope: Optional[SearchScope] = None,
+    ) -> QuestionAnswer:
+        """
+        Answer a question from the answer cache when possible, otherwise retrieve, generate and
+        remember the answer. Identical questions (same collection or scope, same normalized
+        text) arriving while one is being answered wait for that answer instead.
+        """
+
+        async def compute() -> QuestionAnswer:
+            if scope is not None:
+                # Cached answers are per collection, so scoped questions skip the answer cache.
+                return QuestionAnswer(answer=await self.aanswer(question, None, collection_name, scope))
+            await self.get_retriever(collection_name)
+            embedding = await self.embed_question(question, collection_name)
+            cached_answer = self.lookup_answer(collection_name, embedding)
+            if cached_answer is not None:
+                return QuestionAnswer(answer=cached_answer, cached=True)
+            answer = await self.aanswer(question, embedding, collection_name)
+            self.remember_answer(collection_name, question, embedding, answer)
+            return QuestionAnswer(answer=answer)
+
+        key = ("ask",) + self.question_key(question, collection_name, scope)
+        result, coalesced = await self._coalesce(key, compute)
+        return QuestionAnswer(answer=result.answer, cached=result.cached, coalesced=coalesced)
+
+    async def astream_answer(self, prompt: str, collection_name: Optional[str] = None) -> AsyncIterator[str]:
+        labels = self._metric_labels(collection_name)
+        usage_metadata = None
+        first_token = True
+        with LLM_SECONDS.time(**labels):
+            started = time.perf_counter()
+            if self.llm_scheduler is None:
+                chunks = self.chat.astream(prompt)
+            else:
+                chunks = self.llm_scheduler.astream(self.chat, prompt, PRIORITY_INTERACTIVE)
+            async for chunk in chunks:
+                usage_metadata = getattr(chunk, "usage_metadata", None) or usage_metadata
+                if chunk.content:
+                    if first_token:
+                        LLM_TIME_TO_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - started, **labels)
+                        first_token = False
+                    yield chunk.content
+        PROMPT_TOKENS.inc(prompt_token_count(prompt, usage_metadata), **labels)
+
+    async def embed_question(self, question: str, collection_name: Optional[str] = None) -> Optional[List[float]]:
+        """
+        Embed the question for answer-cache lookups; returns None when caching is disabled.
+        """
+        if self.answer_cache is None or self.embeddings is None:
+            return None
+        with ASK_STAGE_SECONDS.time(stage="embed_question", **self._metric_labels(collection_name)):
+            return await asyncio.to_thread(self.embeddings.embed_query, question)
+
+    def _sync_answers(self, collection_name: str) -> None:
+        """
+        Drop cached answers for a collection that another worker has re-ingested since.
+        """
+        if self.manifest is None:
+            return
+        version = self.manifest.version(collection_name)
+        if self._answer_versions.setdefault(collection_name, version) != version:
+            self.invalidate_answers(collection_name)
+            self._answer_versions[collection_name] = version
+
+    def lookup_answer(self, collection_name: Optional[str], embedding: Optional[Sequence[float]]) -> Optional[str]:
+        if embedding is None or self.answer_cache is None or collection_name is None:
+            return None
+        self._sync_answers(collection_name)
+        cached = self.answer_cache.lookup(collection_name, embedding)
+        return cached.answer if cached else None
+
+    def remember_answer(
+        self,
+        collection_name: Optional[str],
+        question: str,
+        embedding: Optional[Sequence[float]],
+        answer: str,
+    ) -> None:
+        if embedding is None or self.answer_cache is None or collection_name is None:
+            return
+        self._sync_answers(collection_name)
+        self.answer_cache.store(collection_name, question, embedding, answer)
+
+    def invalidate_answers(self, collection_name: str) -> None:
+        if self.answer_cache is not None:
+            self.answer_cache.invalidate(collection_name)
+
+    async def aanswer_batch(
+        self,
+        questions: Sequence[str],
+        concurrency: int = 8,
+        collection_name: Optional[str] = None,
+        scope: Optional[SearchScope] = None,
+    ) -> List[BatchAnswer]:
+        """
+        Answer many questions against one collection (the active one by default), or across a
+        ``scope``. Questions are embedded in one model call and searched together; LLM calls
+        then run concurrently, at most ``concurrency`` at a time. Results keep the input order
+        and failures are reported per question instead of failing the whole batch.
+        """
+        if scope is not None:
+            retrievers = await self.get_scope_retrievers(scope)
+            self._require_embeddings()
+            collection_name = collection_name or scope.label
+        else:
+            retriever = await self.get_retriever(collection_name)
+            collection_name = collection_name or self.active_collection
+        # Cached answers are per collection, so scoped questions neither use nor fill the cache.
+        cache_key = None if scope is not None else collection_name
+        questions = list(questions)
+        results = [BatchAnswer(query=question) for question in questions]
+        if not questions:
+            return results
+
+        embeddings: List[Optional[List[float]]] = [None] * len(questions)
+        if self.embeddings is not None:
+            embed_many = getattr(self.embeddings, "embed_queries", self.embeddings.embed_documents)
+            embeddings = await asyncio.to_thread(embed_many, questions)
+
+        pending = []
+        for position, embedding in enumerate(embeddings):
+            cached_answer = self.lookup_answer(cache_key, embedding)
+            if cached_answer is not None:
+                results[position].answer = cached_answer
+                results[position].cached = True
+            else:
+                pending.append(position)
+        if not pending:
+            return results
+
+        pending_questions = [questions[position] for position in pending]
         try:
-            self.chat = get_groq_chat(model_name=self.model_name, api_key=self.api_key)
+            if scope is not None:
+                pending_embeddings = [embeddings[position] for position in pending]
+                contexts = await asyncio.to_thread(
+                    scoped_retrieve, retrievers, pending_questions, pending_embeddings, scope.search_filter
+                )
+            elif self.embeddings is not None:
+                pending_embeddings = [embeddings[position] for position in pending]
+                contexts = await asyncio.to_thread(batch_retrieve, retriever, pending_questions, pending_embeddings)
+            else:
+                contexts = await asyncio.gather(*(retriever.ainvoke(question) for question in pending_questions))
         except Exception as exc:
-            logger.exception("Failed to create ChatGroq client.")
-            raise HTTPException(status_code=500, detail=str(exc))
-        self.qa_pipeline = None
-
-    def create_pipeline(self, retriever):
-        logger.info("Creating QA retrieval pipeline.")
-        self.qa_pipeline = RetrievalQA.from_chain_type(
-            llm=self.chat,
-            retriever=retriever,
-            chain_type_kwargs={"prompt": QA_PROMPT},
-        )
-        logger.info("QA retrieval pipeline initialized successfully.")
+            logger.exception("Batch retrieval failed for %d questions.", len(pending))
+            for position in pending:
+                results[position].error = f"Retrieval failed: {exc}"
+            return results
+
+        if self.reranker is not None:
+            contexts = await asyncio.gather(
+                *(
+                    self.arerank(question, documents, collection_name)
+                    for question, documents in zip(pending_questions, contexts)
+                )
+            )
 
-    def get_pipeline(self):
-        logger.info("Returning QA pipeline (initialized=%s)", self.qa_pipeline is not None)
-        return self.qa_pipeline
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def answer_one(position: int, documents: List[Document]) -> None:
+            question = questions[position]
+
+            async def generate() -> str:
+                async with semaphore:
+                    prompt = self.build_prompt(question, documents, collection_name)
+                    return await self.agenerate(prompt, collection_name, PRIORITY_BATCH)
+
+            try:
+                # Repeats of a question, in this batch or a concurrent one, share one LLM call.
+                key = ("generate",) + self.question_key(question, collection_name, scope)
+                answer, _ = await self._coalesce(key, generate)
+                results[position].answer = answer
+                self.remember_answer(cache_key, question, embeddings[position], answer)
+            except Exception as exc:
+                logger.warning("Batch question %d failed: %s", position, exc)
+                results[position].error = str(exc)
+
+        await asyncio.gather(*(answer_one(position, documents) for position, documents in zip(pending, contexts)))
+        logger.info(
+            "Answered batch of %d questions (%d cached, %d failed).",
+            len(questions),
+            sum(result.cached for result in results),
+            sum(result.error is not None for result in results),
+        )
+        return results
@@ -0,0 +1,105 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from backend.utils.logging_config import get_logger
+from backend.utils.metrics import RERANK_PAIRS
+
+logger = get_logger(__name__)
+
+
+class CrossEncoderReranker:
+    """
+    Reorders retrieval candidates by a cross-encoder's relevance score for the question.
+
+    The model runs on CPU and is loaded on first use. Scores are cached per (question, chunk
+    text) pair in an LRU of ``cache_size`` entries, so repeated or batched questions over the
+    same chunks only score the pairs not seen before.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        batch_size: int = 32,
+        cache_size: int = 50000,
+        max_length: int = 512,
+    ):
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self.cache_size = max(0, cache_size)
+        self.max_length = max_length
+        self.hits = 0
+        self.misses = 0
+        self.load_seconds: Optional[float] = None
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._scores: "OrderedDict[str, float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self):
+        if self._model is not None:
+            return self._model
+        with self._model_lock:
+            if self._model is None:
+                # sentence-transformers pulls in torch, so it is imported only when reranking is used.
+                from sentence_transformers import CrossEncoder
+
+                started = time.perf_counter()
+                self._model = CrossEncoder(self.model_name, device="cpu", max_length=self.max_length)
+                self.load_seconds = time.perf_counter() - started
+                logger.info("Loaded reranker '%s' in %.2fs.", self.model_name, self.load_seconds)
+        return self._model
+
+    @staticmethod
+    def _key(query: str, text: str) -> str:
+        return hashlib.sha256(f"{query}\0{text}".encode("utf-8")).hexdigest()
+
+    def score(self, query: str, documents: Sequence[Document]) -> List[float]:
+        keys = [self._key(query, doc.page_content) for doc in documents]
+        scores: List[Optional[float]] = [None] * len(documents)
+        with self._cache_lock:
+            for position, key in enumerate(keys):
+                cached = self._scores.get(key)
+                if cached is not None:
+                    self._scores.move_to_end(key)
+                    scores[position] = cached
+        missing = [position for position, value in enumerate(scores) if value is None]
+        self.hits += len(documents) - len(missing)
+        self.misses += len(missing)
+        RERANK_PAIRS.inc(len(documents) - len(missing), model=self.model_name, cache="hit")
+        RERANK_PAIRS.inc(len(missing), model=self.model_name, cache="miss")
+        if not missing:
+            return scores
+
+        pairs = [(query, documents[position].page_content) for position in missing]
+        predicted = self.load().predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+        with self._cache_lock:
+            for position, value in zip(missing, predicted):
+                scores[position] = float(value)
+                if self.cache_size:
+                    self._scores[keys[position]] = float(value)
+            while len(self._scores) > self.cache_size:
+                self._scores.popitem(last=False)
+        return scores
+
+    def rerank(self, query: str, documents: Sequence[Document], k: int) -> List[Document]:
+        if not documents:
+            return []
+        scored: List[Tuple[float, int]] = [
+            (score, position) for position, score in enumerate(self.score(query, documents))
+        ]
+        # Ties keep the first-stage order.
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [documents[position] for _, position in scored[:k]]
+
+    @property
+    def cache_entries(self) -> int:
+        return len(self._scores)
@@ -0,0 +1,134 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def page_number(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class MetadataFilter:
+    """
+    Restricts a search to chunks whose ``source`` is one of ``sources`` and whose ``page`` falls
+    in one of ``pages`` (inclusive ranges; an open end means "to the last page"). Empty parts do
+    not restrict. Chunks without a page never match a page filter. Pages are numbered from 0,
+    as PyMuPDF stores them in chunk metadata.
+    """
+
+    sources: Tuple[str, ...] = ()
+    pages: Tuple[Tuple[int, Optional[int]], ...] = ()
+
+    @classmethod
+    def build(
+        cls,
+        sources: Optional[Sequence[str]] = None,
+        pages: Optional[Sequence[Tuple[int, Optional[int]]]] = None,
+        first_page: int = 0,
+    ) -> Optional["MetadataFilter"]:
+        """
+        A filter for the given sources and page ranges, or None when neither restricts anything.
+        ``pages`` are numbered from ``first_page``, e.g. 1 for page numbers as a reader sees them.
+        """
+        names = tuple(dict.fromkeys(Path(source.strip().strip('"')).name for source in sources or () if source.strip()))
+        ranges = []
+        for start, end in pages or ():
+            if start < first_page or (end is not None and end < start):
+                raise ValueError(f"Invalid page range {start}-{end}.")
+            ranges.append((start - first_page, None if end is None else end - first_page))
+        if not names and not ranges:
+            return None
+        return cls(sources=names, pages=tuple(ranges))
+
+    def matches(self, metadata: Optional[Dict[str, Any]]) -> bool:
+        metadata = metadata or {}
+        if self.sources and str(metadata.get("source")) not in self.sources:
+            return False
+        if self.pages:
+            page = page_number(metadata.get("page"))
+            if page is None:
+                return False
+            return any(start <= page and (end is None or page <= end) for start, end in self.pages)
+        return True
+
+    def where(self) -> Optional[Dict[str, Any]]:
+        """
+        The filter as a Chroma ``where`` clause, which Chroma resolves against its metadata index.
+        """
+        clauses: List[Dict[str, Any]] = []
+        if self.sources:
+            clauses.append({"source": {"$in": list(self.sources)}})
+        if self.pages:
+            ranges = [
+                {"page": {"$gte": start}} if end is None else {"$and": [{"page": {"$gte": start}}, {"page": {"$lte": end}}]}
+                for start, end in self.pages
+            ]
+            clauses.append(ranges[0] if len(ranges) == 1 else {"$or": ranges})
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+class MetadataColumns:
+    """
+    The ``source`` and ``page`` of every row of an index as integer arrays, so a filter selects
+    its rows with a few vectorized comparisons instead of reading each chunk's metadata.
+    """
+
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+        self.sources = np.full(0, -1, dtype=np.int32)
+        self.pages = np.full(0, -1, dtype=np.int64)
+
+    def assign(self, rows: Sequence[int], metadatas: Sequence[Optional[Dict[str, Any]]]) -> None:
+        size = max(rows, default=-1) + 1
+        if size > len(self.sources):
+            extra = size - len(self.sources)
+            self.sources = np.concatenate([self.sources, np.full(extra, -1, dtype=np.int32)])
+            self.pages = np.concatenate([self.pages, np.full(extra, -1, dtype=np.int64)])
+        for row, metadata in zip(rows, metadatas):
+            metadata = metadata or {}
+            source = metadata.get("source")
+            self.sources[row] = -1 if source is None else self._codes.setdefault(str(source), len(self._codes))
+            page = page_number(metadata.get("page"))
+            self.pages[row] = -1 if page is None else page
+
+    def mask(self, search_filter: MetadataFilter, rows: int) -> np.ndarray:
+        """
+        Boolean mask over the first ``rows`` rows; rows never assigned do not match.
+        """
+        known = min(rows, len(self.sources))
+        selected = np.zeros(rows, dtype=bool)
+        selected[:known] = True
+        if search_filter.sources:
+            codes = [self._codes[source] for source in search_filter.sources if source in self._codes]
+            selected[:known] &= np.isin(self.sources[:known], codes)
+        if search_filter.pages:
+            pages = self.pages[:known]
+            in_range = np.zeros(known, dtype=bool)
+            for start, end in search_filter.pages:
+                in_range |= (pages >= start) if end is None else (pages >= start) & (pages <= end)
+            selected[:known] &= in_range
+        return selected
+
+
+@dataclass
+class SearchScope:
+    """
+    The collections a question searches and the metadata filter applied inside them.
+    """
+
+    collections: List[str]
+    search_filter: Optional[MetadataFilter] = None
+    label: str = field(init=False)
+
+    def __post_init__(self) -> None:
+        # Used wherever a single collection name is expected, such as metric labels.
+        self.label = "+".join(self.collections)
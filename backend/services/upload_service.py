@@ -1,38 +1,129 @@
 import asyncio
-import shutil
+import hashlib
+import os
+import tempfile
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Union
+from typing import Optional, Union
 
 from fastapi import UploadFile
 
 from backend.services.interface.upload import UploadServiceInterface
 from backend.utils.logging_config import get_logger
+from backend.utils.shared_state import SharedJsonFile
 
 logger = get_logger(__name__)
 
 
+class UploadTooLargeError(Exception):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit.")
+        self.max_bytes = max_bytes
+
+
+@dataclass
+class StoredUpload:
+    filename: str
+    path: Path
+    size_bytes: int
+    sha256: Optional[str] = None
+    duplicate: bool = False
+
+
+def sanitize_filename(filename: str) -> str:
+    # Some clients may wrap the filename in quotes; normalize and drop any path segments.
+    return Path(filename.strip().strip('"').strip("'")).name
+
+
 class UploadService(UploadServiceInterface):
-    def __init__(self, save_dir: Union[Path, str] = "./data/raw"):
+    """
+    Content-addressed upload store.
+
+    Uploads are streamed to disk in ``chunk_size`` blocks while their SHA-256 is computed, and
+    kept under ``objects/<hash[:2]>/<hash><suffix>``. ``index.json`` maps each uploaded filename
+    to its current object, so re-uploading identical bytes stores nothing new and uploading new
+    bytes under an existing name leaves the earlier object in place. The index is shared
+    through the filesystem, so any worker can resolve a file uploaded to another. Uploads
+    larger than ``max_bytes`` are aborted as soon as they cross the limit.
+    """
+
+    def __init__(
+        self,
+        save_dir: Union[Path, str] = "./data/raw",
+        max_bytes: int = 200 * 1024 * 1024,
+        chunk_size: int = 1024 * 1024,
+    ):
         self.save_dir = Path(save_dir)
+        self.objects_dir = self.save_dir / "objects"
+        self.index_path = self.save_dir / "index.json"
+        self.max_bytes = max_bytes
+        self.chunk_size = max(1, chunk_size)
+        self._index = SharedJsonFile(self.index_path)
 
-    async def save(self, uploaded_file: UploadFile) -> str:
+    def object_path(self, sha256: str, suffix: str) -> Path:
+        return self.objects_dir / sha256[:2] / f"{sha256}{suffix.lower()}"
+
+    async def save(self, uploaded_file: UploadFile) -> StoredUpload:
         """
-        Persist a FastAPI UploadFile to disk asynchronously.
+        Stream a FastAPI UploadFile into the store, hashing it on the way.
         """
-        logger.info("Saving uploaded file '%s' to directory '%s'", uploaded_file.filename, self.save_dir)
-        await asyncio.to_thread(self.save_dir.mkdir, parents=True, exist_ok=True)
-        file_path = self.save_dir / uploaded_file.filename
-
-        def _persist_file():
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(uploaded_file.file, buffer)
+        filename = sanitize_filename(uploaded_file.filename or "")
+        if not filename:
+            raise ValueError("Uploaded file has no filename.")
+        logger.info("Saving uploaded file '%s' to directory '%s'", filename, self.save_dir)
+        return await asyncio.to_thread(self._store, uploaded_file, filename)
 
+    def _store(self, uploaded_file: UploadFile, filename: str) -> StoredUpload:
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        handle, tmp_name = tempfile.mkstemp(dir=self.objects_dir, suffix=".part")
         try:
-            await asyncio.to_thread(_persist_file)
-        except Exception:
-            logger.exception("Failed to persist uploaded file '%s'", uploaded_file.filename)
-            raise
-
-        abs_path = str(file_path.resolve())
-        logger.info("Saved file to %s", abs_path)
-        return abs_path
+            with os.fdopen(handle, "wb") as buffer:
+                for block in iter(lambda: uploaded_file.file.read(self.chunk_size), b""):
+                    size += len(block)
+                    if size > self.max_bytes:
+                        raise UploadTooLargeError(self.max_bytes)
+                    digest.update(block)
+                    buffer.write(block)
+
+            sha256 = digest.hexdigest()
+            object_path = self.object_path(sha256, Path(filename).suffix)
+            duplicate = object_path.exists()
+            if duplicate:
+                logger.info("Upload '%s' matches stored object %s; skipping write.", filename, sha256[:12])
+            else:
+                object_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_name, object_path)
+        finally:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+
+        with self._index.update() as index:
+            index[filename] = {
+                "sha256": sha256,
+                "size_bytes": size,
+                "object": object_path.relative_to(self.save_dir).as_posix(),
+                "uploaded_at": time.time(),
+            }
+        logger.info("Saved '%s' (%d bytes) as %s", filename, size, object_path)
+        return StoredUpload(filename=filename, path=object_path, size_bytes=size, sha256=sha256, duplicate=duplicate)
+
+    def resolve(self, filename: str) -> Optional[StoredUpload]:
+        """
+        Locate an uploaded file by name. Files placed directly in ``save_dir`` (as older
+        versions stored uploads) are still found, without a known hash.
+        """
+        filename = sanitize_filename(filename)
+        entry = self._index.read().get(filename)
+        if entry is not None:
+            path = self.save_dir / entry["object"]
+            if path.exists():
+                return StoredUpload(filename=filename, path=path, size_bytes=entry["size_bytes"], sha256=entry["sha256"])
+            logger.warning("Upload index points '%s' at missing object %s.", filename, path)
+
+        legacy_path = self.save_dir / filename
+        if filename and legacy_path.is_file():
+            return StoredUpload(filename=filename, path=legacy_path, size_bytes=legacy_path.stat().st_size)
+        return None
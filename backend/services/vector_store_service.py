@@ -1,77 +1,360 @@
 import asyncio
 import os
-import shutil
-from typing import Optional
+import threading
+import time
+import uuid
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
 
-import torch
 from fastapi import HTTPException
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
 
+from backend.services.embedding_cache import CachedEmbeddings, EmbeddingCache, EmbeddingStats
+from backend.services.embedding_model import LazyEmbeddings, embedding_cache_namespace, load_embedding_model
 from backend.services.interface.vector_store import VectorStoreInterface
 from backend.utils.logging_config import get_logger
 
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+
 logger = get_logger(__name__)
 
+VECTOR_STORE_BACKENDS = ("chroma", "numpy")
+
+# Chroma rejects oversized upserts, so large documents are written in slices.
+UPSERT_BATCH_SIZE = 1000
+
+
+def _filter_complex_metadata(documents):
+    from langchain_community.vectorstores.utils import filter_complex_metadata
+
+    return filter_complex_metadata(documents)
+
 
 class VectorStoreManager(VectorStoreInterface):
-    def __init__(self, persist_directory: Optional[str] = None):
+    """
+    Opens and caches one store per collection. With ``version_of`` (the manifest's collection
+    version), the manager remembers the version each collection had when it first read it, so
+    callers can tell when another worker has changed it since.
+    """
+
+    def __init__(
+        self,
+        persist_directory: Optional[str] = None,
+        model_name: str = "all-MiniLM-L6-v2",
+        embedding_cache: Optional[EmbeddingCache] = None,
+        memory_limit_bytes: Optional[int] = None,
+        embedding_backend: str = "torch",
+        encode_batch_size: int = 32,
+        num_threads: int = 0,
+        onnx_file: str = "onnx/model_qint8_avx2.onnx",
+        version_of: Optional[Callable[[str], int]] = None,
+        retired_client_grace_seconds: float = 60.0,
+    ):
         if persist_directory is None:
             base_dir = os.path.dirname(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
             persist_directory = os.path.join(base_dir, "data", "vector_db")
 
-        device = "cuda" if torch.cuda.is_available() else "cpu"
         logger.info(
-            "Initializing VectorStoreManager with device '%s' and persist directory '%s'",
-            device,
+            "Initializing VectorStoreManager with '%s' embeddings and persist directory '%s'",
+            embedding_backend,
             persist_directory,
         )
 
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="all-MiniLM-L6-v2",
-            model_kwargs={"device": device},
+        # The model is loaded on first use (or by ``warmup``) so importing and constructing stay cheap.
+        self.model = LazyEmbeddings(
+            partial(
+                load_embedding_model,
+                embedding_backend,
+                model_name,
+                batch_size=encode_batch_size,
+                num_threads=num_threads,
+                onnx_file=onnx_file,
+            )
+        )
+        self.embeddings = CachedEmbeddings(
+            self.model,
+            model_name=embedding_cache_namespace(embedding_backend, model_name, onnx_file),
+            cache=embedding_cache,
         )
+        self.model_name = model_name
         self.persist_directory = persist_directory
+        self.memory_limit_bytes = memory_limit_bytes
         self.vector_store = None
+        self._stores: Dict[str, "Chroma"] = {}
+        self._client = None
+        self._client_lock = threading.RLock()
+        self.client_load_seconds: Optional[float] = None
+        self.version_of = version_of
+        self._versions: Dict[str, int] = {}
+        self.retired_client_grace_seconds = retired_client_grace_seconds
+        # Clients replaced by ``reload_collection``, with when they were replaced.
+        self._retired: List[Tuple[float, Any]] = []
+
+    def _get_client(self):
+        # One shared client per manager; Chroma refuses a second client on the same path with other settings.
+        with self._client_lock:
+            if self._retired:
+                self._stop_retired()
+            if self._client is None:
+                import chromadb
+                from chromadb.config import Settings as ChromaSettings
+
+                started = time.perf_counter()
+                client_settings = None
+                if self.memory_limit_bytes:
+                    # Let Chroma unload the least recently used collection indexes once the budget is reached.
+                    client_settings = ChromaSettings(
+                        chroma_segment_cache_policy="LRU",
+                        chroma_memory_limit_bytes=self.memory_limit_bytes,
+                        anonymized_telemetry=False,
+                    )
+                self._client = chromadb.PersistentClient(path=self.persist_directory, settings=client_settings)
+                self.client_load_seconds = time.perf_counter() - started
+            return self._client
 
     async def set_collection(self, collection_name: str) -> None:
         logger.info("Setting vector store collection to '%s'", collection_name)
-        self.vector_store = await asyncio.to_thread(
-            self._create_collection,
-            collection_name,
-        )
+        self.vector_store = await self._get_store(collection_name)
+
+    @property
+    def client_ready(self) -> bool:
+        return self._client is not None
+
+    def warmup(self) -> None:
+        """
+        Load the embedding model, run one dummy embedding and open the Chroma client.
+        """
+        self.model.embed_query("warmup")
+        self._get_client()
 
     def _create_collection(self, collection_name: str):
+        from langchain_chroma import Chroma
+
         return Chroma(
             collection_name=collection_name,
             embedding_function=self.embeddings,
-            persist_directory=self.persist_directory,
+            client=self._get_client(),
         )
 
-    async def add_documents(self, documents) -> None:
-        if not self.vector_store:
-            logger.error("Attempted to add documents before initializing vector store.")
-            raise HTTPException(status_code=500, detail="Vector store not initialized. Call set_collection first.")
+    async def _get_store(self, collection_name: Optional[str] = None):
+        """
+        Return the store for ``collection_name``, or the active one when no name is given.
+        Stores are cached per collection so concurrent ingests never swap each other's target.
+        """
+        if collection_name is None:
+            if not self.vector_store:
+                logger.error("Vector store accessed before initialization.")
+                raise HTTPException(status_code=500, detail="Vector store not initialized. Call set_collection first.")
+            return self.vector_store
+        store = self._stores.get(collection_name)
+        if store is None:
+            store = await asyncio.to_thread(self._get_or_create_store, collection_name)
+        return store
+
+    def _get_or_create_store(self, collection_name: str):
+        with self._client_lock:
+            store = self._stores.get(collection_name)
+            if store is None:
+                if self.version_of is not None:
+                    # Read before opening, so a change landing meanwhile still shows as stale. Chroma keeps
+                    # a collection's index for the life of its client, so the first read's version stands.
+                    self._versions.setdefault(collection_name, self.version_of(collection_name))
+                store = self._create_collection(collection_name)
+                self._stores[collection_name] = store
+            return store
+
+    def is_stale(self, collection_name: str) -> bool:
+        """
+        Whether another worker changed ``collection_name`` after this manager read it.
+        """
+        with self._client_lock:
+            version = self._versions.get(collection_name)
+        return version is not None and version != self.version_of(collection_name)
+
+    def mark_current(self, collection_name: str) -> None:
+        """
+        Record that this manager's copy of ``collection_name`` is the latest version, after it wrote
+        the change itself.
+        """
+        if self.version_of is not None:
+            with self._client_lock:
+                self._versions[collection_name] = self.version_of(collection_name)
+
+    async def collection_exists(self, collection_name: str) -> bool:
+        def _exists() -> bool:
+            try:
+                collection = self._get_client().get_collection(collection_name)
+            except Exception:
+                return False
+            return collection.count() > 0
+
+        return await asyncio.to_thread(_exists)
+
+    async def count_documents(self, collection_name: Optional[str] = None) -> int:
+        store = await self._get_store(collection_name)
+        return await asyncio.to_thread(store._collection.count)
+
+    def release_collection(self, collection_name: str) -> None:
+        """
+        Drop the cached store wrapper for a collection that is no longer queried.
+        The active collection is kept.
+        """
+        with self._client_lock:
+            store = self._stores.get(collection_name)
+            if store is not None and store is not self.vector_store:
+                del self._stores[collection_name]
+
+    def reload_collection(self, collection_name: str) -> bool:
+        """
+        Pick up changes another worker made to ``collection_name``. Chroma keeps each
+        collection's vector index in memory for the life of its client, so a fresh client is
+        opened and every store is recreated from it on next use. Stores already handed out
+        keep reading from the previous client, which is stopped once it has been retired for
+        ``retired_client_grace_seconds``, long after any search running on it has finished.
+        """
+        from chromadb.api.shared_system_client import SharedSystemClient
+
+        with self._client_lock:
+            if self._client is None:
+                return False
+            logger.info("Collection '%s' changed on disk; reopening the Chroma client.", collection_name)
+            # Chroma shares one system per path and offers no public way to open a second one, so
+            # the cached system is set aside here and forgotten, and the next client loads the data again.
+            self._retired.append((time.monotonic(), self._client._system))
+            SharedSystemClient.clear_system_cache()
+            self._client = None
+            self._stores.clear()
+            self._versions.clear()
+            self.vector_store = None
+            self._stop_retired()
+        return True
+
+    def _stop_retired(self, force: bool = False) -> None:
+        # Releases the loaded indexes and open files of clients no search can still be using.
+        cutoff = time.monotonic() - self.retired_client_grace_seconds
+        with self._client_lock:
+            expired = [system for retired_at, system in self._retired if force or retired_at <= cutoff]
+            self._retired = [(retired_at, system) for retired_at, system in self._retired if system not in expired]
+        for system in expired:
+            try:
+                system.stop()
+            except Exception:
+                logger.exception("Failed to stop a retired Chroma client.")
+
+    def close(self) -> None:
+        """
+        Close the client and any retired ones; the client is reopened on next use.
+        """
+        with self._client_lock:
+            client, self._client = self._client, None
+            self._stores.clear()
+            self._versions.clear()
+            self.vector_store = None
+        self._stop_retired(force=True)
+        if client is not None:
+            client.close()
+
+    async def get_document_ids(self, collection_name: Optional[str] = None) -> List[str]:
+        store = await self._get_store(collection_name)
+        result = await asyncio.to_thread(store._collection.get, include=[])
+        return list(result["ids"])
+
+    async def get_all_documents(
+        self,
+        collection_name: Optional[str] = None,
+    ) -> Tuple[List[str], List[str], List[Dict[str, Any]]]:
+        store = await self._get_store(collection_name)
+        result = await asyncio.to_thread(store._collection.get, include=["documents", "metadatas"])
+        return list(result["ids"]), list(result["documents"]), [metadata or {} for metadata in result["metadatas"]]
+
+    async def delete_documents(self, ids: Sequence[str], collection_name: Optional[str] = None) -> None:
+        store = await self._get_store(collection_name)
+        if not ids:
+            return
+        ids = list(ids)
+
+        def _delete() -> None:
+            for start in range(0, len(ids), UPSERT_BATCH_SIZE):
+                store._collection.delete(ids=ids[start:start + UPSERT_BATCH_SIZE])
+
+        await asyncio.to_thread(_delete)
+        logger.info("Deleted %d stale documents from the vector store.", len(ids))
+
+    async def add_documents(
+        self,
+        documents,
+        ids: Optional[Sequence[str]] = None,
+        collection_name: Optional[str] = None,
+    ) -> EmbeddingStats:
+        await self._get_store(collection_name)
         if not documents:
             logger.warning("No documents provided to add to vector store.")
-            return
-        await asyncio.to_thread(self.vector_store.add_documents, documents)
-        logger.info("Added %d documents to the vector store.", len(documents))
+            return EmbeddingStats()
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in documents]
+        documents = _filter_complex_metadata(documents)
+        vectors, stats = await self.embed_documents(documents)
+        await self.upsert_embeddings(list(ids), documents, vectors, collection_name=collection_name)
+        logger.info(
+            "Added %d documents to the vector store (%d cached embeddings, %d computed).",
+            len(documents),
+            stats.hits,
+            stats.misses,
+        )
+        return stats
+
+    async def embed_documents(self, documents) -> Tuple[List[List[float]], EmbeddingStats]:
+        texts = [doc.page_content for doc in documents]
+        return await asyncio.to_thread(self.embeddings.embed_documents_with_stats, texts)
+
+    async def upsert_embeddings(
+        self,
+        ids: Sequence[str],
+        documents,
+        vectors: Sequence[Sequence[float]],
+        collection_name: Optional[str] = None,
+    ) -> None:
+        store = await self._get_store(collection_name)
+        documents = _filter_complex_metadata(documents)
+        ids = list(ids)
+
+        def _upsert() -> None:
+            collection = store._collection
+            for start in range(0, len(documents), UPSERT_BATCH_SIZE):
+                end = start + UPSERT_BATCH_SIZE
+                collection.upsert(
+                    ids=ids[start:end],
+                    embeddings=list(vectors[start:end]),
+                    documents=[doc.page_content for doc in documents[start:end]],
+                    metadatas=[doc.metadata or None for doc in documents[start:end]],
+                )
 
-    async def get_retriever(self, k_value: int = 6):
-        if not self.vector_store:
-            logger.error("Retriever requested before vector store initialization.")
-            raise HTTPException(status_code=500, detail="Vector store not initialized. Call set_collection first.")
+        await asyncio.to_thread(_upsert)
+
+    async def get_retriever(self, k_value: int = 6, collection_name: Optional[str] = None):
+        store = await self._get_store(collection_name)
         logger.info("Creating retriever with top-k=%d", k_value)
         return await asyncio.to_thread(
-            self.vector_store.as_retriever,
+            store.as_retriever,
             search_kwargs={"k": k_value},
         )
 
     async def clean_database(self) -> None:
-        if os.path.exists(self.persist_directory):
-            logger.info("Cleaning vector store directory at %s", self.persist_directory)
-            await asyncio.to_thread(shutil.rmtree, self.persist_directory)
-            logger.info("Finished cleaning vector store directory.")
-        else:
+        if not os.path.exists(self.persist_directory):
             logger.info("Vector store directory does not exist at %s; no cleanup needed.", self.persist_directory)
+            return
+
+        # Drop collections through the client rather than deleting files under an open SQLite database.
+        def _drop_collections() -> int:
+            client = self._get_client()
+            collections = client.list_collections()
+            for collection in collections:
+                client.delete_collection(getattr(collection, "name", collection))
+            return len(collections)
+
+        logger.info("Cleaning vector store at %s", self.persist_directory)
+        dropped = await asyncio.to_thread(_drop_collections)
+        self.vector_store = None
+        self._stores.clear()
+        self._versions.clear()
+        logger.info("Finished cleaning vector store; dropped %d collections.", dropped)
@@ -0,0 +1,77 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from backend.services.qa_service import QAPipelineManager
+from backend.services.reranker import CrossEncoderReranker
+from backend.services.vector_store_service import VectorStoreManager
+from backend.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class WarmupService:
+    """
+    Loads the embedding model, Chroma client, LLM client and (when enabled) reranker ahead of
+    the first request, and reports which of them are ready. With warmup disabled the
+    components load on first use and the service counts as ready immediately.
+    """
+
+    def __init__(
+        self,
+        vector_store_manager: VectorStoreManager,
+        qa_pipeline_manager: QAPipelineManager,
+        enabled: bool = False,
+        reranker: Optional[CrossEncoderReranker] = None,
+    ):
+        self.vector_store_manager = vector_store_manager
+        self.qa_pipeline_manager = qa_pipeline_manager
+        self.enabled = enabled
+        self.reranker = reranker
+        self.status = "pending" if enabled else "disabled"
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None
+
+    async def run(self) -> None:
+        self.status = "running"
+        started = time.perf_counter()
+        logger.info("Starting background warmup.")
+        try:
+            await asyncio.to_thread(self.vector_store_manager.warmup)
+            await asyncio.to_thread(lambda: self.qa_pipeline_manager.chat)
+            if self.reranker is not None:
+                await asyncio.to_thread(self.reranker.load)
+        except Exception as exc:
+            self.status = "failed"
+            self.error = str(exc)
+            logger.exception("Warmup failed.")
+            return
+        finally:
+            self.seconds = time.perf_counter() - started
+        self.status = "done"
+        logger.info("Warmup finished in %.2fs.", self.seconds)
+
+    @property
+    def ready(self) -> bool:
+        if not self.enabled:
+            return True
+        return all(component["ready"] for component in self.components().values())
+
+    def components(self) -> Dict[str, Dict[str, Any]]:
+        components = {
+            "embedder": {
+                "ready": self.vector_store_manager.model.loaded,
+                "load_seconds": self.vector_store_manager.model.load_seconds,
+            },
+            "vector_store": {
+                "ready": self.vector_store_manager.client_ready,
+                "load_seconds": self.vector_store_manager.client_load_seconds,
+            },
+            "llm_client": {
+                "ready": self.qa_pipeline_manager.chat_ready,
+                "load_seconds": self.qa_pipeline_manager.chat_load_seconds,
+            },
+        }
+        if self.reranker is not None:
+            components["reranker"] = {"ready": self.reranker.loaded, "load_seconds": self.reranker.load_seconds}
+        return components
@@ -1,22 +1,30 @@
-from langchain.prompts import PromptTemplate
+from typing import Any
 
-QA_PROMPT = PromptTemplate(
-    input_variables=["context", "question"],
-    template=(
-        "You are an assistant answering questions strictly from the provided context.\n\n"
-        "Context:\n"
-        "{context}\n\n"
-        "Question:\n"
-        "{question}\n\n"
-        "Instructions:\n"
-        "- Base your answer only on the context above. If you cannot find the information, reply exactly: \"I could not find the answer in the provided context.\"\n"
-        "- Format every mathematical expression using valid LaTeX that KaTeX can render: inline math must be enclosed by a single pair of $...$ and block equations must be enclosed by $$...$$ on their own lines.\n"
-        "- Keep each math expression intact between its delimiters and use LaTeX-friendly symbols (for example \\times, \\mathbb{{R}}, \\min).\n"
-        "- When reproducing code, use fenced code blocks with the correct language tag (e.g., ```python). Preserve indentation and syntax exactly as in the context, and mention the language when it is obvious.\n"
-        "- Render tables as Markdown tables, preserving their structure, alignment, headers, and values.\n"
-        "- Present bullet or numbered lists using standard Markdown syntax with one item per line, and separate lists from surrounding text with blank lines for readability.\n"
-        "- Remove obvious artifacts from the context (duplicate symbols, soft hyphens, control characters) before presenting the final answer.\n"
-        "- Present the answer in clear Markdown. You may organize with sections or bullet lists, but never add information that is not supported by the context.\n"
-        "- If multiple snippets in the context are relevant, combine them coherently while respecting all formatting requirements above.\n"
-    ),
+QA_PROMPT_TEMPLATE = (
+    "You are an assistant answering questions strictly from the provided context.\n\n"
+    "Context:\n"
+    "{context}\n\n"
+    "Question:\n"
+    "{question}\n\n"
+    "Instructions:\n"
+    "- Base your answer only on the context above. If you cannot find the information, reply exactly: \"I could not find the answer in the provided context.\"\n"
+    "- Format every mathematical expression using valid LaTeX that KaTeX can render: inline math must be enclosed by a single pair of $...$ and block equations must be enclosed by $$...$$ on their own lines.\n"
+    "- Keep each math expression intact between its delimiters and use LaTeX-friendly symbols (for example \\times, \\mathbb{{R}}, \\min).\n"
+    "- When reproducing code, use fenced code blocks with the correct language tag (e.g., ```python). Preserve indentation and syntax exactly as in the context, and mention the language when it is obvious.\n"
+    "- Render tables as Markdown tables, preserving their structure, alignment, headers, and values.\n"
+    "- Present bullet or numbered lists using standard Markdown syntax with one item per line, and separate lists from surrounding text with blank lines for readability.\n"
+    "- Remove obvious artifacts from the context (duplicate symbols, soft hyphens, control characters) before presenting the final answer.\n"
+    "- Present the answer in clear Markdown. You may organize with sections or bullet lists, but never add information that is not supported by the context.\n"
+    "- If multiple snippets in the context are relevant, combine them coherently while respecting all formatting requirements above.\n"
 )
+
+
+def __getattr__(name: str) -> Any:
+    # PromptTemplate imports the langchain model stack (and with it torch), so QA_PROMPT is built on first access.
+    if name == "QA_PROMPT":
+        from langchain_core.prompts import PromptTemplate
+
+        prompt = PromptTemplate(input_variables=["context", "question"], template=QA_PROMPT_TEMPLATE)
+        globals()["QA_PROMPT"] = prompt
+        return prompt
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,152 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+from backend.utils.logging_config import get_logger
+from backend.utils.metrics import COALESCED_CALLS
+
+T = TypeVar("T")
+
+logger = get_logger(__name__)
+
+
+class CapacityExceededError(Exception):
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class InFlightLimiter:
+    """
+    Caps the number of requests in flight. A request that cannot get a slot within
+    ``queue_timeout_seconds`` is rejected with ``CapacityExceededError`` instead of queueing
+    behind the others.
+    """
+
+    def __init__(self, max_in_flight: int, queue_timeout_seconds: float = 0.0, retry_after_seconds: int = 1):
+        self.max_in_flight = max(1, max_in_flight)
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.in_flight = 0
+        self.rejected = 0
+        # Created on first use so it binds to the serving event loop.
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._semaphore
+
+    def _reject(self) -> CapacityExceededError:
+        self.rejected += 1
+        logger.warning("Rejecting request: %d of %d slots in use.", self.in_flight, self.max_in_flight)
+        return CapacityExceededError(
+            f"Server is at capacity ({self.max_in_flight} requests in flight). Please retry shortly.",
+            retry_after=self.retry_after_seconds,
+        )
+
+    def ensure_capacity(self) -> None:
+        """
+        Fail fast before committing to a response when every slot is taken and callers are
+        not allowed to wait.
+        """
+        if self.in_flight >= self.max_in_flight and self.queue_timeout_seconds <= 0:
+            raise self._reject()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        semaphore = self._get_semaphore()
+        if semaphore.locked() and self.queue_timeout_seconds <= 0:
+            raise self._reject()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=max(self.queue_timeout_seconds, 0.001))
+        except asyncio.TimeoutError:
+            raise self._reject()
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+
+
+class TokenBucket:
+    """
+    Allows ``per_minute`` units a minute, refilled continuously and bursting up to a minute's
+    worth. A limit of zero or less means unlimited.
+    """
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.capacity = max(0.0, float(per_minute))
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.per_minute <= 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.capacity / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Seconds until ``amount`` units are available; requests larger than the bucket wait for a
+        full bucket.
+        """
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing * 60 / self.capacity)
+
+    def consume(self, amount: float) -> None:
+        """
+        Take ``amount`` units, going into debt if needed; a negative amount returns units.
+        """
+        if self.unlimited:
+            return
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first call starts the computation and
+    calls arriving while it runs await the same result (or exception) instead of repeating
+    the work. Nothing is kept once it finishes, so later calls compute afresh.
+
+    The computation runs as its own task, so a caller that disconnects does not cancel it for
+    the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.coalesced = 0
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+            COALESCED_CALLS.inc(kind=self.name)
+            logger.info("Joining in-flight %s call instead of repeating it.", self.name)
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the outcome as retrieved even when every caller went away before it finished.
+        if not task.cancelled():
+            task.exception()
@@ -1,10 +1,13 @@
 import os
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-from langchain_groq import ChatGroq
+import httpx
 
 from backend.utils.logging_config import get_logger
 
+if TYPE_CHECKING:
+    from langchain_groq import ChatGroq
+
 logger = get_logger(__name__)
 
 
@@ -13,10 +16,15 @@ def get_groq_chat(
     temperature: float = 0.1,
     max_retries: int = 3,
     api_key: Optional[str] = None,
-) -> ChatGroq:
+    http_async_client: Optional[httpx.AsyncClient] = None,
+    request_timeout: Optional[float] = None,
+) -> "ChatGroq":
     """
     Create a ChatGroq client using environment configuration.
     """
+    # Imported here because langchain_groq pulls in the langchain model stack (and with it torch).
+    from langchain_groq import ChatGroq
+
     groq_api_key = api_key or os.getenv("GROQ_API_KEY")
     if not groq_api_key:
         logger.error("GROQ_API_KEY is missing; cannot initialize Groq client.")
@@ -28,4 +36,26 @@ def get_groq_chat(
         temperature=temperature,
         max_retries=max_retries,
         api_key=groq_api_key,
+        http_async_client=http_async_client,
+        request_timeout=request_timeout,
+    )
+
+
+def create_async_http_client(
+    max_connections: int = 100,
+    max_keepalive_connections: int = 20,
+    timeout: float = 60.0,
+) -> httpx.AsyncClient:
+    """
+    Pooled HTTP client shared by every async Groq call, so requests reuse open
+    connections instead of paying a TLS handshake each time.
+    """
+    logger.info(
+        "Creating shared async HTTP client (max %d connections, %d keep-alive).",
+        max_connections,
+        max_keepalive_connections,
+    )
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections),
+        timeout=timeout,
     )
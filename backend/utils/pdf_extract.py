@@ -0,0 +1,99 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from backend.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def resolve_worker_count(workers: int) -> int:
+    """
+    Map the configured worker count to a real one; zero or less means one per CPU core.
+    """
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # Spawned workers avoid forking a process that already runs uvicorn and torch threads,
+            # and only need to import this lightweight module.
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+            logger.info("Started PDF extraction pool with %d workers.", workers)
+        return _pool
+
+
+def count_pages(file_path: str) -> int:
+    # pymupdf is imported where PDFs are opened, so importing the app does not load it.
+    import pymupdf
+
+    with pymupdf.open(file_path) as doc:
+        return doc.page_count
+
+
+def document_metadata(file_path: str) -> Dict[str, Any]:
+    """
+    Document-level metadata in the same shape PyMuPDFLoader attaches to every page.
+    """
+    import pymupdf
+
+    with pymupdf.open(file_path) as doc:
+        metadata: Dict[str, Any] = {
+            "producer": "PyMuPDF",
+            "creator": "PyMuPDF",
+            "creationdate": "",
+            "source": file_path,
+            "file_path": file_path,
+            "total_pages": doc.page_count,
+        }
+        for key, value in (doc.metadata or {}).items():
+            if isinstance(value, str):
+                metadata[key.lower()] = value.strip()
+            elif isinstance(value, int):
+                metadata[key.lower()] = value
+        for key in ("modDate", "creationDate"):
+            if key in (doc.metadata or {}):
+                metadata[key] = doc.metadata[key]
+    return metadata
+
+
+def extract_page_range(file_path: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    """
+    Extract the text of pages ``[start, stop)``. Runs inside a pool worker.
+    """
+    import pymupdf
+
+    with pymupdf.open(file_path) as doc:
+        return [(number, doc[number].get_text().strip()) for number in range(start, min(stop, doc.page_count))]
+
+
+def iter_parallel_pages(file_path: str, total_pages: int, workers: int) -> Iterator[Tuple[int, str]]:
+    """
+    Split the document into page ranges, extract them in worker processes and yield
+    ``(page_number, text)`` in page order as soon as each range is ready.
+    """
+    # Several ranges per worker keep the pool busy when some pages are much heavier than others.
+    range_size = max(1, -(-total_pages // (workers * 4)))
+    starts = list(range(0, total_pages, range_size))
+    stops = [start + range_size for start in starts]
+    logger.info(
+        "Extracting %d pages from %s in %d ranges across %d workers.",
+        total_pages,
+        file_path,
+        len(starts),
+        workers,
+    )
+    pool = _get_pool(workers)
+    for pages in pool.map(extract_page_range, [file_path] * len(starts), starts, stops):
+        yield from pages
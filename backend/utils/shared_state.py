@@ -0,0 +1,152 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+from backend.utils.logging_config import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = get_logger(__name__)
+
+
+class LockTimeoutError(Exception):
+    def __init__(self, path: Path, timeout: float):
+        super().__init__(f"Timed out after {timeout:.0f}s waiting for lock {path.name}.")
+        self.path = path
+        self.timeout = timeout
+
+
+class FileLock:
+    """
+    Exclusive advisory lock on ``path``, held across threads, worker processes and (on shared
+    volumes with working ``flock``, such as local disks and NFSv4) across hosts. The lock is
+    released when the holder closes it or its process dies, so a crashed worker never leaves
+    a stale lock behind.
+    """
+
+    def __init__(self, path: Union[Path, str], timeout: Optional[float] = None, poll_interval: float = 0.05):
+        self.path = Path(path)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+
+    def _try_lock(self, fd: int) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def acquire(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while not self._try_lock(fd):
+            if deadline is not None and time.monotonic() >= deadline:
+                os.close(fd)
+                raise LockTimeoutError(self.path, self.timeout)
+            time.sleep(self.poll_interval)
+        self._fd = fd
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
+
+    async def __aenter__(self) -> "FileLock":
+        # Waiting happens on a worker thread so the event loop keeps serving other requests.
+        await asyncio.to_thread(self.acquire)
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.release()
+
+
+class SharedJsonFile:
+    """
+    A JSON object on disk shared by every process using the same data directory.
+
+    Reads come from memory and are reloaded whenever the file on disk has been replaced.
+    ``update`` re-reads the file under an exclusive ``FileLock`` and replaces it atomically,
+    so concurrent writers in other workers never lose each other's changes.
+    """
+
+    def __init__(self, path: Union[Path, str], lock_timeout: Optional[float] = 30.0):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.lock_timeout = lock_timeout
+        self._lock = threading.Lock()
+        self._data: Dict[str, Any] = {}
+        self._stamp: Optional[Tuple[int, int, int]] = None
+
+    def _current_stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        # Every write replaces the file, so the inode changes even within one mtime tick.
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> Dict[str, Any]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            logger.exception("Could not read %s; treating it as empty.", self.path)
+            return {}
+
+    def read(self) -> Dict[str, Any]:
+        """
+        The current contents. The returned dict is shared; copy it before changing anything.
+        """
+        with self._lock:
+            stamp = self._current_stamp()
+            if stamp != self._stamp or stamp is None:
+                self._data = self._load()
+                self._stamp = stamp
+            return self._data
+
+    @contextmanager
+    def update(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the latest contents for changing in place; they are written back on exit.
+        """
+        with self._lock, FileLock(self.lock_path, timeout=self.lock_timeout):
+            data = self._load()
+            yield data
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                json.dump(data, handle, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self._data = data
+            self._stamp = self._current_stamp()
@@ -0,0 +1,67 @@
+"""
+Compare two benchmark result files.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+INGEST_METRICS = ("pages_per_second", "chunks_per_second", "embeddings_per_second", "end_to_end_chunks_per_second")
+
+
+def _load(path: str) -> Dict[str, Any]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def _change(old: float, new: float) -> str:
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def rows(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> List[Tuple[str, float, float, str]]:
+    table = []
+    old_ingest = {item["file"]: item for item in baseline.get("ingest", [])}
+    for item in candidate.get("ingest", []):
+        old = old_ingest.get(item["file"])
+        if old is None:
+            continue
+        for metric in INGEST_METRICS:
+            table.append((f"{item['file']} {metric}", old[metric], item[metric], _change(old[metric], item[metric])))
+
+    old_query = {item["concurrency"]: item for item in baseline.get("query", [])}
+    for item in candidate.get("query", []):
+        old = old_query.get(item["concurrency"])
+        if old is None:
+            continue
+        label = f"/ask c={item['concurrency']}"
+        table.append((f"{label} req/s", old["requests_per_second"], item["requests_per_second"],
+                      _change(old["requests_per_second"], item["requests_per_second"])))
+        for pct in ("p50", "p95", "p99"):
+            old_ms, new_ms = old["latency_ms"][pct], item["latency_ms"][pct]
+            table.append((f"{label} {pct} ms", old_ms, new_ms, _change(old_ms, new_ms)))
+
+    old_rss, new_rss = baseline["peak_rss_mb"]["self"], candidate["peak_rss_mb"]["self"]
+    table.append(("peak RSS MB", old_rss, new_rss, _change(old_rss, new_rss)))
+    return table
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args(argv)
+
+    table = rows(_load(args.baseline), _load(args.candidate))
+    width = max(len(name) for name, *_ in table)
+    print(f"{'metric':<{width}}  {'baseline':>12}  {'candidate':>12}  {'change':>8}")
+    for name, old, new, change in table:
+        print(f"{name:<{width}}  {old:>12.2f}  {new:>12.2f}  {change:>8}")
+
+
+if __name__ == "__main__":
+    main()
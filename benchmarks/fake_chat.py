@@ -0,0 +1,46 @@
+import asyncio
+import hashlib
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class DeterministicChatModel(BaseChatModel):
+    """
+    Chat model stand-in for Groq. Waits ``latency_ms`` and answers with a digest of the prompt,
+    so runs are reproducible and measure this service rather than the provider.
+    """
+
+    latency_ms: float = 50.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "deterministic-fake"
+
+    def _answer(self, messages: List[BaseMessage]) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"Answer {digest}"))])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency_ms / 1000)
+        return self._answer(messages)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency_ms / 1000)
+        return self._answer(messages)
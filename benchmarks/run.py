@@ -0,0 +1,270 @@
+"""
+Benchmark the real ingest path and /ask latency against a deterministic fake chat model.
+
+Usage:
+    python -m benchmarks.run --pdf-pages 200 --text-kb 512 --concurrency 1,8,32 --requests 200 \
+        --output benchmarks/results/run.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.synthetic import identifier, make_pdf, make_text
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-pages", type=int, nargs="*", default=[100], help="Pages per synthetic PDF; one PDF per value.")
+    parser.add_argument("--words-per-page", type=int, default=400)
+    parser.add_argument("--text-kb", type=int, nargs="*", default=[256], help="Size of each synthetic text file in KB.")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated /ask concurrency levels.")
+    parser.add_argument("--requests", type=int, default=200, help="/ask requests per concurrency level.")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="Latency of the fake chat model.")
+    parser.add_argument("--answer-cache", action="store_true", help="Keep the semantic answer cache enabled.")
+    parser.add_argument("--embedding-model", default=None, help="Embedding model name or local path.")
+    parser.add_argument("--embedding-backend", default=None, choices=["torch", "onnx"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=None, help="Directory for generated files and stores (default: a temp dir).")
+    parser.add_argument("--output", default=None, help="Write the JSON results here (default: stdout only).")
+    return parser.parse_args(argv)
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    # ru_maxrss is reported in KB on Linux and in bytes on macOS.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def _rate(count: int, seconds: float) -> float:
+    return round(count / seconds, 2) if seconds > 0 else 0.0
+
+
+def configure(workdir: Path, args: argparse.Namespace) -> None:
+    """
+    Point every store at ``workdir`` before any service is built, so runs never touch ``data/``.
+    """
+    from backend.core.config import settings
+
+    data_dir = workdir / "data"
+    settings.data_dir = data_dir
+    settings.upload_dir = data_dir / "raw"
+    settings.vector_db_dir = data_dir / "vector_db"
+    settings.embedding_cache_path = data_dir / "embedding_cache" / "embeddings.sqlite3"
+    settings.manifest_path = settings.vector_db_dir / "manifest.json"
+    settings.lexical_index_dir = settings.vector_db_dir / "lexical"
+    settings.lock_dir = settings.vector_db_dir / "locks"
+    settings.parsed_text_cache_dir = data_dir / "parsed_text"
+    for directory in (settings.upload_dir, settings.vector_db_dir, settings.embedding_cache_path.parent):
+        directory.mkdir(parents=True, exist_ok=True)
+
+    settings.answer_cache_enabled = args.answer_cache
+    settings.ask_max_in_flight = max(settings.ask_max_in_flight, max(parse_levels(args.concurrency)))
+    settings.groq_api_key = settings.groq_api_key or "benchmark"
+    if args.embedding_model:
+        settings.embedding_model_name = args.embedding_model
+    if args.embedding_backend:
+        settings.embedding_backend = args.embedding_backend
+
+
+def parse_levels(value: str) -> List[int]:
+    return [int(level) for level in value.split(",") if level.strip()]
+
+
+def generate_inputs(workdir: Path, args: argparse.Namespace) -> List[Path]:
+    from backend.core.config import settings
+
+    files = []
+    for position, pages in enumerate(args.pdf_pages):
+        path = settings.upload_dir / f"bench_pdf_{position}_{pages}p.pdf"
+        files.append(make_pdf(path, pages, words_per_page=args.words_per_page, seed=args.seed + position))
+    for position, kilobytes in enumerate(args.text_kb):
+        path = settings.upload_dir / f"bench_text_{position}_{kilobytes}kb.txt"
+        files.append(make_text(path, kilobytes, seed=args.seed + 100 + position))
+    return files
+
+
+async def bench_ingest(files: List[Path]) -> List[Dict[str, Any]]:
+    from backend.core.dependency import get_ingest_service
+    from backend.services.ingest_pipeline import IngestProgress
+
+    ingest_service = get_ingest_service()
+    results = []
+    for path in files:
+        progress = IngestProgress()
+        started = time.perf_counter()
+        result = await ingest_service.ingest(path, progress=progress)
+        elapsed = time.perf_counter() - started
+        results.append(
+            {
+                "file": path.name,
+                "size_bytes": path.stat().st_size,
+                "collection": result.collection_name,
+                "pages": progress.pages_parsed,
+                "chunks": progress.chunks_parsed,
+                "embeddings": progress.chunks_embedded,
+                "wall_seconds": round(elapsed, 3),
+                "stage_seconds": {
+                    "parse": round(progress.parse_seconds, 3),
+                    "embed": round(progress.embed_seconds, 3),
+                    "upsert": round(progress.upsert_seconds, 3),
+                },
+                "pages_per_second": _rate(progress.pages_parsed, progress.parse_seconds),
+                "chunks_per_second": _rate(progress.chunks_parsed, progress.parse_seconds),
+                "embeddings_per_second": _rate(progress.chunks_embedded, progress.embed_seconds),
+                "upserts_per_second": _rate(progress.chunks_upserted, progress.upsert_seconds),
+                "end_to_end_chunks_per_second": _rate(progress.chunks_parsed, elapsed),
+                "peak_rss_mb": peak_rss_mb(),
+            }
+        )
+        print(f"ingest {path.name}: {results[-1]['end_to_end_chunks_per_second']} chunks/s", file=sys.stderr)
+    return results
+
+
+async def bench_query(collection: str, levels: List[int], requests: int) -> List[Dict[str, Any]]:
+    import httpx
+
+    from backend.main import app
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=300) as client:
+        await client.post("/ask", json={"query": "warmup", "collection": collection})
+        question_index = 0
+        for concurrency in levels:
+            latencies: List[float] = []
+            statuses: Dict[str, int] = {}
+            questions = [f"What is recorded for {identifier(question_index + i)}?" for i in range(requests)]
+            question_index += requests
+            queue: asyncio.Queue = asyncio.Queue()
+            for question in questions:
+                queue.put_nowait(question)
+
+            async def worker() -> None:
+                while not queue.empty():
+                    question = queue.get_nowait()
+                    started = time.perf_counter()
+                    response = await client.post("/ask", json={"query": question, "collection": collection})
+                    latencies.append(time.perf_counter() - started)
+                    statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+            results.append(
+                {
+                    "concurrency": concurrency,
+                    "requests": requests,
+                    "status_counts": statuses,
+                    "wall_seconds": round(elapsed, 3),
+                    "requests_per_second": _rate(requests, elapsed),
+                    "latency_ms": {
+                        "p50": round(percentile(latencies, 50) * 1000, 2),
+                        "p95": round(percentile(latencies, 95) * 1000, 2),
+                        "p99": round(percentile(latencies, 99) * 1000, 2),
+                        "max": round(max(latencies) * 1000, 2) if latencies else 0.0,
+                    },
+                    "peak_rss_mb": peak_rss_mb(),
+                }
+            )
+            print(
+                f"/ask c={concurrency}: p50 {results[-1]['latency_ms']['p50']}ms "
+                f"p99 {results[-1]['latency_ms']['p99']}ms, {results[-1]['requests_per_second']} req/s",
+                file=sys.stderr,
+            )
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _metadata(args: argparse.Namespace) -> Dict[str, Any]:
+    from backend.core.config import settings
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": {key: value for key, value in vars(args).items() if key not in ("workdir", "output")},
+        "settings": {
+            "embedding_model_name": settings.embedding_model_name,
+            "embedding_backend": settings.embedding_backend,
+            "chunk_size": settings.chunk_size,
+            "chunk_overlap": settings.chunk_overlap,
+            "embedding_batch_size": settings.embedding_batch_size,
+            "pdf_parse_workers": settings.pdf_parse_workers,
+            "hybrid_retrieval_enabled": settings.hybrid_retrieval_enabled,
+            "answer_cache_enabled": settings.answer_cache_enabled,
+        },
+    }
+
+
+async def run(args: argparse.Namespace, workdir: Path) -> Dict[str, Any]:
+    from backend.core.dependency import get_qa_pipeline_manager
+
+    from benchmarks.fake_chat import DeterministicChatModel
+
+    configure(workdir, args)
+    files = generate_inputs(workdir, args)
+    ingest = await bench_ingest(files)
+
+    get_qa_pipeline_manager().chat = DeterministicChatModel(latency_ms=args.llm_latency_ms)
+    query = await bench_query(ingest[0]["collection"], parse_levels(args.concurrency), args.requests)
+    return {"meta": _metadata(args), "ingest": ingest, "query": query, "peak_rss_mb": peak_rss_mb()}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.workdir:
+        workdir = Path(args.workdir)
+        workdir.mkdir(parents=True, exist_ok=True)
+        report = asyncio.run(run(args, workdir))
+    else:
+        with tempfile.TemporaryDirectory(prefix="pdfqa-bench-") as tmp:
+            report = asyncio.run(run(args, Path(tmp)))
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(payload + "\n", encoding="utf-8")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    print(payload)
+
+
+if __name__ == "__main__":
+    main()
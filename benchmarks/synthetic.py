@@ -0,0 +1,72 @@
+import random
+from pathlib import Path
+from typing import List, Union
+
+_WORDS = (
+    "system value table model answer question context page error code widget part data record "
+    "sensor pressure valve module firmware update release network cache latency throughput "
+    "document section figure result method analysis sample measure report limit threshold"
+).split()
+
+
+def identifier(index: int) -> str:
+    """
+    Identifier planted in the synthetic documents, so questions can target exact terms.
+    """
+    return f"ERR-{index:05d}"
+
+
+def _sentence(rng: random.Random, index: int) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(8, 18))]
+    words.insert(rng.randint(0, len(words)), identifier(index))
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraphs(rng: random.Random, words: int, start_index: int) -> List[str]:
+    sentences = []
+    count = 0
+    index = start_index
+    while count < words:
+        sentence = _sentence(rng, index)
+        sentences.append(sentence)
+        count += len(sentence.split())
+        index += 1
+    return sentences
+
+
+def make_pdf(path: Union[Path, str], pages: int, words_per_page: int = 400, seed: int = 0) -> Path:
+    """
+    Write a PDF with ``pages`` pages of deterministic pseudo-text.
+    """
+    import fitz
+
+    path = Path(path)
+    rng = random.Random(seed)
+    document = fitz.open()
+    index = 0
+    for _ in range(pages):
+        sentences = _paragraphs(rng, words_per_page, index)
+        index += len(sentences)
+        page = document.new_page()
+        page.insert_textbox(page.rect + (36, 36, -36, -36), " ".join(sentences), fontsize=7)
+    document.save(str(path))
+    document.close()
+    return path
+
+
+def make_text(path: Union[Path, str], kilobytes: int, seed: int = 0) -> Path:
+    """
+    Write a UTF-8 text file of roughly ``kilobytes`` KB of deterministic pseudo-text.
+    """
+    path = Path(path)
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    index = 0
+    while size < kilobytes * 1024:
+        paragraph = " ".join(_paragraphs(rng, 120, index))
+        index += paragraph.count("ERR-")
+        lines.append(paragraph)
+        size += len(paragraph) + 2
+    path.write_text("\n\n".join(lines), encoding="utf-8")
+    return path
@@ -135,28 +135,40 @@ export default function Home() {
       setQuestion("");
 
       try {
-        const response = await fetch(`${API_BASE_URL}/ask`, {
+        const response = await fetch(`${API_BASE_URL}/ask/stream`, {
           method: "POST",
           headers: { "Content-Type": "application/json" },
           body: JSON.stringify({ query: trimmed })
         });
 
-        if (!response.ok) {
+        if (!response.ok || !response.body) {
           const detail = await safeError(response);
           throw new Error(detail);
         }
 
-        const data = await response.json();
-        const rawContent =
-          typeof data.answer === "string"
-            ? data.answer
-            : JSON.stringify(data.answer, null, 2);
-        const content = normalizeMath(rawContent);
-
+        // Render tokens as they arrive instead of waiting for the full answer.
+        const assistantId = crypto.randomUUID();
+        let rawContent = "";
         setMessages((prev) => [
           ...prev,
-          { id: crypto.randomUUID(), role: "assistant", content }
+          { id: assistantId, role: "assistant", content: "" }
         ]);
+
+        await readEventStream(response.body, (eventName, data) => {
+          if (eventName === "token") {
+            rawContent += typeof data.text === "string" ? data.text : "";
+            const content = normalizeMath(rawContent);
+            setMessages((prev) =>
+              prev.map((message) =>
+                message.id === assistantId ? { ...message, content } : message
+              )
+            );
+          } else if (eventName === "error") {
+            throw new Error(
+              typeof data.detail === "string" ? data.detail : "Streaming failed."
+            );
+          }
+        });
       } catch (error) {
         setMessages((prev) => [
           ...prev,
@@ -339,6 +351,39 @@ async function safeError(response: Response) {
   return `${response.status} ${response.statusText}`;
 }
 
+async function readEventStream(
+  body: ReadableStream<Uint8Array>,
+  onEvent: (eventName: string, data: Record<string, unknown>) => void
+) {
+  const reader = body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf("\n\n");
+
+      let eventName = "message";
+      let data = "";
+      for (const line of rawEvent.split("\n")) {
+        if (line.startsWith("event:")) {
+          eventName = line.slice(6).trim();
+        } else if (line.startsWith("data:")) {
+          data += line.slice(5).trim();
+        }
+      }
+      onEvent(eventName, data ? JSON.parse(data) : {});
+    }
+  }
+}
+
 function formatBytes(bytes: number) {
   if (bytes === 0) return "0 B";
   const units = ["B", "KB", "MB", "GB", "TB"];
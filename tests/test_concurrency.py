@@ -0,0 +1,93 @@
+"""
+Coalescing concurrent calls with SingleFlight and rate limiting with TokenBucket.
+
+Run with ``python -m unittest discover tests``.
+"""
+
+import asyncio
+import unittest
+
+from backend.utils.concurrency import SingleFlight, TokenBucket
+
+
+class SingleFlightTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.flight = SingleFlight("test")
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def compute(self) -> int:
+        self.calls += 1
+        await self.release.wait()
+        return self.calls
+
+    async def test_concurrent_callers_share_one_computation(self) -> None:
+        callers = [asyncio.create_task(self.flight.run("key", self.compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        self.assertTrue(self.flight.in_flight("key"))
+        self.release.set()
+
+        self.assertEqual(await asyncio.gather(*callers), [1, 1, 1])
+        self.assertEqual(self.flight.coalesced, 2)
+        self.assertFalse(self.flight.in_flight("key"))
+
+    async def test_finished_call_is_not_reused(self) -> None:
+        self.release.set()
+        self.assertEqual(await self.flight.run("key", self.compute), 1)
+        self.assertEqual(await self.flight.run("key", self.compute), 2)
+        self.assertEqual(self.flight.coalesced, 0)
+
+    async def test_exception_reaches_every_caller(self) -> None:
+        async def fail() -> None:
+            await self.release.wait()
+            raise ValueError("boom")
+
+        callers = [asyncio.create_task(self.flight.run("key", fail)) for _ in range(2)]
+        await asyncio.sleep(0)
+        self.release.set()
+
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertFalse(self.flight.in_flight("key"))
+
+    async def test_cancelled_caller_does_not_cancel_the_others(self) -> None:
+        leaving = asyncio.create_task(self.flight.run("key", self.compute))
+        staying = asyncio.create_task(self.flight.run("key", self.compute))
+        await asyncio.sleep(0)
+
+        leaving.cancel()
+        await asyncio.sleep(0)
+        self.release.set()
+
+        self.assertEqual(await staying, 1)
+        self.assertTrue(leaving.cancelled())
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_full_bucket_allows_a_burst_then_waits(self) -> None:
+        bucket = TokenBucket(per_minute=60)
+        self.assertEqual(bucket.wait_time(60), 0.0)
+        bucket.consume(60)
+        self.assertAlmostEqual(bucket.wait_time(30), 30.0, delta=0.1)
+
+    def test_debt_is_paid_back_before_more_is_allowed(self) -> None:
+        bucket = TokenBucket(per_minute=60)
+        bucket.consume(90)
+        self.assertAlmostEqual(bucket.wait_time(1), 31.0, delta=0.1)
+        bucket.consume(-90)
+        self.assertEqual(bucket.wait_time(60), 0.0)
+
+    def test_request_larger_than_the_bucket_waits_for_a_full_bucket(self) -> None:
+        bucket = TokenBucket(per_minute=60)
+        bucket.consume(30)
+        self.assertAlmostEqual(bucket.wait_time(1000), 30.0, delta=0.1)
+
+    def test_zero_limit_is_unlimited(self) -> None:
+        bucket = TokenBucket(per_minute=0)
+        bucket.consume(1000)
+        self.assertTrue(bucket.unlimited)
+        self.assertEqual(bucket.wait_time(1000), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Packing retrieved chunks into the model's context: stitching, de-duplication and the token budget.
+
+Run with ``python -m unittest discover tests``.
+"""
+
+import unittest
+
+from langchain_core.documents import Document
+
+from backend.services.context_packer import ContextPacker, estimate_tokens
+
+
+def chunk(text: str, source: str = "notes.pdf", page: int = 0) -> Document:
+    return Document(page_content=text, metadata={"source": source, "page": page})
+
+
+class ContextPackerTest(unittest.TestCase):
+    def test_neighbouring_chunks_of_a_page_are_stitched_once(self) -> None:
+        first = chunk("The quick brown fox jumps over the lazy dog near the river bank")
+        second = chunk("lazy dog near the river bank and then runs all the way home")
+
+        (packed,) = ContextPacker(chunk_overlap=40).pack([second, first])
+        self.assertEqual(
+            packed.page_content,
+            "The quick brown fox jumps over the lazy dog near the river bank and then runs all the way home",
+        )
+        self.assertEqual(packed.metadata["merged_chunks"], 2)
+
+    def test_chunks_of_other_pages_are_not_stitched(self) -> None:
+        first = chunk("The quick brown fox jumps over the lazy dog near the river bank", page=0)
+        second = chunk("lazy dog near the river bank and then runs all the way home", page=1)
+
+        packed = ContextPacker(chunk_overlap=40).pack([first, second])
+        self.assertEqual([document.metadata["page"] for document in packed], [0, 1])
+        self.assertNotIn("merged_chunks", packed[0].metadata)
+
+    def test_near_duplicate_keeps_the_better_ranked_chunk(self) -> None:
+        text = "Invoices are due thirty days after the delivery date unless agreed otherwise"
+        documents = [chunk(text + " in writing", page=3), chunk(text, page=7), chunk("Unrelated text")]
+        packed = ContextPacker().pack(documents)
+        self.assertEqual([document.metadata["page"] for document in packed], [3, 0])
+
+    def test_blocks_that_do_not_fit_are_skipped(self) -> None:
+        fits = chunk("alpha beta gamma delta epsilon", page=0)
+        too_long = chunk("zeta eta theta iota kappa lambda mu nu xi", page=1)
+        small = chunk("omicron pi", page=2)
+
+        packed = ContextPacker(token_budget=10).pack([fits, too_long, small])
+        self.assertEqual([document.metadata["page"] for document in packed], [0, 2])
+
+    def test_oversized_best_block_is_cut_at_a_word_boundary(self) -> None:
+        text = " ".join(f"word{number}" for number in range(50))
+        (packed,) = ContextPacker(token_budget=5).pack([chunk(text)])
+        self.assertTrue(text.startswith(packed.page_content + " "))
+        self.assertLessEqual(estimate_tokens(packed.page_content), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
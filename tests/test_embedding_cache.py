@@ -0,0 +1,55 @@
+"""
+Embedding cache lookups, per-text hit flags and least-recently-used eviction.
+
+Run with ``python -m unittest discover tests``.
+"""
+
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from backend.services.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+class EmbeddingCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp.name) / "embeddings.sqlite"
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_least_recently_used_entries_are_evicted(self) -> None:
+        # Four float32 values take 16 bytes, so a third entry pushes the cache over 40 bytes.
+        cache = EmbeddingCache(self.db_path, max_bytes=40)
+        cache.put_many("fake", [("a", [1.0] * 4), ("b", [2.0] * 4)])
+        time.sleep(0.01)
+        cache.get_many(["a"])
+        time.sleep(0.01)
+        cache.put_many("fake", [("c", [3.0] * 4)])
+
+        self.assertEqual(sorted(cache.get_many(["a", "b", "c"])), ["a", "c"])
+
+    def test_cache_under_the_limit_keeps_everything(self) -> None:
+        cache = EmbeddingCache(self.db_path, max_bytes=48)
+        cache.put_many("fake", [(key, [1.0] * 4) for key in "abc"])
+        self.assertEqual(sorted(cache.get_many(["a", "b", "c"])), ["a", "b", "c"])
+
+    def test_repeated_and_cached_texts_count_as_hits(self) -> None:
+        embeddings = CachedEmbeddings(
+            DeterministicFakeEmbedding(size=4), model_name="fake", cache=EmbeddingCache(self.db_path)
+        )
+        embeddings.embed_documents(["alpha"])
+        vectors, stats = embeddings.embed_documents_with_stats(["alpha", "beta", "beta"])
+
+        self.assertEqual((stats.hits, stats.misses), (2, 1))
+        self.assertEqual(stats.cached, [True, False, True])
+        self.assertEqual(vectors[1], vectors[2])
+        self.assertEqual((stats.subset([0]).hits, stats.subset([1]).misses), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
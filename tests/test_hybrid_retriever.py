@@ -0,0 +1,42 @@
+"""
+Reciprocal-rank fusion of vector and lexical rankings.
+
+Run with ``python -m unittest discover tests``.
+"""
+
+import unittest
+
+from langchain_core.documents import Document
+
+from backend.services.hybrid_retriever import reciprocal_rank_fusion
+
+
+def ranking(*ids: str):
+    return [Document(id=doc_id, page_content=f"text of {doc_id}") for doc_id in ids]
+
+
+class ReciprocalRankFusionTest(unittest.TestCase):
+    def test_documents_found_by_both_rankings_come_first(self) -> None:
+        fused = reciprocal_rank_fusion([ranking("a", "b", "c"), ranking("d", "c", "b")], k=4)
+        self.assertEqual([document.id for document in fused], ["b", "c", "a", "d"])
+
+    def test_result_is_cut_to_k(self) -> None:
+        fused = reciprocal_rank_fusion([ranking("a", "b", "c"), ranking("c", "d")], k=2)
+        self.assertEqual([document.id for document in fused], ["c", "a"])
+
+    def test_documents_without_ids_are_matched_by_text(self) -> None:
+        vector = [Document(page_content="shared"), Document(page_content="vector only")]
+        lexical = [Document(page_content="lexical only"), Document(page_content="shared")]
+        fused = reciprocal_rank_fusion([vector, lexical], k=3)
+        self.assertEqual(fused[0].page_content, "shared")
+        self.assertEqual(len(fused), 3)
+
+    def test_first_copy_of_a_document_is_kept(self) -> None:
+        vector = [Document(id="a", page_content="text", metadata={"from": "vector"})]
+        lexical = [Document(id="a", page_content="text", metadata={"from": "lexical"})]
+        (fused,) = reciprocal_rank_fusion([vector, lexical], k=5)
+        self.assertEqual(fused.metadata, {"from": "vector"})
+
+
+if __name__ == "__main__":
+    unittest.main()
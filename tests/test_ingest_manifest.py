@@ -0,0 +1,57 @@
+"""
+Collection versions and the active collection recorded in the ingest manifest.
+
+Run with ``python -m unittest discover tests``.
+"""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from backend.services.ingest_manifest import IngestManifest
+
+
+class IngestManifestTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "manifest.json"
+        self.manifest = IngestManifest(self.path)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def record(self, changed: bool = True) -> None:
+        self.manifest.record("notes_kb", changed=changed, file_hash="abc", chunk_size=500, chunk_overlap=50)
+
+    def test_version_is_bumped_only_when_chunks_change(self) -> None:
+        self.assertEqual(self.manifest.version("notes_kb"), 0)
+        self.record()
+        self.record()
+        self.assertEqual(self.manifest.version("notes_kb"), 2)
+        self.record(changed=False)
+        self.assertEqual(self.manifest.version("notes_kb"), 2)
+
+    def test_entry_is_current_only_for_the_same_file_and_chunking(self) -> None:
+        self.record()
+        self.assertTrue(self.manifest.is_current("notes_kb", "abc", 500, 50))
+        self.assertFalse(self.manifest.is_current("notes_kb", "abc", 500, 0))
+        self.assertFalse(self.manifest.is_current("notes_kb", "def", 500, 50))
+
+    def test_active_collection_is_shared_and_cleared_on_remove(self) -> None:
+        self.record()
+        self.manifest.activate("notes_kb")
+        self.assertEqual(IngestManifest(self.path).active(), "notes_kb")
+        self.manifest.remove("notes_kb")
+        self.assertIsNone(self.manifest.active())
+        self.assertEqual(self.manifest.names(), [])
+
+    def test_flat_manifest_from_older_versions_is_read(self) -> None:
+        self.path.write_text(json.dumps({"notes_kb": {"file_hash": "abc", "chunk_size": 500, "chunk_overlap": 50}}))
+        self.assertEqual(self.manifest.version("notes_kb"), 1)
+        self.record()
+        self.assertEqual(self.manifest.version("notes_kb"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
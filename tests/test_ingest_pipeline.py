@@ -0,0 +1,94 @@
+"""
+Pipeline runs that fail or are cancelled partway, and per-file stats of shared batches.
+
+Run with ``python -m unittest discover tests``.
+"""
+
+import asyncio
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from backend.services.embedding_cache import CachedEmbeddings, EmbeddingCache
+from backend.services.ingest_pipeline import IngestPipeline, PipelineSource
+from backend.services.numpy_vector_store import NumpyVectorStoreManager
+
+
+def chunks(prefix: str, count: int) -> List[Document]:
+    return [Document(page_content=f"{prefix} chunk {number}", metadata={"page": 0}) for number in range(count)]
+
+
+class IngestPipelineTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.manager = NumpyVectorStoreManager(persist_directory=str(root / "vector_db"))
+        self.manager.embeddings = CachedEmbeddings(
+            DeterministicFakeEmbedding(size=16), model_name="fake", cache=EmbeddingCache(root / "embeddings.sqlite")
+        )
+        self.pipeline = IngestPipeline(self.manager, embedding_batch_size=4, queue_size=1)
+        self.closed: List[str] = []
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def batches(self, name: str, *parts: List[Document], fail: bool = False, block: Optional[threading.Event] = None):
+        def generate() -> Iterator[List[Document]]:
+            try:
+                yield from parts
+                if block is not None:
+                    block.wait(10)
+                if fail:
+                    raise ValueError(f"{name} is corrupt")
+            finally:
+                self.closed.append(name)
+
+        return generate()
+
+    async def test_failed_parse_removes_the_chunks_already_written(self) -> None:
+        source = PipelineSource(self.batches("a", chunks("a", 6), fail=True), set(), collection_name="a_kb")
+        await self.pipeline.run_many([source])
+
+        self.assertIsInstance(source.error, ValueError)
+        self.assertEqual(source.result.chunks_added, 0)
+        self.assertEqual(await self.manager.count_documents("a_kb"), 0)
+        self.assertEqual(self.closed, ["a"])
+
+    async def test_cancelled_run_closes_generators_and_rolls_back(self) -> None:
+        block = threading.Event()
+        first = PipelineSource(self.batches("a", chunks("a", 6), block=block), set(), collection_name="a_kb")
+        second = PipelineSource(self.batches("b", chunks("b", 2)), set(), collection_name="b_kb")
+        run = asyncio.create_task(self.pipeline.run_many([first, second]))
+        while first.progress.chunks_upserted < 4:
+            await asyncio.sleep(0.01)
+
+        run.cancel()
+        # The blocked read finishes on its own, after the run was cancelled.
+        asyncio.get_running_loop().call_later(0.1, block.set)
+        with self.assertRaises(asyncio.CancelledError):
+            await run
+
+        self.assertEqual(self.closed, ["a"])
+        # The second file was never reached; its generator is closed before it ever ran.
+        self.assertIsNone(second.chunk_batches.gi_frame)
+        self.assertEqual(await self.manager.count_documents("a_kb"), 0)
+
+    async def test_shared_batches_credit_cache_hits_to_their_file(self) -> None:
+        await self.manager.embed_documents(chunks("a", 3))
+        first = PipelineSource(self.batches("a", chunks("a", 3)), set(), collection_name="a_kb")
+        second = PipelineSource(self.batches("b", chunks("b", 2)), set(), collection_name="b_kb")
+        await self.pipeline.run_many([first, second], parse_concurrency=2)
+
+        self.assertEqual((first.result.embedding_stats.hits, first.result.embedding_stats.misses), (3, 0))
+        self.assertEqual((second.result.embedding_stats.hits, second.result.embedding_stats.misses), (0, 2))
+        self.assertEqual(first.result.chunks_added + second.result.chunks_added, 5)
+        self.assertEqual(self.closed.count("a") + self.closed.count("b"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Ingest job status shared between workers through the status file.
+
+Run with ``python -m unittest discover tests``.
+"""
+
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Optional
+
+from backend.services.ingest_pipeline import IngestProgress
+from backend.services.ingest_service import IngestResult
+from backend.services.job_service import IngestJobManager
+
+
+class GatedIngestService:
+    """
+    Ingests nothing; each ingest reports some progress and waits until ``release`` is set.
+    """
+
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def ingest(
+        self,
+        file_path: Path,
+        progress: Optional[IngestProgress] = None,
+        name: Optional[str] = None,
+        file_hash: Optional[str] = None,
+    ) -> IngestResult:
+        progress.stage = "processing"
+        progress.chunks_embedded = 7
+        await self.release.wait()
+        if name == "broken.pdf":
+            raise ValueError("broken.pdf has no pages")
+        return IngestResult(collection_name="notes_kb", file_hash=file_hash or "", num_docs=7, chunks_added=7)
+
+
+class SharedJobStatusTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.status_path = Path(self.tmp.name) / "jobs.json"
+        self.service = GatedIngestService()
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def manager(self, **kwargs) -> IngestJobManager:
+        return IngestJobManager(self.service, status_path=self.status_path, status_interval_seconds=0.01, **kwargs)
+
+    async def wait_for(self, manager: IngestJobManager, job_id: str, status: str) -> None:
+        for _ in range(500):
+            if manager.get(job_id).status == status:
+                return
+            await asyncio.sleep(0.01)
+        self.fail(f"Job {job_id} never reached '{status}'.")
+
+    async def test_other_worker_sees_progress_and_result(self) -> None:
+        worker_a, worker_b = self.manager(), self.manager()
+        job = await worker_a.submit(Path("notes.pdf"), file_hash="abc")
+        self.assertIn(worker_b.get(job.job_id).status, ("queued", "running"))
+
+        await self.wait_for(worker_b, job.job_id, "running")
+        for _ in range(500):
+            if worker_b.get(job.job_id).progress.chunks_embedded == 7:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(worker_b.get(job.job_id).progress.stage, "processing")
+
+        self.service.release.set()
+        await self.wait_for(worker_b, job.job_id, "completed")
+        seen = worker_b.get(job.job_id)
+        self.assertEqual(seen.result.collection_name, "notes_kb")
+        self.assertEqual(seen.filename, "notes.pdf")
+        self.assertGreater(seen.elapsed_seconds, 0)
+
+    async def test_other_worker_sees_failure(self) -> None:
+        worker_a, worker_b = self.manager(), self.manager()
+        self.service.release.set()
+        job = await worker_a.submit(Path("broken.pdf"))
+        await self.wait_for(worker_b, job.job_id, "failed")
+        self.assertEqual(worker_b.get(job.job_id).error, "broken.pdf has no pages")
+        self.assertIsNone(worker_b.get("missing"))
+
+    async def test_status_file_keeps_the_newest_finished_jobs(self) -> None:
+        worker = self.manager(max_retained_jobs=2, concurrency=1)
+        self.service.release.set()
+        jobs = [await worker.submit(Path(f"file{number}.pdf")) for number in range(4)]
+        reader = self.manager()
+        await self.wait_for(reader, jobs[-1].job_id, "completed")
+
+        self.assertEqual([reader.get(job.job_id) is not None for job in jobs], [False, False, True, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
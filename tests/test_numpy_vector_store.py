@@ -0,0 +1,81 @@
+"""
+Closing numpy indexes when collections are evicted, dropped or shut down.
+
+Run with ``python -m unittest discover tests``.
+"""
+
+import asyncio
+import tempfile
+import threading
+import unittest
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from backend.services.embedding_cache import CachedEmbeddings
+from backend.services.numpy_vector_store import NumpyVectorStoreManager
+
+
+class NumpyIndexCloseTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manager = NumpyVectorStoreManager(persist_directory=self.tmp.name)
+        self.manager.embeddings = CachedEmbeddings(DeterministicFakeEmbedding(size=16), model_name="fake")
+
+    def tearDown(self) -> None:
+        self.manager.close()
+        self.tmp.cleanup()
+
+    async def searched_index(self, collection_name: str):
+        documents = [Document(page_content=text) for text in ("alpha", "beta", "gamma")]
+        await self.manager.add_documents(documents, ids=["a", "b", "c"], collection_name=collection_name)
+        store = await self.manager._get_store(collection_name)
+        await asyncio.to_thread(store.similarity_search, "alpha", 2)
+        self.assertIsNotNone(store.index._reader)
+        return store.index
+
+    async def test_release_and_reload_close_the_reader(self) -> None:
+        released = await self.searched_index("first_kb")
+        reloaded = await self.searched_index("second_kb")
+        await self.manager.set_collection("second_kb")
+
+        self.manager.release_collection("first_kb")
+        self.manager.reload_collection("second_kb")
+        self.assertIsNone(released._reader)
+        self.assertIsNone(reloaded._reader)
+        self.assertEqual(await self.manager.count_documents("second_kb"), 3)
+
+    async def test_clean_database_and_close_close_every_reader(self) -> None:
+        dropped = await self.searched_index("first_kb")
+        await self.manager.clean_database()
+        self.assertIsNone(dropped._reader)
+
+        closed = await self.searched_index("second_kb")
+        self.manager.close()
+        self.assertIsNone(closed._reader)
+        self.assertEqual(await self.manager.count_documents("second_kb"), 3)
+
+    async def test_close_waits_for_running_search(self) -> None:
+        index = await self.searched_index("first_kb")
+        scored, release = threading.Event(), threading.Event()
+        search = index.search
+
+        def blocking_search(*args, **kwargs):
+            hits = search(*args, **kwargs)
+            scored.set()
+            release.wait(10)
+            return hits
+
+        index.search = blocking_search
+        query = asyncio.create_task(asyncio.to_thread(index.query, [[1.0] * 16], 2))
+        await asyncio.to_thread(scored.wait, 10)
+        index.close()
+        self.assertIsNotNone(index._reader)
+        release.set()
+
+        self.assertEqual(len((await query)[0]), 2)
+        self.assertIsNone(index._reader)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Questions scoped to several collections or to pages of a file.
+
+Run with ``python -m unittest discover tests``.
+"""
+
+import asyncio
+import tempfile
+import unittest
+from typing import List
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from backend.services.embedding_cache import CachedEmbeddings
+from backend.services.hybrid_retriever import HybridRetriever, scoped_retrieve
+from backend.services.lexical_index import BM25Index
+from backend.services.numpy_vector_store import NumpyVectorStoreManager
+from backend.services.search_scope import MetadataFilter
+
+
+class KeywordEmbedding(Embeddings):
+    """
+    Embeds a text by which of a few words it contains, so similarities are easy to predict.
+    """
+
+    words = ("apple", "pear")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return [1.0 if word in text.split() else 0.0 for word in self.words]
+
+
+class ScopedRetrieveTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manager = NumpyVectorStoreManager(persist_directory=self.tmp.name)
+        self.manager.embeddings = CachedEmbeddings(KeywordEmbedding(), model_name="keywords")
+
+    def tearDown(self) -> None:
+        self.manager.close()
+        self.tmp.cleanup()
+
+    async def hybrid_retriever(self, collection_name: str, texts: List[str]) -> HybridRetriever:
+        ids = [f"{collection_name}-{number}" for number in range(len(texts))]
+        documents = [Document(page_content=text) for text in texts]
+        await self.manager.add_documents(documents, ids=ids, collection_name=collection_name)
+        vector_retriever = await self.manager.get_retriever(k_value=3, collection_name=collection_name)
+        lexical_index = BM25Index.build(ids, texts, [{} for _ in texts])
+        return HybridRetriever(vector_retriever=vector_retriever, lexical_index=lexical_index, k=2, fetch_k=3)
+
+    async def test_every_collection_contributes_its_best_hits(self) -> None:
+        # "apple" is rare in the first collection and in every chunk of the second, so all of the
+        # first collection's BM25 scores are far higher, and its vector hits are closer as well.
+        rare = await self.hybrid_retriever("rare_kb", ["apple one", "apple two", "pear", "pear", "pear", "pear"])
+        common = await self.hybrid_retriever("common_kb", ["apple pear x", "apple pear y", "apple pear z"])
+
+        (documents,) = await asyncio.to_thread(scoped_retrieve, [rare, common], ["apple"], [[1.0, 0.0]])
+        self.assertEqual(sorted(document.id for document in documents), ["common_kb-0", "rare_kb-0"])
+
+
+class PageNumberTest(unittest.TestCase):
+    def test_pages_counted_from_one_match_stored_pages(self) -> None:
+        search_filter = MetadataFilter.build(pages=[(1, 2), (10, None)], first_page=1)
+        self.assertEqual(search_filter.pages, ((0, 1), (9, None)))
+        self.assertTrue(search_filter.matches({"page": 0}))
+        self.assertFalse(search_filter.matches({"page": 2}))
+
+    def test_page_zero_is_rejected_when_counting_from_one(self) -> None:
+        with self.assertRaises(ValueError):
+            MetadataFilter.build(pages=[(0, 3)], first_page=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Two workers sharing one data directory, each with its own vector store manager.
+
+Run with ``python -m unittest discover tests``.
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from backend.services.embedding_cache import CachedEmbeddings
+from backend.services.ingest_manifest import IngestManifest
+from backend.services.ingest_service import IngestService
+from backend.services.numpy_vector_store import NumpyIndex, NumpyVectorStoreManager
+from backend.services.pipeline_registry import PipelineRegistry
+from backend.services.qa_service import QAPipelineManager
+
+
+def paragraphs(prefix: str, count: int) -> str:
+    return "\n\n".join(f"{prefix} paragraph {number} " + "filler words " * 20 for number in range(count))
+
+
+class SharedCollectionTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.file_path = self.root / "notes.txt"
+        self.managers = []
+
+    def tearDown(self) -> None:
+        for manager in self.managers:
+            manager.close()
+        self.tmp.cleanup()
+
+    def worker(self) -> IngestService:
+        manifest = IngestManifest(self.root / "vector_db" / "manifest.json")
+        manager = NumpyVectorStoreManager(persist_directory=str(self.root / "vector_db"), version_of=manifest.version)
+        manager.embeddings = CachedEmbeddings(DeterministicFakeEmbedding(size=16), model_name="fake")
+        self.managers.append(manager)
+        registry = PipelineRegistry(vector_store_manager=manager, manifest=manifest)
+        return IngestService(
+            vector_store_manager=manager,
+            qa_pipeline_manager=QAPipelineManager(api_key="test", pipeline_registry=registry, manifest=manifest),
+            manifest=manifest,
+            pipeline_registry=registry,
+            chunk_size=300,
+            chunk_overlap=0,
+            lock_dir=self.root / "vector_db" / "locks",
+        )
+
+    async def ingest(self, worker: IngestService, text: str):
+        self.file_path.write_text(text, encoding="utf-8")
+        return await worker.ingest(self.file_path)
+
+    async def test_ingest_after_another_worker_keeps_its_rows(self) -> None:
+        worker_a, worker_b = self.worker(), self.worker()
+        await self.ingest(worker_a, paragraphs("first", 5))
+        await self.ingest(worker_b, paragraphs("first", 5) + "\n\n" + paragraphs("second", 3))
+        # Worker A still has the collection open at the version it wrote.
+        result = await self.ingest(worker_a, paragraphs("first", 5) + "\n\n" + paragraphs("third", 2))
+
+        self.assertEqual(result.chunks_added, 2)
+        self.assertEqual(result.chunks_removed, 3)
+        index = NumpyIndex(self.root / "vector_db" / "numpy" / result.collection_name)
+        texts = [document.page_content for document in index.documents(index.all_rows())]
+        index.close()
+        self.assertEqual(index.count, result.num_docs)
+        self.assertEqual(sorted(text.split(" paragraph")[0] for text in texts), ["first"] * 5 + ["third"] * 2)
+
+    async def test_store_written_by_another_worker_is_stale(self) -> None:
+        worker_a, worker_b = self.worker(), self.worker()
+        result = await self.ingest(worker_a, paragraphs("first", 5))
+        self.assertFalse(worker_a.vector_store_manager.is_stale(result.collection_name))
+        await self.ingest(worker_b, paragraphs("second", 3))
+        self.assertTrue(worker_a.vector_store_manager.is_stale(result.collection_name))
+        self.assertFalse(worker_b.vector_store_manager.is_stale(result.collection_name))
+
+    async def test_ingest_leaves_chat_client_unloaded(self) -> None:
+        worker = self.worker()
+        result = await self.ingest(worker, paragraphs("first", 2))
+        self.assertEqual(worker.qa_pipeline_manager.active_collection, result.collection_name)
+        self.assertFalse(worker.qa_pipeline_manager.chat_ready)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Content-addressed uploads: de-duplication, the size limit and resolving names.
+
+Run with ``python -m unittest discover tests``.
+"""
+
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from fastapi import UploadFile
+
+from backend.services.upload_service import UploadService, UploadTooLargeError
+
+
+def upload(data: bytes, filename: str = "report.pdf") -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+class UploadServiceTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.service = UploadService(save_dir=self.root, max_bytes=64, chunk_size=16)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def stored_objects(self):
+        return sorted(path for path in (self.root / "objects").rglob("*") if path.is_file())
+
+    async def test_identical_bytes_are_stored_once(self) -> None:
+        first = await self.service.save(upload(b"same bytes"))
+        second = await self.service.save(upload(b"same bytes", filename="copy.pdf"))
+
+        self.assertFalse(first.duplicate)
+        self.assertTrue(second.duplicate)
+        self.assertEqual(first.path, second.path)
+        self.assertEqual(self.stored_objects(), [first.path])
+        self.assertEqual(self.service.resolve("copy.pdf").sha256, first.sha256)
+
+    async def test_new_bytes_under_an_existing_name_keep_the_old_object(self) -> None:
+        first = await self.service.save(upload(b"first version"))
+        second = await self.service.save(upload(b"second version"))
+
+        self.assertNotEqual(first.path, second.path)
+        self.assertEqual(self.stored_objects(), sorted([first.path, second.path]))
+        self.assertEqual(self.service.resolve("report.pdf").path, second.path)
+
+    async def test_oversized_upload_is_rejected_without_leftovers(self) -> None:
+        with self.assertRaises(UploadTooLargeError):
+            await self.service.save(upload(b"x" * 65))
+
+        self.assertEqual(self.stored_objects(), [])
+        self.assertIsNone(self.service.resolve("report.pdf"))
+
+    async def test_upload_at_the_limit_is_accepted(self) -> None:
+        stored = await self.service.save(upload(b"x" * 64))
+        self.assertEqual(stored.size_bytes, 64)
+        self.assertEqual(stored.path.read_bytes(), b"x" * 64)
+
+    async def test_path_segments_are_dropped_from_the_name(self) -> None:
+        stored = await self.service.save(upload(b"data", filename='"../../etc/report.pdf"'))
+        self.assertEqual(stored.filename, "report.pdf")
+        self.assertTrue(stored.path.is_relative_to(self.root / "objects"))
+
+
+if __name__ == "__main__":
+    unittest.main()
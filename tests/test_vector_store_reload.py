@@ -0,0 +1,80 @@
+"""
+Reloading a Chroma collection while searches are running on the previous client.
+
+Run with ``python -m unittest discover tests``.
+"""
+
+import asyncio
+import tempfile
+import threading
+import unittest
+from typing import List
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from backend.services.embedding_cache import CachedEmbeddings
+from backend.services.vector_store_service import VectorStoreManager
+
+
+class BlockingEmbedding(Embeddings):
+    """
+    Holds query embeddings until ``release`` is set, so a search can be paused midway.
+    """
+
+    def __init__(self):
+        self.model = DeterministicFakeEmbedding(size=16)
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        self.entered.set()
+        self.release.wait(10)
+        return self.model.embed_query(text)
+
+
+class ReloadDuringQueryTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.model = BlockingEmbedding()
+        self.manager = VectorStoreManager(persist_directory=self.tmp.name)
+        self.manager.embeddings = CachedEmbeddings(self.model, model_name="fake")
+
+    def tearDown(self) -> None:
+        self.manager.close()
+        self.tmp.cleanup()
+
+    async def add(self, *texts: str) -> None:
+        documents = [Document(page_content=text) for text in texts]
+        await self.manager.add_documents(documents, ids=list(texts), collection_name="notes_kb")
+
+    async def test_search_running_during_reload_completes(self) -> None:
+        await self.add("alpha", "beta", "gamma")
+        retriever = await self.manager.get_retriever(k_value=3, collection_name="notes_kb")
+
+        self.model.release.clear()
+        search = asyncio.create_task(asyncio.to_thread(retriever.invoke, "alpha"))
+        await asyncio.to_thread(self.model.entered.wait, 10)
+        self.assertTrue(self.manager.reload_collection("notes_kb"))
+        await self.add("delta")
+        self.model.release.set()
+
+        documents = await search
+        self.assertEqual(len(documents), 3)
+        self.assertLessEqual({document.page_content for document in documents}, {"alpha", "beta", "gamma", "delta"})
+        self.assertEqual(await self.manager.count_documents("notes_kb"), 4)
+
+    async def test_retired_client_is_stopped_after_grace_period(self) -> None:
+        await self.add("alpha")
+        self.manager.retired_client_grace_seconds = 0
+        self.manager.reload_collection("notes_kb")
+        self.assertEqual(self.manager._retired, [])
+        self.assertEqual(await self.manager.count_documents("notes_kb"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()